@@ -0,0 +1,98 @@
+"""
+Measures how many plays an :py:mod:`asyncio` server can save per second with :py:meth:`pyspl.Play.asave`,
+against calling :py:meth:`pyspl.Play.save` from its coroutines, and how long the event loop is blocked meanwhile.
+
+Every play is saved by its own coroutine, all at once, as requests would be. The event loop's lag is the
+longest a coroutine waking up every millisecond had to wait past its time.
+
+Run with ``python benchmarks/async_renders.py [plays]``.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import sys
+import tempfile
+import time
+
+import pyspl
+
+def make_play(lines: int) -> pyspl.Play:
+    play = pyspl.Play('A benchmark.', seed=0)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'Some numbers.')
+
+        def scene(self):
+            self.enter(romeo, juliet)
+            for n in range(lines // 2):
+                self.set(romeo, pyspl.sum(juliet, n % 1000))
+                self.print(romeo, int)
+            self.exit()
+
+    play.add_act(Numbers(play), 'I', 'Some numbers.')
+    return play
+
+async def blocking_save(play: pyspl.Play, path: str) -> None:
+    play.save(path)
+
+async def serve(plays: list[pyspl.Play], directory: str, save) -> tuple[float, float]:
+    """
+    Saves every play with ``save(play, path)``, and returns how long it took and the event loop's lag.
+    """
+    lag = 0.0
+    done = False
+
+    async def watch():
+        nonlocal lag
+        while not done:
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - expected)
+
+    watcher = asyncio.create_task(watch())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(save(play, os.path.join(directory, f'play{i}.spl')) for i, play in enumerate(plays)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await watcher
+    return elapsed, lag
+
+def measure(plays: int = 100, lines: int = 10_000) -> dict[str, float]:
+    """
+    :param plays: The number of plays saved at once.
+    :param lines: The size of each play.
+    """
+    metrics = {}
+    items = [make_play(lines) for _ in range(plays)]
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(workers) as threads, \
+            ProcessPoolExecutor(workers) as processes:
+        # Starts the worker processes and fills the phrase caches, so that no variant pays for it.
+        list(processes.map(abs, range(workers)))
+        items[0].code()
+        for name, save in (
+            ('blocking', blocking_save),
+            ('asave', lambda play, path: play.asave(path, executor=threads)),
+            ('asave_processes', lambda play, path: play.asave(path, executor=processes)),
+        ):
+            elapsed, lag = asyncio.run(serve(items, directory, save))
+            metrics[f'async_renders.plays_{plays}.lines_{lines}.{name}.seconds'] = elapsed
+            metrics[f'async_renders.plays_{plays}.lines_{lines}.{name}.loop_lag.seconds'] = lag
+    return metrics
+
+def main():
+    plays = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    lines = 10_000
+    metrics = measure(plays, lines)
+    for name in ('blocking', 'asave', 'asave_processes'):
+        elapsed = metrics[f'async_renders.plays_{plays}.lines_{lines}.{name}.seconds']
+        lag = metrics[f'async_renders.plays_{plays}.lines_{lines}.{name}.loop_lag.seconds']
+        print(f'{name}: {plays / elapsed:.1f} plays/s, event loop blocked for up to {lag * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
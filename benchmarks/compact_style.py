@@ -0,0 +1,67 @@
+"""
+Compares the size and write time of plays saved in the ``'compact'`` style against the ``'default'`` style.
+
+Run with ``python benchmarks/compact_style.py``.
+"""
+import os
+import random
+import tempfile
+import time
+
+import pyspl
+
+def make_play(seed: int) -> pyspl.Play:
+    rng = random.Random(seed)
+    numbers = [rng.randrange(-2**31, 2**31) for _ in range(500)]
+    play = pyspl.Play('A benchmark.', seed=seed)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'Some numbers.')
+
+        def scene(self):
+            self.enter(romeo, juliet)
+            for n in numbers:
+                self.set(romeo, pyspl.sum(juliet, n))
+                self.print(romeo, int)
+            self.exit()
+
+    for i in range(5):
+        play.add_act(Numbers(play), str(i + 1), 'Some numbers.')
+    return play
+
+def save(plays: list[pyspl.Play], directory: str, style: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    for i, play in enumerate(plays):
+        play.save(os.path.join(directory, f'{style}{i}.spl'), style=style)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(directory, f'{style}{i}.spl')) for i in range(len(plays)))
+    return size, elapsed
+
+def measure(plays: int = 10) -> dict[str, float]:
+    corpus = [make_play(seed) for seed in range(plays)]
+    with tempfile.TemporaryDirectory() as directory:
+        # Warm up the phrase and plan caches, so neither style is penalised for going first.
+        save(corpus, directory, 'default')
+        save(corpus, directory, 'compact')
+        default_size, default_time = save(corpus, directory, 'default')
+        compact_size, compact_time = save(corpus, directory, 'compact')
+    assert compact_size < default_size, 'compact style is not smaller'
+    return {
+        f'compact_style.plays_{plays}.default.bytes': default_size,
+        f'compact_style.plays_{plays}.default.seconds': default_time,
+        f'compact_style.plays_{plays}.compact.bytes': compact_size,
+        f'compact_style.plays_{plays}.compact.seconds': compact_time,
+    }
+
+def main():
+    default_size, default_time, compact_size, compact_time = measure().values()
+    print(f'default: {default_size:,} bytes, {default_time:.2f} s')
+    print(f'compact: {compact_size:,} bytes, {compact_time:.2f} s')
+    print(f'saved:   {1 - compact_size / default_size:.1%} of the size, {1 - compact_time / default_time:.1%} of the time')
+
+if __name__ == '__main__':
+    main()
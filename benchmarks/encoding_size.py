@@ -0,0 +1,58 @@
+"""
+Compares the size of numbers written by :py:class:`pyspl.Int` against a naive binary decomposition,
+where every set bit becomes its own noun phrase chained together with :py:class:`pyspl.sum`.
+
+Run with ``python benchmarks/encoding_size.py``.
+"""
+import random
+import time
+
+import pyspl
+from pyspl.operations import _leaf_cost, _plan
+
+def naive(n: int) -> pyspl.Value:
+    sign = -1 if n < 0 else 1
+    bits = [sign * (1 << i) for i in range(abs(n).bit_length()) if abs(n) >> i & 1]
+    value = bits.pop()
+    while bits:
+        value = pyspl.sum(value, bits.pop())
+    return value
+
+def naive_words(n: int) -> int:
+    bits = [1 << i for i in range(abs(n).bit_length()) if abs(n) >> i & 1]
+    return sum(_leaf_cost(b) for b in bits) + 4 * (len(bits) - 1)
+
+def measure() -> dict[str, float]:
+    random.seed(0)
+    samples = [*range(-512, 513), *(random.randrange(1, 2**32) for _ in range(2000))]
+    samples = [n for n in samples if n != 0]
+
+    _plan.cache_clear()
+    start = time.perf_counter()
+    encoded = [len(str(pyspl.Int(n))) for n in samples]
+    elapsed = time.perf_counter() - start
+    baseline = [len(pyspl.value_as_str(naive(n))) for n in samples]
+
+    words = [_plan(n)[0] for n in samples]
+    larger = [n for n, w in zip(samples, words) if w > naive_words(n)]
+    assert not larger, f'encoding is larger than the naive decomposition for {larger[:10]}'
+    return {
+        'encoding_size.naive.bytes': sum(baseline),
+        'encoding_size.encoded.bytes': sum(encoded),
+        'encoding_size.naive.words': sum(naive_words(n) for n in samples),
+        'encoding_size.encoded.words': sum(words),
+        'encoding_size.encode.seconds': elapsed,
+    }
+
+def main():
+    metrics = measure()
+    naive_bytes, encoded_bytes = metrics['encoding_size.naive.bytes'], metrics['encoding_size.encoded.bytes']
+    print(f'numbers:       {1024 + 2000}')
+    print(f'naive bytes:   {naive_bytes}')
+    print(f'encoded bytes: {encoded_bytes} ({encoded_bytes / naive_bytes:.1%} of naive)')
+    print(f'naive words:   {metrics["encoding_size.naive.words"]}')
+    print(f'encoded words: {metrics["encoding_size.encoded.words"]}')
+    print(f'encode time:   {metrics["encoding_size.encode.seconds"] * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
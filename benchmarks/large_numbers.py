@@ -0,0 +1,39 @@
+"""
+Measures the size of the code for powers of 2 up to ``2 ** 10000``, and how long it takes to write them.
+
+Run with ``python benchmarks/large_numbers.py``.
+"""
+import time
+
+import pyspl
+from pyspl.operations import _plan
+
+POWERS = (10, 32, 56, 64, 100, 500, 1000, 2500, 5000, 7500, 10000)
+
+def encode(n: int) -> tuple[str, float]:
+    _plan.cache_clear()
+    start = time.perf_counter()
+    code = pyspl.value_as_str(n, seed=0)
+    elapsed = time.perf_counter() - start
+    # Repeated squaring and cubing: the size grows with log(k), not with k.
+    assert len(code.split()) < 100, f'{n} takes {len(code.split())} words'
+    return code, elapsed
+
+def measure() -> dict[str, float]:
+    words = seconds = 0.0
+    for k in POWERS:
+        for n in (2**k, -2**k):
+            code, elapsed = encode(n)
+            words += len(code.split())
+            seconds += elapsed
+    return {'large_numbers.total.words': words, 'large_numbers.total.seconds': seconds}
+
+def main():
+    print(f'{"k":>6} {"words":>6} {"bytes":>6} {"time":>9}')
+    for k in POWERS:
+        for n in (2**k, -2**k):
+            code, elapsed = encode(n)
+            print(f'{k if n > 0 else -k:>6} {len(code.split()):>6} {len(code):>6} {elapsed * 1000:>6.2f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Measures how :py:meth:`pyspl.Play.code` scales with the number of workers, for plays with different numbers of acts.
+
+Run with ``python benchmarks/parallel_scaling.py [workers]``.
+"""
+import os
+import sys
+import time
+
+import pyspl
+
+def make_play(acts: int) -> pyspl.Play:
+    play = pyspl.Play('A benchmark.', seed=0)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'Some numbers.')
+
+        def scene(self):
+            self.enter(romeo, juliet)
+            for n in range(1000, 1500):
+                self.set(romeo, pyspl.sum(juliet, n * 7919))
+            self.exit()
+
+    for i in range(acts):
+        play.add_act(Numbers(play), str(i + 1), 'Some numbers.')
+    return play
+
+def time_code(acts: int, workers: int) -> tuple[float, float]:
+    """
+    Returns how long generating code for a play with *acts* acts takes serially and with *workers* workers.
+    """
+    play = make_play(acts)
+    # Fill the phrase cache first, so that the serial run is not penalised for going first.
+    play.code()
+
+    start = time.perf_counter()
+    serial = play.code()
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = play.code(workers=workers)
+    parallel_time = time.perf_counter() - start
+
+    assert serial == parallel, 'parallel output differs from serial output'
+    return serial_time, parallel_time
+
+def measure(acts: tuple[int, ...] = (10, 50, 200), workers: int = 2) -> dict[str, float]:
+    metrics = {}
+    for n in acts:
+        serial_time, parallel_time = time_code(n, workers)
+        metrics[f'parallel_scaling.acts_{n}.serial.seconds'] = serial_time
+        metrics[f'parallel_scaling.acts_{n}.workers_{workers}.seconds'] = parallel_time
+    return metrics
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    for acts in (10, 50, 200):
+        serial_time, parallel_time = time_code(acts, workers)
+        print(
+            f'{acts:4} acts: serial {serial_time:.2f} s, {workers} workers {parallel_time:.2f} s '
+            f'({serial_time / parallel_time:.1f}x)'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Measures how fast :py:func:`pyspl.parse.load` reads plays of a known size back, in both styles, both read
+in chunks and memory-mapped.
+
+Run with ``python benchmarks/parse_speed.py [megabytes]``.
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pyspl
+import pyspl.parse
+
+def make_play(size: int, style: str) -> pyspl.Play:
+    """
+    Makes a play whose code in *style* is about *size* bytes, setting and printing random numbers.
+    """
+    play = pyspl.Play('A benchmark.', seed=0)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'Some numbers.')
+
+        def scene(self):
+            rng = random.Random(0)
+            self.enter(romeo, juliet)
+            for _ in range(statements):
+                self.set(romeo, pyspl.sum(juliet, rng.randrange(-2**20, 2**20)))
+                self.print(romeo, int)
+            self.exit()
+
+    play.add_act(Numbers(play), 'I', 'Some numbers.')
+    # Sizes the play from the code of a small sample.
+    statements = 1000
+    sample = play.code_size(style)
+    statements = max(int(statements * size / sample), 1)
+    return play
+
+def measure(sizes: tuple[int, ...] = (1, 10)) -> dict[str, float]:
+    """
+    :param sizes: The sizes of the plays, in megabytes.
+    """
+    metrics = {}
+    threshold = pyspl.parse.MMAP_THRESHOLD
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'play.spl')
+        for size in sizes:
+            for style in ('default', 'compact'):
+                make_play(size << 20, style).save(path, style=style)
+                actual = os.path.getsize(path)
+                for read, mmap_threshold in (('chunks', threshold), ('mmap', 0)):
+                    pyspl.parse.MMAP_THRESHOLD = mmap_threshold
+                    gc.collect()
+                    try:
+                        start = time.perf_counter()
+                        pyspl.parse.load(path)
+                        elapsed = time.perf_counter() - start
+                    finally:
+                        pyspl.parse.MMAP_THRESHOLD = threshold
+                    metrics[f'parse_speed.mb_{size}.{style}.{read}.seconds'] = elapsed
+                metrics[f'parse_speed.mb_{size}.{style}.bytes'] = actual
+    return metrics
+
+def main():
+    sizes = (int(sys.argv[1]),) if len(sys.argv) > 1 else (1, 10)
+    metrics = measure(sizes)
+    for size in sizes:
+        for style in ('default', 'compact'):
+            actual = metrics[f'parse_speed.mb_{size}.{style}.bytes']
+            for read in ('chunks', 'mmap'):
+                elapsed = metrics[f'parse_speed.mb_{size}.{style}.{read}.seconds']
+                print(f'{size} MB, {style}, {read}: {actual:,} bytes in {elapsed:.2f} s, {actual / elapsed / 1e6:.1f} MB/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+Runs every benchmark and compares the results against a stored baseline.
+
+Each benchmark reports metrics whose names end with their unit (``.seconds``, ``.bytes`` or ``.words``).
+Lower is better for all of them. A metric regresses when it is more than ``--tolerance`` (25% by default)
+above its value in the baseline, in which case the script exits with status 1.
+
+Run with ``python benchmarks/run.py``. Options:
+
+``--quick``
+    Use smaller sizes (plays of up to 10^5 lines instead of 10^6).
+``--output FILE``
+    Also write the results to *FILE* as JSON.
+``--baseline FILE``
+    The baseline to compare against. Defaults to ``benchmarks/baseline.json``.
+``--save-baseline``
+    Write the results to the baseline file instead of comparing against it.
+``--tolerance FRACTION``
+    How much worse than the baseline a metric may get. Defaults to ``0.25``.
+
+Metrics that are not in the baseline are listed as not compared, without failing the run.
+
+Metric names include the size of what was measured, so results of ``--quick`` runs are only compared
+with the metrics of the same size in the baseline. Timings depend on the machine, so the stored baseline is only meaningful on the machine it was saved on.
+Save a new one (with ``--save-baseline``) before making changes.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import async_renders
+import compact_style
+import encoding_size
+import large_numbers
+import parallel_scaling
+import parse_speed
+import serialize_speed
+import vm_throughput
+
+import pyspl
+from pyspl.diskcache import DiskCache
+from pyspl.operations import _cached_phrase, _compact_code, _plan
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+REPEAT = 3
+
+Metrics = dict[str, float]
+
+def best_of(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """
+    Returns the shortest time *func* took over *repeat* calls.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def clear_caches() -> None:
+    _plan.cache_clear()
+    _cached_phrase.cache_clear()
+    _compact_code.cache_clear()
+
+def int_code(quick: bool) -> Metrics:
+    """
+    Writing different numbers of each magnitude, with the caches cleared first.
+    """
+    rng = random.Random(0)
+    metrics = {}
+    count = 100 if quick else 1000
+    for bits in (8, 16, 32, 64, 256, 1024):
+        numbers = [rng.getrandbits(bits) | 1 << (bits - 1) for _ in range(count)]
+
+        def write():
+            clear_caches()
+            for n in numbers:
+                pyspl.value_as_str(n, seed=0)
+
+        metrics[f'int_code.bits_{bits}.numbers_{count}.seconds'] = best_of(write)
+    return metrics
+
+def value_as_str(quick: bool) -> Metrics:
+    """
+    Writing operation trees of different depths.
+    """
+    metrics = {}
+    for depth in (10, 100, 400):
+        value = 1
+        for i in range(depth):
+            value = pyspl.sum(value, i) if i % 2 else pyspl.product(i, value)
+        pyspl.value_as_str(value, seed=0)
+        metrics[f'value_as_str.depth_{depth}.seconds'] = best_of(lambda: pyspl.value_as_str(value, seed=0))
+    return metrics
+
+def make_play(lines: int) -> pyspl.Play:
+    """
+    Makes a play whose code has about *lines* lines, mostly ``set`` and ``print`` statements.
+    """
+    play = pyspl.Play('A benchmark.', seed=0)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'Some numbers.')
+
+        def scene(self):
+            self.enter(romeo, juliet)
+            for n in range(lines // 2):
+                self.set(romeo, pyspl.sum(juliet, n % 1000))
+                self.print(romeo, int)
+            self.exit()
+
+    play.add_act(Numbers(play), 'I', 'Some numbers.')
+    return play
+
+def act_methods(quick: bool) -> Metrics:
+    """
+    Recording scenes with the methods of :py:class:`pyspl.Act`, without writing any code.
+    """
+    lines = 10**4 if quick else 10**5
+    play = make_play(lines)
+    return {f'act_methods.statements_{lines}.seconds': best_of(lambda: list(play._iterscenes()))}
+
+def play_code(quick: bool) -> Metrics:
+    """
+    :py:meth:`pyspl.Play.code`, :py:meth:`pyspl.Play.save` and :py:meth:`pyspl.Play.validate` for plays
+    of 10^3 to 10^6 lines, and :py:meth:`pyspl.Play.save` when the play is already in the disk cache.
+    """
+    metrics = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'play.spl')
+        for exponent in range(3, 6 if quick else 7):
+            play = make_play(10**exponent)
+            repeat = REPEAT if exponent < 6 else 1
+            metrics[f'play_code.lines_1e{exponent}.seconds'] = best_of(play.code, repeat)
+            metrics[f'play_save.lines_1e{exponent}.seconds'] = best_of(lambda: play.save(path), repeat)
+            metrics[f'play_save.lines_1e{exponent}.bytes'] = os.path.getsize(path)
+            metrics[f'play_validate.lines_1e{exponent}.seconds'] = best_of(play.validate, repeat)
+            play.disk_cache = DiskCache(os.path.join(directory, 'cache'))
+            play.save(path)
+            metrics[f'play_save_disk_cache_hit.lines_1e{exponent}.seconds'] = best_of(lambda: play.save(path), repeat)
+    return metrics
+
+def import_time(quick: bool) -> Metrics:
+    """
+    ``import pyspl`` in a new interpreter, without the time the interpreter itself takes to start.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    run = lambda code: subprocess.run([sys.executable, '-c', code], env=env, check=True)
+    startup = best_of(lambda: run('pass'), 5)
+    return {'import_pyspl.seconds': max(best_of(lambda: run('import pyspl'), 5) - startup, 0.0)}
+
+BENCHMARKS: dict[str, Callable[[bool], Metrics]] = {
+    'int_code': int_code,
+    'value_as_str': value_as_str,
+    'act_methods': act_methods,
+    'play_code': play_code,
+    'import_time': import_time,
+    'encoding_size': lambda quick: encoding_size.measure(),
+    'large_numbers': lambda quick: large_numbers.measure(),
+    'compact_style': lambda quick: compact_style.measure(plays=2 if quick else 10),
+    'vm_throughput': lambda quick: vm_throughput.measure(10_000 if quick else 50_000),
+    'parse_speed': lambda quick: parse_speed.measure(sizes=(1,) if quick else (1, 10)),
+    'serialize_speed': lambda quick: serialize_speed.measure(10_000 if quick else 100_000, 100 if quick else 1000),
+    'parallel_scaling': lambda quick: parallel_scaling.measure(acts=(10,), workers=2),
+    'async_renders': lambda quick: async_renders.measure(plays=20 if quick else 100),
+}
+# Depend on the number of CPUs and on how long worker processes take to start, which is too noisy
+# to compare against a baseline. Run them by name.
+NOT_BY_DEFAULT = {'parallel_scaling', 'async_renders'}
+
+def compare(results: Metrics, baseline: Metrics, tolerance: float) -> list[str]:
+    """
+    Returns a description of every metric in *results* that is worse than in *baseline*.
+    """
+    regressions = []
+    for name, value in results.items():
+        expected = baseline.get(name)
+        if expected is not None and value > expected * (1 + tolerance):
+            change = value / expected - 1 if expected else float('inf')
+            regressions.append(f'{name}: {value:.6g} (baseline {expected:.6g}, {change:+.0%})')
+    return regressions
+
+def missing(results: Metrics, baseline: Metrics) -> list[str]:
+    """
+    Returns the names of the metrics in *results* that *baseline* has no value for, so cannot be compared.
+    """
+    return [name for name in results if name not in baseline]
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the pyspl benchmarks.')
+    parser.add_argument('--quick', action='store_true')
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument(
+        'benchmarks', nargs='*',
+        help=f'the benchmarks to run: {", ".join(BENCHMARKS)} (all but {", ".join(NOT_BY_DEFAULT)} by default)',
+    )
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f'unknown benchmark: {name}')
+
+    results: Metrics = {}
+    for name in args.benchmarks or [name for name in BENCHMARKS if name not in NOT_BY_DEFAULT]:
+        print(f'{name}...', file=sys.stderr, flush=True)
+        results.update(BENCHMARKS[name](args.quick))
+
+    width = max(map(len, results))
+    for name, value in results.items():
+        print(f'{name:{width}}  {value:.6g}')
+
+    report = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'pyspl': pyspl.__version__,
+        'quick': args.quick,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        unknown = missing(results, baseline)
+        if unknown:
+            print(f'\n{len(unknown)} metric(s) not in {args.baseline}, not compared:', *unknown, sep='\n  ')
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline}:', *regressions, sep='\n  ')
+            sys.exit(1)
+        print(f'\nNo regressions against {args.baseline}.')
+
+if __name__ == '__main__':
+    main()
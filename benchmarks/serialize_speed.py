@@ -0,0 +1,96 @@
+"""
+Measures :py:meth:`pyspl.Play.dumps` and :py:meth:`pyspl.Play.loads` against :py:mod:`pickle`, for many small
+plays and for one large play.
+
+Pickle is given what :py:meth:`pyspl.Play.code` sends to worker processes: the scenes recorded by each act.
+Both sides run the scenes before serializing. Loading is measured twice: alone, and then decoding every scene,
+which :py:meth:`pyspl.Play.loads` otherwise leaves until the scene runs.
+
+Run with ``python benchmarks/serialize_speed.py [statements]``.
+"""
+import gc
+import pickle
+import random
+import sys
+import time
+
+import pyspl
+from pyspl.play import _Context
+
+def make_play(statements: int, seed: int = 0) -> pyspl.Play:
+    """
+    Makes a play of about *statements* statements, setting characters to random values and printing them.
+    """
+    play = pyspl.Play('A benchmark.', seed=0)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'Some numbers.')
+
+        def scene(self):
+            rng = random.Random(seed)
+            self.enter(romeo, juliet)
+            for _ in range(statements // 2):
+                self.set(romeo, pyspl.sum(juliet, pyspl.product(rng.randrange(-2**20, 2**20), romeo)))
+                self.print(romeo, int)
+            self.exit()
+
+    play.add_act(Numbers(play), 'I', 'Some numbers.')
+    return play
+
+def pickle_dumps(play: pyspl.Play) -> bytes:
+    context = _Context(play)
+    scenes = [
+        [(scene.number, scene.description, ir) for scene, ir in act.obj._iterscenes(context)]
+        for act in play.acts
+    ]
+    return pickle.dumps(scenes, pickle.HIGHEST_PROTOCOL)
+
+def play_loads_decoded(data: bytes) -> pyspl.Play:
+    play = pyspl.Play.loads(data)
+    for act in play.acts:
+        for statements in act.obj.statements.values():
+            statements[0:0]
+    return play
+
+def timed(func, items: list) -> tuple[float, list]:
+    gc.collect()
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return time.perf_counter() - start, results
+
+def measure(statements: int = 100_000, plays: int = 1000) -> dict[str, float]:
+    """
+    :param statements: The size of the large play, and of all the small plays together.
+    :param plays: The number of small plays.
+    """
+    metrics = {}
+    for name, items in (
+        (f'plays_{plays}', [make_play(statements // plays, seed) for seed in range(plays)]),
+        (f'statements_{statements}', [make_play(statements)]),
+    ):
+        dumped, data = timed(pyspl.Play.dumps, items)
+        pickled, pickles = timed(pickle_dumps, items)
+        loaded, _ = timed(pyspl.Play.loads, data)
+        decoded, _ = timed(play_loads_decoded, data)
+        unpickled, _ = timed(pickle.loads, pickles)
+        metrics[f'serialize_speed.{name}.dumps.seconds'] = dumped
+        metrics[f'serialize_speed.{name}.pickle_dumps.seconds'] = pickled
+        metrics[f'serialize_speed.{name}.loads.seconds'] = loaded
+        metrics[f'serialize_speed.{name}.loads_decoded.seconds'] = decoded
+        metrics[f'serialize_speed.{name}.pickle_loads.seconds'] = unpickled
+        metrics[f'serialize_speed.{name}.bytes'] = sum(map(len, data))
+        metrics[f'serialize_speed.{name}.pickle.bytes'] = sum(map(len, pickles))
+    return metrics
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    metrics = measure(statements)
+    for name, value in metrics.items():
+        print(f'{name}: {value:,.4f}' if name.endswith('.seconds') else f'{name}: {value:,.0f}')
+
+if __name__ == '__main__':
+    main()
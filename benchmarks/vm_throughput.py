@@ -0,0 +1,74 @@
+"""
+Measures how fast :py:mod:`pyspl.vm` and :py:meth:`pyspl.Play.compile` compile and run a play made of
+many arithmetic and stack statements.
+
+Run with ``python benchmarks/vm_throughput.py [statements]``.
+"""
+import io
+import sys
+import time
+
+import pyspl
+import pyspl.vm
+
+def make_play(statements: int) -> pyspl.Play:
+    play = pyspl.Play('A benchmark.', seed=0)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a helper.')
+
+    class Loop(pyspl.Act):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.add_scene(self.scene, 'I', 'The loop.')
+
+        def scene(self):
+            self.enter(romeo, juliet)
+            self.set(juliet, 1)
+            for _ in range(statements // 4):
+                self.set(romeo, pyspl.sum(romeo, pyspl.product(juliet, 3)))
+                self.remember(juliet, juliet)
+                self.set(romeo, pyspl.remainder(romeo, 1021))
+                self.pop(juliet)
+            self.print(romeo, int)
+            self.exit()
+
+    play.add_act(Loop(play), 'I', 'The only act.')
+    return play
+
+def measure(statements: int = 200_000) -> dict[str, float]:
+    play = make_play(statements)
+
+    start = time.perf_counter()
+    program = pyspl.vm.compile(play)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    program.run(io.StringIO(), io.StringIO())
+    ran = time.perf_counter() - start
+
+    start = time.perf_counter()
+    function = play.compile()
+    python_compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    function(io.StringIO(), io.StringIO())
+    python_ran = time.perf_counter() - start
+
+    return {
+        f'vm_throughput.statements_{statements}.compile.seconds': compiled,
+        f'vm_throughput.statements_{statements}.run.seconds': ran,
+        f'vm_throughput.statements_{statements}.play_compile.seconds': python_compiled,
+        f'vm_throughput.statements_{statements}.compiled_run.seconds': python_ran,
+    }
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    compiled, ran, python_compiled, python_ran = measure(statements).values()
+    print(f'statements:   {statements}')
+    print(f'compile:      {compiled:.3f} s')
+    print(f'run:          {ran:.3f} s ({statements / ran:,.0f} statements/s)')
+    print(f'Play.compile: {python_compiled:.3f} s')
+    print(f'compiled run: {python_ran:.3f} s ({statements / python_ran:,.0f} statements/s)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Generates and saves plays from :py:mod:`asyncio` code, such as a web server, without blocking the event loop.
+
+.. code-block:: python
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor()
+
+    async def handle(request):
+        play = make_play(request)
+        await play.asave('play.spl', executor=executor)
+
+        async for chunk in play.aiter_code():
+            await send(chunk)
+
+Code is generated in batches of :py:data:`pyspl.play.SAVE_BATCH_LINES` lines by an executor, and written to
+files by threads of the event loop's default executor, one write per batch. Only one batch is generated
+ahead of the one being written or sent, so a slow disk or client slows generation down instead of letting
+batches pile up in memory.
+
+With a thread pool (the event loop's default executor when no executor is given), the code is generated while it is
+consumed, like :py:meth:`pyspl.Play.iter_code`. Threads keep the event loop responsive, but do not generate several
+plays any faster than one after another. A process pool does. The play is then sent to a worker with
+:py:meth:`pyspl.Play.dumps`, so its acts do not need to be picklable, and the worker sends back all of its code.
+Observers and caches are not used by the workers.
+"""
+import asyncio
+import concurrent.futures
+from concurrent.futures import Executor, ThreadPoolExecutor
+import functools
+import os
+from typing import AsyncIterator, Optional, Union
+
+from .play import SAVE_BUFFER_SIZE, Play, _iter_chunks
+
+def _in_process(executor: Optional[Executor]) -> bool:
+    """
+    Returns whether *executor* runs functions in this interpreter, so that they can use the play directly.
+    """
+    interpreters = getattr(concurrent.futures, 'InterpreterPoolExecutor', ())
+    return executor is None or isinstance(executor, ThreadPoolExecutor) and not isinstance(executor, interpreters)
+
+def _render_chunks(data: bytes, style: str) -> list[str]:
+    """
+    Generates the code of a play returned by :py:meth:`pyspl.Play.dumps`. This is run by process pools.
+    """
+    return list(_iter_chunks(Play.loads(data).iter_code(style)))
+
+async def iter_code(play: Play, style: str = 'default', executor: Optional[Executor] = None) -> AsyncIterator[str]:
+    """
+    Generates SPL code for *play* in batches of lines. This is what :py:meth:`pyspl.Play.aiter_code` does.
+    """
+    loop = asyncio.get_running_loop()
+    if not _in_process(executor):
+        data = await loop.run_in_executor(None, play.dumps)
+        for chunk in await loop.run_in_executor(executor, _render_chunks, data, style):
+            yield chunk
+        return
+
+    chunks = _iter_chunks(play.iter_code(style))
+    # Each batch is generated while the previous one is consumed. If the consumer stops early, the batch being
+    # generated is dropped when it is done, along with the generator.
+    pending = loop.run_in_executor(executor, next, chunks, None)
+    while True:
+        chunk = await pending
+        if chunk is None:
+            return
+        pending = loop.run_in_executor(executor, next, chunks, None)
+        yield chunk
+
+async def save(
+    play: Play,
+    fn: Union[str, bytes, os.PathLike],
+    mode: str = 'w',
+    style: str = 'default',
+    executor: Optional[Executor] = None,
+) -> None:
+    """
+    Saves SPL code for *play* into *fn*. This is what :py:meth:`pyspl.Play.asave` does.
+    """
+    loop = asyncio.get_running_loop()
+    if play._uses_disk_cache(style):
+        # The cache may have the whole file, which is then copied without generating anything.
+        await loop.run_in_executor(executor if _in_process(executor) else None, play.save, fn, mode, style)
+        return
+
+    f = await loop.run_in_executor(None, functools.partial(open, fn, mode, buffering=SAVE_BUFFER_SIZE))
+    try:
+        async for chunk in iter_code(play, style, executor):
+            await loop.run_in_executor(None, f.write, chunk)
+    finally:
+        await loop.run_in_executor(None, f.close)
@@ -0,0 +1,152 @@
+"""
+Generates code for many plays at once.
+
+.. code-block:: python
+
+    import pyspl.batch
+
+    def make_play(n):
+        play = pyspl.Play(f'Play number {n}.')
+        ...
+        return play
+
+    result = pyspl.batch.render(
+        ((f'play{n}.spl', functools.partial(make_play, n)) for n in range(10_000)),
+        'plays.zip',
+    )
+    print(f'{result.plays_per_second:.0f} plays/s')
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import io
+from itertools import repeat
+import os
+import tarfile
+import time
+import zipfile
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from .operations import _plan
+from .play import Play
+
+PlaySource = Union[Play, bytes, Callable[[], Play]]
+PlaySpec = Union[PlaySource, tuple[str, PlaySource]]
+
+# How many plays are sent to a worker at a time.
+BATCH_CHUNK_SIZE = 64
+
+# The numbers whose encoding each worker works out before its first play, since most plays use small numbers.
+WARM_NUMBERS = range(-256, 257)
+
+@dataclass
+class BatchResult:
+    """
+    What :py:func:`render` did.
+
+    This is a data class.
+    """
+    plays: int
+    """The number of plays generated."""
+    bytes: int
+    """The total size of the generated code."""
+    seconds: float
+    """How long it took."""
+
+    @property
+    def plays_per_second(self) -> float:
+        """
+        :rtype: float
+        """
+        return self.plays / self.seconds if self.seconds else float('inf')
+
+def _init_worker() -> None:
+    # Workers started by fork share the parent's cache of encodings already, but workers started by spawn start
+    # with an empty one. Filling it here keeps the first plays of each worker from being slower than the others.
+    for n in WARM_NUMBERS:
+        _plan(n)
+
+def _render_one(spec: tuple[str, PlaySource], directory: Optional[str]) -> tuple[str, bytes, int]:
+    name, source = spec
+    if callable(source):
+        play = source()
+    elif isinstance(source, bytes):
+        play = Play.loads(source)
+    else:
+        play = source
+    data = play.code().encode() + b'\n'
+    if directory is None:
+        return name, data, len(data)
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(data)
+    return name, b'', len(data)
+
+def _specs(plays: Iterable[PlaySpec]) -> Iterator[tuple[str, PlaySource]]:
+    for i, spec in enumerate(plays):
+        yield spec if isinstance(spec, tuple) else (f'play{i}.spl', spec)
+
+def _open_archive(path: str):
+    if path.endswith('.zip'):
+        archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        return archive, lambda name, data: archive.writestr(name, data)
+
+    archive = tarfile.open(path, 'w:gz' if path.endswith(('.tar.gz', '.tgz')) else 'w')
+
+    def add(name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+
+    return archive, add
+
+def render(
+    plays: Iterable[PlaySpec],
+    out: Union[str, os.PathLike],
+    workers: Optional[int] = None,
+) -> BatchResult:
+    """
+    Generates SPL code for every play in *plays*, using a pool of worker processes.
+
+    :param plays: The plays to generate. Each item is either a ``(filename, play)`` tuple, or just a play (which is then
+        saved as ``play0.spl``, ``play1.spl`` and so on). A play can also be given as a function that takes no arguments
+        and returns a :py:class:`~pyspl.Play`, which is called by the worker; this is usually much faster than
+        sending a whole play to a worker. Both the plays and the functions have to be picklable. A play whose acts
+        cannot be pickled can be given as the data returned by :py:meth:`~pyspl.Play.dumps`.
+    :param out: Where to save the plays. If it ends with ``.zip``, ``.tar``, ``.tar.gz`` or ``.tgz``, the plays are
+        written into a single archive of that type. Otherwise, it is a directory (created if needed) and every play
+        is saved as a file inside it.
+    :param workers: The number of worker processes. Defaults to the number of CPUs. If 1, no processes are started.
+    :type workers: int | None
+    :rtype: BatchResult
+    """
+    start = time.perf_counter()
+    out = os.fspath(out)
+    archive = None
+    add = None
+    directory: Optional[str] = None
+    if out.endswith(('.zip', '.tar', '.tar.gz', '.tgz')):
+        archive, add = _open_archive(out)
+    else:
+        os.makedirs(out, exist_ok=True)
+        directory = out
+
+    count = 0
+    size = 0
+    specs = _specs(plays)
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker) if workers != 1 else None
+    try:
+        if executor is None:
+            results = (_render_one(spec, directory) for spec in specs)
+        else:
+            results = executor.map(_render_one, specs, repeat(directory), chunksize=BATCH_CHUNK_SIZE)
+        for name, data, length in results:
+            if add is not None:
+                add(name, data)
+            count += 1
+            size += length
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if archive is not None:
+            archive.close()
+
+    return BatchResult(count, size, time.perf_counter() - start)
@@ -0,0 +1,189 @@
+"""
+Keeps generated code around so that unchanged acts and scenes are not generated again.
+
+See the *cache* parameter of :py:class:`pyspl.Play`.
+"""
+from dataclasses import dataclass, fields, replace
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+from .character import Character
+from .operations import Value
+from .optimizer import OptimizationStats
+
+if TYPE_CHECKING:
+    from .play import Act, Play, Scene, _Context
+
+@dataclass
+class _Entry:
+    fingerprint: tuple
+    lines: list[str]
+    stage: tuple[Character, ...]
+    stats: OptimizationStats
+
+@dataclass
+class _Compiled:
+    fingerprint: tuple
+    function: Callable[..., list[int]]
+    stats: OptimizationStats
+
+def _stats_since(stats: OptimizationStats, before: OptimizationStats) -> OptimizationStats:
+    return OptimizationStats(*(getattr(stats, f.name) - getattr(before, f.name) for f in fields(stats)))
+
+def _add_stats(stats: OptimizationStats, saved: OptimizationStats) -> None:
+    for f in fields(stats):
+        setattr(stats, f.name, getattr(stats, f.name) + getattr(saved, f.name))
+
+def _code_of(func: Callable):
+    func = getattr(func, '__func__', func)
+    return getattr(func, '__code__', func)
+
+class RenderCache:
+    """
+    The code generated for each act and scene of a play, and the function returned by :py:meth:`pyspl.Play.compile`.
+
+    An entry is reused when its *fingerprint* is unchanged. The fingerprint is made of the scene's numbers,
+    descriptions and method code, the characters on stage before it starts, the style it is written in,
+    and the play's ``seed``, ``vocabulary``, ``optimize``, ``reuse_subexpressions`` and ``schedule_stage`` settings.
+
+    .. warning::
+
+        This should not be constructed manually by the user.
+        Instead, use the *cache* parameter of :py:class:`pyspl.Play`.
+    """
+    def __init__(self) -> None:
+        self._entries: dict[tuple, _Entry] = {}
+        self._lock = threading.Lock()
+        self.act_hits = 0
+        """How many times a whole act was reused."""
+        self.act_misses = 0
+        """How many times an act had to be (at least partly) generated again."""
+        self.scene_hits = 0
+        """How many times a scene was reused."""
+        self.scene_misses = 0
+        """How many times a scene had to be generated again."""
+        self._compiled: Optional[_Compiled] = None
+        self.compile_hits = 0
+        """How many times :py:meth:`pyspl.Play.compile` returned the function it had compiled before."""
+        self.compile_misses = 0
+        """How many times :py:meth:`pyspl.Play.compile` had to run the scenes and compile the play again."""
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """
+        Forgets everything. The counters are kept.
+        """
+        self._entries.clear()
+        self._compiled = None
+
+    def invalidate(self, act: Optional['Act'] = None, scene: Optional[str] = None) -> None:
+        """
+        Forgets the entries of *act*, or only of the scene named *scene* in it. Forgets everything if *act* is ``None``.
+        """
+        if act is None:
+            self.clear()
+            return
+        with self._lock:
+            self._compiled = None
+            for key in list(self._entries):
+                if key[1] == id(act) and (scene is None or key[0] == 'act' or key[2] == scene):
+                    del self._entries[key]
+
+    def _scene_fingerprint(self, act: 'Act', scene: 'Scene', stage: Iterable[Character], compact: bool) -> tuple:
+        play = act._play
+        return (
+            scene.number, scene.description, _code_of(getattr(act, scene.name)),
+            tuple(map(id, stage)), play.seed, play.vocabulary, compact,
+            play.optimize, play.reuse_subexpressions, play.schedule_stage,
+        )
+
+    def _scene_codes(self, act: 'Act') -> tuple:
+        return tuple(self._scene_fingerprint(act, scene, (), False)[:3] for scene in act._scene_names)
+
+    def _lookup(self, kind: str, key: tuple, fingerprint: tuple) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        hit = entry is not None and entry.fingerprint == fingerprint
+        with self._lock:
+            name = f'{kind}_{"hits" if hit else "misses"}'
+            setattr(self, name, getattr(self, name) + 1)
+        return entry if hit else None
+
+    def render_act(self, context: '_Context', act: 'Act', number: str, description: str) -> Iterator[str]:
+        """
+        Generates the code of *act*, reusing whatever is still valid.
+        """
+        play = act._play
+        act_key = ('act', id(act))
+        act_fingerprint = (
+            number, description, tuple(map(id, context.stage)),
+            self._scene_codes(act),
+            play.seed, play.vocabulary, context.compact, play.optimize, play.reuse_subexpressions, play.schedule_stage,
+        )
+        entry = self._lookup('act', act_key, act_fingerprint)
+        if entry is not None:
+            context.stage = dict.fromkeys(entry.stage)
+            _add_stats(context.stats, entry.stats)
+            yield from entry.lines
+            return
+
+        before = replace(context.stats)
+        act_lines = [f'Act {number}: {description}']
+        yield act_lines[0]
+        for scene in act._scene_names:
+            lines = self.render_scene(context, act, scene)
+            act_lines.extend(lines)
+            yield from lines
+        self._entries[act_key] = _Entry(
+            act_fingerprint, act_lines, tuple(context.stage), _stats_since(context.stats, before),
+        )
+
+    def render_scene(
+        self,
+        context: '_Context',
+        act: 'Act',
+        scene: 'Scene',
+        on_value: Optional[Callable[[Value, str, float], None]] = None,
+    ) -> list[str]:
+        """
+        Generates the code of *scene* in *act*, unless it is still valid. *on_value* is passed to
+        :py:meth:`pyspl.ir.SceneIR.render` when the scene is generated.
+        """
+        # A method can be added as several scenes, so the name alone is not enough.
+        scene_key = ('scene', id(act), scene.name, id(scene))
+        fingerprint = self._scene_fingerprint(act, scene, context.stage, context.compact)
+        entry = self._lookup('scene', scene_key, fingerprint)
+        if entry is not None:
+            context.stage = dict.fromkeys(entry.stage)
+            _add_stats(context.stats, entry.stats)
+        else:
+            before = replace(context.stats)
+            lines = list(act._render_scene(context, scene, on_value))
+            entry = _Entry(fingerprint, lines, tuple(context.stage), _stats_since(context.stats, before))
+            self._entries[scene_key] = entry
+        return entry.lines
+
+    def compile(self, play: 'Play', compile: Callable[[], Callable[..., list[int]]]) -> Callable[..., list[int]]:
+        """
+        Returns the function compiled by *compile* for *play*, without running any scene if no act or scene
+        has changed since the last time.
+        """
+        fingerprint = (
+            tuple(map(id, play.characters)),
+            tuple((id(act.obj), act.number, act.description, self._scene_codes(act.obj)) for act in play.acts),
+            play.optimize, play.reuse_subexpressions, play.schedule_stage,
+        )
+        compiled = self._compiled
+        hit = compiled is not None and compiled.fingerprint == fingerprint
+        with self._lock:
+            if hit:
+                self.compile_hits += 1
+            else:
+                self.compile_misses += 1
+        if hit:
+            play.optimization_stats = replace(compiled.stats)
+            return compiled.function
+        function = compile()
+        self._compiled = _Compiled(fingerprint, function, replace(play.optimization_stats))
+        return function
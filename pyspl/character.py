@@ -1,20 +1,27 @@
-from .names import names
+from .names import name_table
 
 class Character:
     """
     Represents a character in an SPL play.
 
+    Characters are compared by identity. A play keeps one character per name (see :py:meth:`Play.character`).
+    The same character can be added to several plays.
+
     :raises ValueError: The character name supplied is invalid.
     """
+    __slots__ = ('name', 'description')
+
     def __init__(self, name: str, description: str) -> None:
+        if name not in name_table:
+            raise ValueError(f'invalid character name: {name!r}')
         self.name = name
         self.description = description
-        if name not in names:
-            raise ValueError(f'invalid character name: {name!r}')
-        
+
+    def __repr__(self):
+        return f'Character({self.name!r}, {self.description!r})'
+
     def __str__(self):
         """
         Returns the name of the character.
         """
         return self.name
-
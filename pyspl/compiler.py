@@ -0,0 +1,193 @@
+"""
+Turns plays into Python functions.
+
+See :py:meth:`pyspl.Play.compile`.
+"""
+from functools import lru_cache
+from math import factorial, isqrt
+import sys
+from typing import IO, Callable, Iterable, Optional
+
+from .character import Character
+from .errors import EmptyStackError, SceneNotFound
+from .operations import (
+    OneNumberOperation, TwoNumberOperation, Value, _quotient, _remainder,
+    cube, difference, product, quotient, remainder, square, squareroot, sum
+)
+
+# How many compiled functions are kept around, keyed by their source code.
+COMPILE_CACHE_SIZE = 64
+
+# Operations nested deeper than this are computed into temporary variables first, because Python cannot
+# parse expressions nested as deeply as operations can be.
+MAX_NESTING = 32
+
+# SPL rounds quotients toward zero, which // and % do not.
+_BINARY_FORMATS = {
+    sum: '({} + {})', difference: '({} - {})', product: '({} * {})',
+    quotient: 'quotient({}, {})', remainder: 'remainder({}, {})',
+}
+_UNARY_FORMATS = {square: '({}) ** 2', cube: '({}) ** 3', squareroot: 'isqrt({})'}
+_JUMP_FORMATS = {None: '{}', True: 'if answer: {}', False: 'if not answer: {}'}
+
+class _SourceWriter:
+    def __init__(self, characters: list[Character]):
+        self.characters = list(characters)
+        self._slots = {id(c): i for i, c in enumerate(self.characters)}
+        self.lines: list[str] = []
+        # The number of each scene by the ids of its act and scene, and the id of the current act,
+        # when the play has jumps.
+        self.scenes: dict[tuple[int, int], int] = {}
+        self.act: Optional[int] = None
+        # How many temporary variables the current statement uses.
+        self.temporaries = 0
+
+    def slot(self, character: Character) -> int:
+        slot = self._slots.get(id(character))
+        if slot is None:
+            slot = self._slots[id(character)] = len(self.characters)
+            self.characters.append(character)
+        return slot
+
+    def value(self, value: Value) -> str:
+        return self._expression(value)[0]
+
+    def _expression(self, value: Value) -> tuple[str, int]:
+        """
+        Returns the Python expression of *value* and how deeply it nests operations.
+        """
+        if isinstance(value, int):
+            return repr(value), 0
+        if isinstance(value, Character):
+            return f'c{self.slot(value)}', 0
+        if isinstance(value, TwoNumberOperation):
+            (a, a_depth), (b, b_depth) = self._expression(value.a), self._expression(value.b)
+            expression, depth = _BINARY_FORMATS[type(value)].format(a, b), max(a_depth, b_depth) + 1
+        elif isinstance(value, OneNumberOperation):
+            x, depth = self._expression(value.x)
+            expression, depth = _UNARY_FORMATS.get(type(value), 'factorial({})').format(x), depth + 1
+        else:
+            raise TypeError(f'invalid value: {value!r}')
+        if depth < MAX_NESTING:
+            return expression, depth
+        name = f't{self.temporaries}'
+        self.temporaries += 1
+        self.lines.append(f'{name} = {expression}')
+        return name, 0
+
+    def statement(self, statement: tuple):
+        op = statement[0]
+        self.temporaries = 0
+        if op in ('enter', 'exit'):
+            # Stage directions were already checked when the scenes were run.
+            return
+        if op == 'goto':
+            target = self.scenes.get((self.act, id(statement[3])))
+            if target is None:
+                raise SceneNotFound(f'no scene to jump to: {statement[3].number}')
+            self.lines.append(_JUMP_FORMATS[statement[2]].format(f'scene = {target}; continue'))
+            return
+        slot = self.slot(statement[2])
+        if op == 'set':
+            self.lines.append(f'c{slot} = {self.value(statement[3])}')
+        elif op == 'remember':
+            self.lines.append(f's{slot}.append({self.value(statement[3])})')
+        elif op == 'pop':
+            self.lines.append(f'c{slot} = s{slot}.pop() if s{slot} else empty({slot})')
+        elif op == 'print':
+            self.lines.append(f'write(chr(c{slot}))' if statement[3] is str else f'write(str(c{slot}))')
+        elif op == 'input':
+            self.lines.append(f'c{slot} = read_char()' if statement[3] is str else f'c{slot} = read_int()')
+        elif op == 'question':
+            self.lines.append(f'answer = c{slot} {statement[3]} {self.value(statement[4])}')
+        else:
+            raise ValueError(f'unknown statement: {op!r}')
+
+    def source(self) -> str:
+        count = len(self.characters)
+        header = [
+            'def play(stdin, stdout):',
+            '    output = []',
+            '    write = output.append',
+            '    def flush():',
+            "        stdout.write(''.join(output))",
+            '        stdout.flush()',
+            '        output.clear()',
+            '    def read_char():',
+            '        flush()',
+            '        char = stdin.read(1)',
+            '        return ord(char) if char else -1',
+            '    def read_int():',
+            '        flush()',
+            '        return int(stdin.readline())',
+        ]
+        if count:
+            header.append(f'    {" = ".join(f"c{i}" for i in range(count))} = 0')
+            header.extend(f'    s{i} = []' for i in range(count))
+        footer = ['    flush()', f'    return [{", ".join(f"c{i}" for i in range(count))}]']
+        return '\n'.join([*header, *('    ' + line for line in self.lines), *footer, ''])
+
+def generate_source(statements: Iterable[tuple], characters: list[Character]) -> tuple[str, list[Character]]:
+    """
+    Writes the Python source code of a function running *statements*, where each scene starts with
+    a ``('scene', (id(act), id(scene)))`` statement.
+
+    :returns: The source code, and the characters in the order of their variables (``c0``, ``c1``, ...).
+    """
+    writer = _SourceWriter(characters)
+    statements = list(statements)
+    if not any(statement[0] == 'goto' for statement in statements):
+        for statement in statements:
+            if statement[0] != 'scene':
+                writer.statement(statement)
+        return writer.source(), writer.characters
+
+    # Each scene is a branch of a loop over the number of the scene to run next, so jumps can go back.
+    for statement in statements:
+        if statement[0] == 'scene':
+            writer.scenes[statement[1]] = len(writer.scenes)
+    lines = writer.lines
+    body = ['answer = False', 'scene = 0', 'while True:']
+    for statement in statements:
+        if statement[0] != 'scene':
+            writer.statement(statement)
+            continue
+        number = writer.scenes[statement[1]]
+        if number:
+            # Falls through to the next scene.
+            lines.append(f'scene = {number}')
+        body.extend(f'        {line}' for line in lines)
+        body.append(f'    {"elif" if number else "if"} scene == {number}:')
+        lines.clear()
+        writer.act = statement[1][0]
+    lines.append(f'scene = {len(writer.scenes)}')
+    body.extend(f'        {line}' for line in lines)
+    body.extend(['    else:', '        break'])
+    writer.lines = body
+    return writer.source(), writer.characters
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_source(source: str, names: tuple[str, ...]) -> Callable:
+    def empty(slot: int):
+        raise EmptyStackError(f'stack of {names[slot]} is empty')
+
+    namespace = {
+        'empty': empty, 'factorial': factorial, 'isqrt': isqrt, 'quotient': _quotient, 'remainder': _remainder,
+    }
+    exec(compile(source, '<pyspl play>', 'exec'), namespace)  # noqa: S102
+    return namespace['play']
+
+def compile_play(statements: Iterable[tuple], characters: list[Character]) -> Callable[..., list[int]]:
+    """
+    Compiles *statements* into a Python function.
+
+    Compiling the same statements again returns the cached function.
+    """
+    source, characters = generate_source(statements, characters)
+    function = _compile_source(source, tuple(c.name for c in characters))
+
+    def play(stdin: Optional[IO[str]] = None, stdout: Optional[IO[str]] = None) -> list[int]:
+        return function(sys.stdin if stdin is None else stdin, sys.stdout if stdout is None else stdout)
+
+    play.source = source
+    return play
@@ -0,0 +1,217 @@
+"""
+Keeps the code of whole plays on disk, so that plays generated again by another process are not written again.
+
+See the *disk_cache* parameter of :py:class:`pyspl.Play`:
+
+.. code-block:: python
+
+    from pyspl.diskcache import DiskCache
+
+    cache = DiskCache('.spl-cache', max_size=512 << 20)
+    play = pyspl.Play('A cached play.', seed=0, disk_cache=cache)
+    play.save('play.spl')  # copied from the cache if the play is unchanged
+
+Entries are named after a fingerprint of what the code is written from: the play's title and characters,
+its acts and scenes, the statements each scene recorded (after optimization), the ``seed``, the vocabulary
+and the style. Scenes still run to record their statements, but nothing is written as SPL code on a hit.
+
+Several processes can share a cache directory. Entries are written to a temporary file that is then
+renamed, so an entry is either complete or missing. When the entries add up to more than *max_size* bytes,
+the least recently used ones are deleted.
+"""
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from typing import IO, TYPE_CHECKING, Iterator, Optional, Union
+
+from .character import Character
+from .ir import SceneIR
+from .operations import OneNumberOperation, TwoNumberOperation, Value
+from .vocabulary import KINDS, Vocabulary
+
+if TYPE_CHECKING:
+    from .play import Play, Scene, _Act
+
+# Changes whenever the same statements would be written differently, so old entries are not used.
+_VERSION = 1
+_SUFFIX = '.spl'
+_TEMPORARY_PREFIX = '.tmp-'
+
+@lru_cache(maxsize=16)
+def _vocabulary_digest(vocabulary: Vocabulary) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for table in (vocabulary.adjectives, vocabulary.nouns):
+        for kind in KINDS:
+            h.update('\n'.join(table[kind]).encode())
+            h.update(b'\0')
+    return h.digest()
+
+def _character_id(character: Character, ids: dict[int, int]) -> int:
+    character_id = ids.get(id(character))
+    if character_id is None:
+        raise ValueError(f'character was not added to the play: {character.name!r}')
+    return character_id
+
+def _encode_value(value: Union[Value, 'Scene'], ids: dict[int, int], out: list[str]) -> None:
+    if isinstance(value, TwoNumberOperation):
+        out.append(type(value).__name__)
+        _encode_value(value.a, ids, out)
+        _encode_value(value.b, ids, out)
+    elif isinstance(value, OneNumberOperation):
+        out.append(type(value).__name__)
+        _encode_value(value.x, ids, out)
+    elif isinstance(value, Character):
+        out.append(f'@{_character_id(value, ids)}')
+    elif isinstance(value, int):
+        out.append(str(value))
+    else:
+        out.append(f'scene {value.number}')
+
+def fingerprint(play: 'Play', scenes: list[tuple['_Act', list[tuple['Scene', SceneIR]]]], compact: bool) -> str:
+    """
+    Returns the name of the entry of *play* written in the compact style or not, given its *scenes* already
+    run (each act with the scenes and statements it recorded).
+
+    :raises ValueError: A character was not added to the play.
+    """
+    ids = {id(character): i for i, character in enumerate(play.characters)}
+    h = hashlib.blake2b(digest_size=20)
+    header = [str(_VERSION), play.description, repr(play.seed), str(compact)]
+    header.extend(f'{character.name}, {character.description}' for character in play.characters)
+    h.update('\n'.join(header).encode())
+    h.update(_vocabulary_digest(play.vocabulary))
+    for act, act_scenes in scenes:
+        h.update(f'\0Act {act.number}: {act.description}'.encode())
+        for scene, ir in act_scenes:
+            h.update(f'\0Scene {scene.number}: {scene.description}'.encode())
+            code = ir.code
+            if sys.byteorder != 'little':
+                code = array('i', code)
+                code.byteswap()
+            h.update(code.tobytes())
+            h.update(array('q', [_character_id(character, ids) for character in ir.characters]).tobytes())
+            values: list[str] = []
+            for value in ir.values:
+                _encode_value(value, ids, values)
+            h.update(' '.join(values).encode())
+    return h.hexdigest()
+
+class DiskCache:
+    """
+    A directory of generated plays, shared by every process using it.
+
+    :param directory: The directory, which is created if needed.
+    :type directory: str | os.PathLike
+    :param int max_size: How many bytes the entries may take in total. Defaults to 256 MiB.
+    """
+    def __init__(self, directory: Union[str, os.PathLike], max_size: int = 256 << 20) -> None:
+        self.directory = os.fspath(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        """How many plays were read from the cache."""
+        self.misses = 0
+        """How many plays were not in the cache."""
+        self.writes = 0
+        """How many entries were added."""
+        self.evictions = 0
+        """How many entries were deleted to stay within :py:attr:`max_size`."""
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._entries())
+
+    def size(self) -> int:
+        """
+        Returns the total size of the entries in bytes.
+        """
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def clear(self) -> None:
+        """
+        Deletes every entry, and any temporary file left by a process that stopped while writing one.
+        The counters are kept.
+        """
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX) or entry.name.startswith(_TEMPORARY_PREFIX):
+                _remove(entry.path)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _entries(self) -> Iterator[tuple[str, os.stat_result]]:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX) and not entry.name.startswith(_TEMPORARY_PREFIX):
+                try:
+                    yield entry.path, entry.stat()
+                except FileNotFoundError:
+                    # Deleted by another process.
+                    pass
+
+    def open(self, key: str) -> Optional[IO[bytes]]:
+        """
+        Opens the entry named *key* (see :py:func:`fingerprint`) and marks it as used, or returns ``None``
+        if there is no such entry.
+        """
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process after it was opened, which does not stop it from being read.
+            pass
+        self._count('hits')
+        return f
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[IO[str]]:
+        """
+        Opens a temporary file for the entry named *key*, which becomes the entry when the ``with`` block
+        ends without an exception. The file is opened in text mode, as :py:meth:`pyspl.Play.save` opens files.
+        """
+        fd, temporary = tempfile.mkstemp(prefix=_TEMPORARY_PREFIX, dir=self.directory)
+        try:
+            with open(fd, 'w') as f:
+                yield f
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            _remove(temporary)
+            raise
+        self._count('writes')
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Deletes the least recently used entries until the others fit in :py:attr:`max_size`.
+        """
+        entries = list(self._entries())
+        total = sum(stat.st_size for _, stat in entries)
+        if total <= self.max_size:
+            return
+        entries.sort(key=lambda entry: entry[1].st_mtime)
+        for path, stat in entries:
+            if total <= self.max_size:
+                break
+            if _remove(path):
+                self._count('evictions')
+            total -= stat.st_size
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
@@ -9,7 +9,7 @@ class InvalidNumberError(Exception):
     Raised when a number supplied in operations (:py:meth:`Play.sum`, 
     :py:meth:`Play.difference`, and so on) is invalid.
 
-    The cause is usually because of the number not being a power of 2.
+    The cause is usually a vocabulary without enough adjectives to write the number with.
     """
     pass
 
@@ -26,3 +26,25 @@ class NotEnoughCharacters(Exception):
     That does not work because you need a character to set or print another character's value.
     """
     pass
+
+class EmptyStackError(Exception):
+    """
+    Raised by :py:mod:`pyspl.vm` when a character tries to recall a value from an empty stack.
+    """
+    pass
+
+class SceneNotFound(Exception):
+    """
+    Raised when jumping to a scene that is not in the act.
+    """
+    pass
+
+class ParseError(Exception):
+    """
+    Raised by :py:mod:`pyspl.parse` when SPL code cannot be read.
+
+    :ivar int line: The number of the line that could not be read, starting from 1.
+    """
+    def __init__(self, message: str, line: int) -> None:
+        super().__init__(message)
+        self.line = line
@@ -0,0 +1,216 @@
+"""
+The compact form in which scenes are recorded before they are written as SPL code.
+
+Every statement is four integers in an :py:class:`array.array`: an opcode and three operands.
+Characters are stored once per scene and referred to by their index, and values (numbers and operations,
+and the scenes jumped to) are stored in a separate list, also referred to by their index. Text is only produced when the scene is
+rendered, so a recorded scene can be optimized or rendered again without running the scene method.
+"""
+from array import array
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Union
+
+from .character import Character
+from .operations import Seed, Value, value_as_str as _value_as_str
+from .vocabulary import Vocabulary
+
+if TYPE_CHECKING:
+    from .play import Scene
+
+# Opcodes. The operands of each statement are (first, second, operand):
+ENTER = 0     # (character, character or -1, 0)
+EXIT = 1      # (character or -1, character or -1, 0). -1 for both means everyone leaves.
+SET = 2       # (speaker, target, value index)
+PRINT = 3     # (speaker, target, 0 for str or 1 for int)
+INPUT = 4     # (speaker, target, 0 for str or 1 for int)
+REMEMBER = 5  # (speaker, target, value index)
+POP = 6       # (speaker, target, 0)
+QUESTION = 7  # (speaker, target, value index << 2 | index in COMPARISONS)
+GOTO = 8      # (speaker, -1, index of the target scene in the values << 2 | index in CONDITIONS)
+
+OP_NAMES = ('enter', 'exit', 'set', 'print', 'input', 'remember', 'pop', 'question', 'goto')
+_OPCODES = {name: op for op, name in enumerate(OP_NAMES)}
+_TYPES = (str, int)
+
+# The words of statements, indexed by whether the compact style (the shortest words SPL allows) is used.
+_SET_WORDS = ('You are', 'You')
+_PRINT_LINES = (('Speak your mind', 'Open your heart'), ('Speak thy mind', 'Open thy heart'))
+_INPUT_LINES = (('Open your mind', 'Listen to your heart'), ('Open thy mind', 'Listen to thy heart'))
+_POP_LINES = ('Recall yourself', 'Recall')
+_PROCEED_WORDS = ('proceed', 'return')
+
+COMPARISONS = ('>', '<', '==')
+"""The comparisons questions can make, which are the ones SPL has words for."""
+_COMPARISON_WORDS = (('better than', 'worse than', 'as good as'), ('nicer than', 'worse than', 'as bad as'))
+CONDITIONS = (None, True, False)
+"""When a jump is made: always, if the answer to the last question was yes, or if it was no."""
+_GOTO_WORDS = ('Let us', 'If so, let us', 'If not, let us')
+
+def _timed(on_value: Callable[[Value, str, float], None]) -> Callable[..., str]:
+    def value_as_str(value: Value, *args) -> str:
+        start = time.perf_counter()
+        code = _value_as_str(value, *args)
+        on_value(value, code, time.perf_counter() - start)
+        return code
+    return value_as_str
+
+class SceneIR:
+    """
+    The statements of one scene.
+
+    .. warning::
+
+        This should not be constructed manually by the user.
+        Scenes are recorded by the methods of :py:class:`~pyspl.Act`.
+    """
+    __slots__ = ('code', 'characters', 'values', '_character_ids')
+
+    def __init__(self) -> None:
+        self.code = array('i')
+        self.characters: list[Character] = []
+        self.values: list[Union[Value, 'Scene']] = []
+        self._character_ids: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.code) // 4
+
+    def __getstate__(self):
+        return self.code, self.characters, self.values
+
+    def __setstate__(self, state) -> None:
+        self.code, self.characters, self.values = state
+        self._character_ids = {id(c): i for i, c in enumerate(self.characters)}
+
+    def character_id(self, character: Optional[Character]) -> int:
+        """
+        Returns the index of *character* in :py:attr:`characters`, adding it if needed. ``None`` is -1.
+        """
+        if character is None:
+            return -1
+        character_id = self._character_ids.get(id(character))
+        if character_id is None:
+            character_id = self._character_ids[id(character)] = len(self.characters)
+            self.characters.append(character)
+        return character_id
+
+    def append(self, op: int, first: Optional[Character] = None, second: Optional[Character] = None, operand: int = 0):
+        """
+        Adds a statement.
+        """
+        self.code.extend((op, self.character_id(first), self.character_id(second), operand))
+
+    def add_value(self, value: Value) -> int:
+        """
+        Stores *value* and returns its index, to be used as the operand of ``SET`` and ``REMEMBER``.
+        """
+        self.values.append(value)
+        return len(self.values) - 1
+
+    def add_scene(self, scene: 'Scene') -> int:
+        """
+        Stores the target of a ``GOTO`` statement in :py:attr:`values`, and returns its index.
+        """
+        self.values.append(scene)
+        return len(self.values) - 1
+
+    def records(self) -> Iterator[tuple[int, int, int, int]]:
+        """
+        Iterates over the statements as ``(op, first, second, operand)`` tuples of integers.
+        """
+        code = self.code
+        for i in range(0, len(code), 4):
+            yield code[i], code[i + 1], code[i + 2], code[i + 3]
+
+    def statements(self) -> Iterator[tuple]:
+        """
+        Iterates over the statements as tuples of objects, which are easier to work with than records:
+        ``('enter', characters)``, ``('exit', characters)``, ``('set', speaker, target, value)``,
+        ``('print', speaker, target, type)``, ``('input', speaker, target, type)``,
+        ``('remember', speaker, target, value)``, ``('pop', speaker, target)``,
+        ``('question', speaker, target, comparison, value)`` and ``('goto', speaker, condition, scene)``.
+        """
+        characters = self.characters
+        for op, first, second, operand in self.records():
+            if op == ENTER or op == EXIT:
+                yield OP_NAMES[op], tuple(characters[c] for c in (first, second) if c != -1)
+            elif op == SET or op == REMEMBER:
+                yield OP_NAMES[op], characters[first], characters[second], self.values[operand]
+            elif op == PRINT or op == INPUT:
+                yield OP_NAMES[op], characters[first], characters[second], _TYPES[operand]
+            elif op == QUESTION:
+                yield 'question', characters[first], characters[second], COMPARISONS[operand & 3], self.values[operand >> 2]
+            elif op == GOTO:
+                yield 'goto', characters[first], CONDITIONS[operand & 3], self.values[operand >> 2]
+            else:
+                yield OP_NAMES[op], characters[first], characters[second]
+
+    @classmethod
+    def from_statements(cls, statements: Iterable[tuple]) -> 'SceneIR':
+        """
+        Builds a scene from tuples in the form given by :py:meth:`statements`.
+        """
+        ir = cls()
+        for statement in statements:
+            op = _OPCODES[statement[0]]
+            if op == ENTER or op == EXIT:
+                ir.append(op, *statement[1])
+            elif op == SET or op == REMEMBER:
+                ir.append(op, statement[1], statement[2], ir.add_value(statement[3]))
+            elif op == PRINT or op == INPUT:
+                ir.append(op, statement[1], statement[2], _TYPES.index(statement[3]))
+            elif op == QUESTION:
+                _, speaker, target, comparison, value = statement
+                ir.append(op, speaker, target, ir.add_value(value) << 2 | COMPARISONS.index(comparison))
+            elif op == GOTO:
+                _, speaker, condition, scene = statement
+                ir.append(op, speaker, None, ir.add_scene(scene) << 2 | CONDITIONS.index(condition))
+            else:
+                ir.append(op, statement[1], statement[2])
+        return ir
+
+    def render(
+        self,
+        seed: Optional[Seed] = None,
+        vocabulary: Optional[Vocabulary] = None,
+        compact: bool = False,
+        on_value: Optional[Callable[[Value, str, float], None]] = None,
+    ) -> Iterator[str]:
+        """
+        Writes the statements as lines of SPL code, with the words of *vocabulary* (by default
+        :py:data:`~pyspl.vocabulary.default_vocabulary`). If *compact* is true, numbers and statements
+        are written in as few characters as possible and *seed* is not used.
+
+        If *on_value* is given, it is called with each value, the code written for it and the seconds
+        that took.
+        """
+        characters = self.characters
+        value_as_str = _value_as_str if on_value is None else _timed(on_value)
+        for op, first, second, operand in self.records():
+            if op == ENTER:
+                names = [characters[c].name for c in (first, second) if c != -1]
+                yield f'[Enter {" and ".join(names)}]'
+            elif op == EXIT:
+                names = [characters[c].name for c in (first, second) if c != -1]
+                if len(names) == 1:
+                    yield f'[Exit {names[0]}]'
+                else:
+                    yield f'[Exeunt {" and ".join(names)}]' if names else '[Exeunt]'
+            else:
+                speaker = characters[first].name
+                if op == SET:
+                    value = value_as_str(self.values[operand], seed, vocabulary, compact)
+                    yield f'{speaker}: {_SET_WORDS[compact]} {value}!'
+                elif op == PRINT:
+                    yield f'{speaker}: {_PRINT_LINES[compact][operand]}!'
+                elif op == INPUT:
+                    yield f'{speaker}: {_INPUT_LINES[compact][operand]}!'
+                elif op == REMEMBER:
+                    yield f'{speaker}: Remember {value_as_str(self.values[operand], seed, vocabulary, compact)}!'
+                elif op == QUESTION:
+                    value = value_as_str(self.values[operand >> 2], seed, vocabulary, compact)
+                    yield f'{speaker}: Are you {_COMPARISON_WORDS[compact][operand & 3]} {value}?'
+                elif op == GOTO:
+                    scene = self.values[operand >> 2]
+                    yield f'{speaker}: {_GOTO_WORDS[operand & 3]} {_PROCEED_WORDS[compact]} to scene {scene.number}.'
+                else:
+                    yield f'{speaker}: {_POP_LINES[compact]}!'
@@ -1,4 +1,5 @@
-names: list[str] = ['Achilles', 'Adonis', 'Adriana', 'Aegeon', 'Aemilia', 'Agamemnon', 'Agrippa', 'Ajax', 'Alonso', 'Andromache', 'Angelo', 'Antiochus', 'Antonio', 'Arthur', 'Autolycus', 'Balthazar', 'Banquo', 'Beatrice', 'Benedick', 'Benvolio', 'Bianca', 'Brabantio', 'Brutus', 'Capulet', 'Cassandra', 'Cassius', 'Christopher', 'Sly', 'Cicero', 'Claudio', 'Claudius', 'Cleopatra', 'Cordelia', 'Cornelius', 'Cressida', 'Cymberline', 'Demetrius', 'Desdemona', 'Dionyza', 'Doctor', 'Caius', 'Dogberry', 'Don', 'John', 'Don', 'Pedro', 'Donalbain', 'Dorcas', 'Duncan', 'Egeus', 'Emilia', 'Escalus', 'Falstaff', 'Fenton', 'Ferdinand', 'Ford', 'Fortinbras', 'Francisca', 'Friar', 'John', 'Friar', 'Laurence', 'Gertrude', 'Goneril', 'Hamlet', 'Hecate', 'Hector', 'Helen', 'Helena', 'Hermia', 'Hermonie', 'Hippolyta', 'Horatio', 'Imogen', 'Isabella', 'John', 'of', 'Gaunt', 'John', 'of', 'Lancaster', 'Julia', 'Juliet', 'Julius', 'Caesar', 'King', 'Henry', 'King', 'John', 'King', 'Lear', 'King', 'Richard', 'Lady', 'Capulet', 'Lady', 'Macbeth', 'Lady', 'Macduff', 'Lady', 'Montague', 'Lennox', 'Leonato', 'Luciana', 'Lucio', 'Lychorida', 'Lysander', 'Macbeth', 'Macduff', 'Malcolm', 'Mariana', 'Mark', 'Antony', 'Mercutio', 'Miranda', 'Mistress', 'Ford', 'Mistress', 'Overdone', 'Mistress', 'Page', 'Montague', 'Mopsa', 'Oberon', 'Octavia', 'Octavius', 'Caesar', 'Olivia', 'Ophelia', 'Orlando', 'Orsino', 'Othello', 'Page', 'Pantino', 'Paris', 'Pericles', 'Pinch', 'Polonius', 'Pompeius', 'Portia', 'Priam', 'Prince', 'Henry', 'Prospero', 'Proteus', 'Publius', 'Puck', 'Queen', 'Elinor', 'Regan', 'Robin', 'Romeo', 'Rosalind', 'Sebastian', 'Shallow', 'Shylock', 'Slender', 'Solinus', 'Stephano', 'Thaisa', 'The', 'Abbot', 'of', 'Westminster', 'The', 'Apothecary', 'The', 'Archbishop', 'of', 'Canterbury', 'The', 'Duke', 'of', 'Milan', 'The', 'Duke', 'of', 'Venice', 'The', 'Ghost', 'Theseus', 'Thurio', 'Timon', 'Titania', 'Titus', 'Troilus', 'Tybalt', 'Ulysses', 'Valentine', 'Venus', 'Vincentio', 'Viola']
+names: list[str] = ['Achilles', 'Adonis', 'Adriana', 'Aegeon', 'Aemilia', 'Agamemnon', 'Agrippa', 'Ajax', 'Alonso', 'Andromache', 'Angelo', 'Antiochus', 'Antonio', 'Arthur', 'Autolycus', 'Balthazar', 'Banquo', 'Beatrice', 'Benedick', 'Benvolio', 'Bianca', 'Brabantio', 'Brutus', 'Capulet', 'Cassandra', 'Cassius', 'Christopher Sly', 'Cicero', 'Claudio', 'Claudius', 'Cleopatra', 'Cordelia', 'Cornelius', 'Cressida', 'Cymberline', 'Demetrius', 'Desdemona', 'Dionyza', 'Doctor Caius', 'Dogberry', 'Don John', 'Don Pedro', 'Donalbain', 'Dorcas', 'Duncan', 'Egeus', 'Emilia', 'Escalus', 'Falstaff', 'Fenton', 'Ferdinand', 'Ford', 'Fortinbras', 'Francisca', 'Friar John', 'Friar Laurence', 'Gertrude', 'Goneril', 'Hamlet', 'Hecate', 'Hector', 'Helen', 'Helena', 'Hermia', 'Hermonie', 'Hippolyta', 'Horatio', 'Imogen', 'Isabella', 'John of Gaunt', 'John of Lancaster', 'Julia', 'Juliet', 'Julius Caesar', 'King Henry', 'King John', 'King Lear', 'King Richard', 'Lady Capulet', 'Lady Macbeth', 'Lady Macduff', 'Lady Montague', 'Lennox', 'Leonato', 'Luciana', 'Lucio', 'Lychorida', 'Lysander', 'Macbeth', 'Macduff', 'Malcolm', 'Mariana', 'Mark Antony', 'Mercutio', 'Miranda', 'Mistress Ford', 'Mistress Overdone', 'Mistress Page', 'Montague', 'Mopsa', 'Oberon', 'Octavia', 'Octavius Caesar', 'Olivia', 'Ophelia', 'Orlando', 'Orsino', 'Othello', 'Page', 'Pantino', 'Paris', 'Pericles', 'Pinch', 'Polonius', 'Pompeius', 'Portia', 'Priam', 'Prince Henry', 'Prospero', 'Proteus', 'Publius', 'Puck', 'Queen Elinor', 'Regan', 'Robin', 'Romeo', 'Rosalind', 'Sebastian', 'Shallow', 'Shylock', 'Slender', 'Solinus', 'Stephano', 'Thaisa', 'The Abbot of Westminster', 'The Apothecary', 'The Archbishop of Canterbury', 'The Duke of Milan', 'The Duke of Venice', 'The Ghost', 'Theseus', 'Thurio', 'Timon', 'Titania', 'Titus', 'Troilus', 'Tybalt', 'Ulysses', 'Valentine', 'Venus', 'Vincentio', 'Viola']
+name_table: frozenset[str] = frozenset(names)
 
 nouns: dict[str, list[str]] = {
     'positive_neutral': [
@@ -6,7 +7,7 @@ nouns: dict[str, list[str]] = {
         'Heaven', 'King', 'Lord', 'angel', 'flower', 'happiness', 'joy', 'plum', 'summer\'s day', 'hero', 'rose', 'kingdom', 'pony'         
     ],
     'negative': [
-        'Hell', 'Microsoft', 'bastard', 'beggare', 'blister', 'codpiece', 'coward', 'curse', 'death', 'devil', 'draught', 'famine', 'flirt-gill', 'goat', 'hate', 'god', 'hound', 'leech', 'lie', 'pig', 'plague', 'starvation', 'toad', 'war', 'wolf'
+        'Hell', 'Microsoft', 'bastard', 'beggar', 'blister', 'codpiece', 'coward', 'curse', 'death', 'devil', 'draught', 'famine', 'flirt-gill', 'goat', 'hate', 'hog', 'hound', 'leech', 'lie', 'pig', 'plague', 'starvation', 'toad', 'war', 'wolf'
     ]
 }
 
@@ -0,0 +1,224 @@
+"""
+Watches code being generated, to find out where the time and the bytes go.
+
+An :py:class:`Observer` is notified when acts and scenes start and end, of every line, and of every value
+written. Add one to a whole play with :py:meth:`pyspl.Play.add_observer`, or to a single act with
+:py:meth:`pyspl.Act.add_observer`. :py:class:`Profiler` is a built-in observer that adds up the time,
+lines and bytes of each scene and of each type of value:
+
+.. code-block:: python
+
+    from pyspl.observers import Profiler
+
+    profiler = Profiler()
+    play.add_observer(profiler)
+    play.save('play.spl')
+    profiler.dump_json('profile.json')
+    profiler.dump_stats('profile.pstats')  # python -m pstats profile.pstats
+
+Observers are only notified while code is generated in the calling thread: by :py:meth:`~pyspl.Play.iter_code`,
+:py:meth:`~pyspl.Play.save`, :py:meth:`~pyspl.Play.code_size` and :py:meth:`~pyspl.Play.code` without *workers*.
+"""
+from dataclasses import asdict, dataclass
+import json
+import marshal
+import os
+import time
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from .operations import Value
+
+if TYPE_CHECKING:
+    from .play import Act, Scene
+
+class Observer:
+    """
+    Receives the events of code generation. Every method does nothing, so subclasses only override
+    the events they need.
+
+    Lines are reported as they are generated, so the events of a scene are spread over the time its lines are consumed.
+    """
+    def act_start(self, act: 'Act', number: str, description: str) -> None:
+        """
+        Called before the first line of *act*.
+        """
+
+    def act_end(self, act: 'Act') -> None:
+        """
+        Called after the last line of *act*.
+        """
+
+    def scene_start(self, act: 'Act', scene: 'Scene') -> None:
+        """
+        Called before the first line of *scene*, before its method runs.
+        """
+
+    def scene_end(self, act: 'Act', scene: 'Scene') -> None:
+        """
+        Called after the last line of *scene*.
+        """
+
+    def line(self, line: str) -> None:
+        """
+        Called with every line, without its line ending. Observers of a play receive every line of it,
+        observers of an act only the lines of that act.
+        """
+
+    def value(self, value: Value, code: str, seconds: float) -> None:
+        """
+        Called after *value* (a number, a character or an operation) was written as *code*, which took *seconds*.
+        Values whose scene was taken from the cache are not written again, so they are not reported.
+        """
+
+@dataclass
+class Stats:
+    """
+    What a :py:class:`Profiler` added up for an act, a scene or a type of value.
+    """
+    calls: int = 0
+    """How many times the act or scene was generated, or how many values of the type were written."""
+    seconds: float = 0.0
+    """The wall time spent, including the time taken by whatever consumed the lines, such as writing them to a file."""
+    lines: int = 0
+    """The number of lines. For values, the number of lines they were written in."""
+    bytes: int = 0
+    """The size of the code in UTF-8, counting a line ending after each line. For values, only the value's own code."""
+
+def _function_key(obj: Any, name: str) -> tuple[str, int, str]:
+    """
+    The ``(file, line, name)`` key pstats identifies functions by.
+    """
+    code = getattr(getattr(obj, '__func__', obj), '__code__', None)
+    if code is None:
+        return ('~', 0, name)
+    return (code.co_filename, code.co_firstlineno, name)
+
+class Profiler(Observer):
+    """
+    Records the wall time, lines and bytes of every act, scene and type of value (:py:class:`pyspl.sum`,
+    ``int``, :py:class:`pyspl.Character`...). Results of several runs are added together until :py:meth:`clear` is called.
+
+    A profiler must only observe one generation of code at a time.
+    """
+    def __init__(self) -> None:
+        self.acts: dict[tuple[str, str], Stats] = {}
+        """The stats of each act, by its class name and number."""
+        self.scenes: dict[tuple[str, str, str], Stats] = {}
+        """The stats of each scene, by its act's class name and number, and its method name."""
+        self.operations: dict[str, Stats] = {}
+        """The stats of each type of value, by type name."""
+        self._keys: dict[tuple, tuple[str, int, str]] = {}
+        self._scene_operations: dict[tuple[tuple[str, str, str], str], Stats] = {}
+        self._act: Optional[tuple[tuple[str, str], float]] = None
+        self._scene: Optional[tuple[tuple[str, str, str], float]] = None
+
+    def clear(self) -> None:
+        """
+        Forgets everything recorded.
+        """
+        self.__init__()
+
+    def act_start(self, act: 'Act', number: str, description: str) -> None:
+        key = (type(act).__qualname__, number)
+        if key not in self._keys:
+            self._keys[key] = _function_key(type(act).__init__, f'{key[0]} (Act {number})')
+        self.acts.setdefault(key, Stats()).calls += 1
+        self._act = (key, time.perf_counter())
+
+    def act_end(self, act: 'Act') -> None:
+        key, start = self._act
+        self.acts[key].seconds += time.perf_counter() - start
+        self._act = None
+
+    def scene_start(self, act: 'Act', scene: 'Scene') -> None:
+        key = (*self._act[0], scene.name)
+        if key not in self._keys:
+            self._keys[key] = _function_key(getattr(act, scene.name), f'{key[0]}.{scene.name}')
+        self.scenes.setdefault(key, Stats()).calls += 1
+        self._scene = (key, time.perf_counter())
+
+    def scene_end(self, act: 'Act', scene: 'Scene') -> None:
+        key, start = self._scene
+        self.scenes[key].seconds += time.perf_counter() - start
+        self._scene = None
+
+    def line(self, line: str) -> None:
+        size = len(line.encode()) + 1
+        for key, stats in ((self._act, self.acts), (self._scene, self.scenes)):
+            if key is not None:
+                entry = stats[key[0]]
+                entry.lines += 1
+                entry.bytes += size
+
+    def value(self, value: Value, code: str, seconds: float) -> None:
+        name = type(value).__name__
+        size = len(code.encode())
+        targets = [self.operations.setdefault(name, Stats())]
+        if self._scene is not None:
+            targets.append(self._scene_operations.setdefault((self._scene[0], name), Stats()))
+        for stats in targets:
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.lines += 1
+            stats.bytes += size
+
+    def to_dict(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Returns the results as lists of records, which can be written as JSON.
+        """
+        return {
+            'acts': [{'act': act, 'number': number, **asdict(stats)} for (act, number), stats in self.acts.items()],
+            'scenes': [
+                {'act': act, 'number': number, 'scene': scene, **asdict(stats)}
+                for (act, number, scene), stats in self.scenes.items()
+            ],
+            'operations': [{'type': name, **asdict(stats)} for name, stats in self.operations.items()],
+        }
+
+    def dump_json(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes :py:meth:`to_dict` to *path* as JSON.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_pstats(self) -> dict:
+        """
+        Returns the results in the format of :py:mod:`cProfile`: a dict mapping ``(file, line, function)`` to
+        ``(primitive calls, calls, own time, cumulative time, callers)``.
+
+        Acts call their scenes, which call the types of values (reported as ``<sum>``, ``<int>``...).
+        The own time of an act or scene is its time minus that of what it called.
+        """
+        stats: dict[tuple[str, int, str], list] = {}
+
+        def add(key: tuple[str, int, str], calls: int, own: float, total: float, caller=None) -> None:
+            entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+            entry[0] += calls
+            entry[1] += calls
+            entry[2] += own
+            entry[3] += total
+            if caller is not None:
+                old = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                entry[4][caller] = (old[0] + calls, old[1] + calls, old[2] + own, old[3] + total)
+
+        called: dict[tuple, float] = {}
+        for (scene, name), value_stats in self._scene_operations.items():
+            add(('~', 0, f'<{name}>'), value_stats.calls, value_stats.seconds, value_stats.seconds, self._keys[scene])
+            called[scene] = called.get(scene, 0.0) + value_stats.seconds
+        for key, scene_stats in self.scenes.items():
+            act = key[:2]
+            own = max(scene_stats.seconds - called.get(key, 0.0), 0.0)
+            add(self._keys[key], scene_stats.calls, own, scene_stats.seconds, self._keys[act])
+            called[act] = called.get(act, 0.0) + scene_stats.seconds
+        for key, act_stats in self.acts.items():
+            add(self._keys[key], act_stats.calls, max(act_stats.seconds - called.get(key, 0.0), 0.0), act_stats.seconds)
+        return {key: tuple(entry) for key, entry in stats.items()}
+
+    def dump_stats(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes :py:meth:`to_pstats` to *path* in the format of :py:meth:`cProfile.Profile.dump_stats`, so
+        it can be read with :py:class:`pstats.Stats` or any tool reading cProfile output.
+        """
+        with open(path, 'wb') as f:
+            marshal.dump(self.to_pstats(), f)
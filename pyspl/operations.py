@@ -1,81 +1,277 @@
-from typing import Union
-from math import log2
+from functools import lru_cache
+from typing import Optional, Union
+from math import inf
 import random
 
 from .character import Character
 from .errors import InvalidNumberError
-from .names import adjectives, nouns
+from .vocabulary import Vocabulary, default_vocabulary
 
 VOWELS = ['a', 'e', 'i', 'o', 'u']
 Value = Union[int, 'Operation', Character]
+Seed = Union[int, str]
 
-def value_as_str(value: Value):
+# How many seeded noun phrases are kept around by :py:class:`Int`.
+PHRASE_CACHE_SIZE = 4096
+
+def value_as_str(
+    value: Value,
+    seed: Optional[Seed] = None,
+    vocabulary: Optional[Vocabulary] = None,
+    compact: bool = False,
+):
     result: str = ''
     if isinstance(value, int):
-        result = str(Int(value))
-    elif isinstance(value, (Character, Operation)):
+        result = Int(value)._code(seed, vocabulary, compact)
+    elif isinstance(value, Character):
         result = str(value)
+    elif isinstance(value, Operation):
+        result = value._code(seed, vocabulary, compact)
 
     return result
 
+def _check_value(value: Value, vocabulary: Vocabulary) -> None:
+    """
+    Raises the error writing *value* with *vocabulary* would raise, without writing it.
+    """
+    if isinstance(value, int):
+        if value != 0 and _plan(value, _word_costs(vocabulary.limits))[0] == inf:
+            raise InvalidNumberError(f'number is too large to encode: {value}')
+    elif isinstance(value, TwoNumberOperation):
+        _check_value(value.a, vocabulary)
+        _check_value(value.b, vocabulary)
+    elif isinstance(value, OneNumberOperation):
+        _check_value(value.x, vocabulary)
+    elif not isinstance(value, Character):
+        raise TypeError(f'invalid value: {value!r}')
+
+def _seeded_phrase(n: int, seed: Seed, vocabulary: Vocabulary) -> str:
+    """
+    Same as :py:meth:`Vocabulary.phrase`, but always gives the same phrase for the same *n*, *seed* and *vocabulary*.
+    """
+    return vocabulary.phrase(n, random.Random(f'{seed}:{n}'))
+
+_cached_phrase = lru_cache(maxsize=PHRASE_CACHE_SIZE)(_seeded_phrase)
+
 class Int:
     """
     A number in SPL.
 
     This shouldn't be constructed manually by the user; instead just use the builtin :py:class:`int`.
+
+    Any integer can be used. Small powers of 2 are written as a single noun phrase, and other numbers
+    are written as a short combination of :py:class:`sum`, :py:class:`difference`, :py:class:`product`,
+    :py:class:`square` and :py:class:`cube` of powers of 2. Large powers of 2 are built by repeated
+    squaring and cubing, so ``2 ** 10000`` only takes a few dozen words.
+
+    :raises InvalidNumberError: The vocabulary has no adjectives to write the number with.
     """
     def __init__(self, n: int):
         self.n = n
 
     def _is_power_of_two(self, n: int) -> bool:
-        # sauce: ChatGPT
-        if n <= 0:
-            return False
-        while n > 1:
-            if n % 2 != 0:
-                return False
-            n = n // 2
-        return True
+        return n > 0 and n & (n - 1) == 0
     
     def __str__(self):
         return self._code()
 
-    def _code(self):
+    def _code(self, seed: Optional[Seed] = None, vocabulary: Optional[Vocabulary] = None, compact: bool = False):
         if self.n == 0:
-            return 'nothing'
-        if not self._is_power_of_two(self.n):
-            raise InvalidNumberError(f'numbers must be a power of 2: {self.n}')
-        if self.n < 0:
-            result = ''
-            negative_adjs = [*adjectives['negative']]
-            log_result = round(log2(abs(self.n)))   
-            for i in range(log_result):
-                choice = random.randint(0, len(negative_adjs)-1)
-                if i == 0:
-                    if negative_adjs[choice][0] in VOWELS:
-                        result = 'an '
-                    else:
-                        result = 'a '
-                result += negative_adjs.pop(choice) + ' '
-            result += random.choice(nouns['negative'])
-            return result
-        
-        if self.n > 0:
-            result = 'the '
-            positive_adjs = [*adjectives['positive_neutral']]
-            log_result = round(log2(self.n))
-            for i in range(log_result):
-                choice = random.randint(0, len(positive_adjs)-1)
-                if i == 0:
-                    if positive_adjs[choice][0] in VOWELS:
-                        result = 'an '
-                    else:
-                        result = 'a '
-                result += positive_adjs.pop(choice) + ' '
-            result += random.choice(nouns['positive_neutral'])
-            return result
-        
-        raise Exception('how tf did you get here')
+            return 'zero' if compact else 'nothing'
+        if vocabulary is None:
+            vocabulary = default_vocabulary
+        if compact:
+            return _compact_code(self.n, vocabulary)
+        costs = _word_costs(vocabulary.limits)
+        value = _build(_plan(self.n, costs)[1], costs)
+        if isinstance(value, Operation):
+            return value._code(seed, vocabulary)
+        if seed is None:
+            return vocabulary.phrase(self.n, random)
+        return _cached_phrase(self.n, seed, vocabulary)
+
+class _Costs:
+    """
+    What writing each part of a number costs, for :py:func:`_plan`.
+
+    ``positive[i]`` and ``negative[i]`` are the costs of a noun phrase with *i* adjectives
+    (so their lengths limit which powers of 2 can be a single phrase), and the rest are the costs of
+    ``nothing`` and of the fixed words around the operands of each operation.
+    """
+    __slots__ = ('positive', 'negative', 'zero', 'sum', 'difference', 'product', 'square', 'cube')
+
+    def __init__(
+        self,
+        positive: tuple,
+        negative: tuple,
+        zero: int,
+        sum: int,
+        difference: int,
+        product: int,
+        square: int,
+        cube: int,
+    ):
+        self.positive = positive
+        self.negative = negative
+        self.zero = zero
+        self.sum = sum
+        self.difference = difference
+        self.product = product
+        self.square = square
+        self.cube = cube
+
+@lru_cache(maxsize=None)
+def _word_costs(limits: tuple[int, int]) -> _Costs:
+    """
+    Costs in words, which is what the default style minimizes. *limits* is :py:attr:`Vocabulary.limits`.
+    """
+    return _Costs(
+        tuple(range(2, limits[0] + 3)), tuple(range(2, limits[1] + 3)),
+        zero=1, sum=4, difference=4, product=4, square=3, cube=3,
+    )
+
+@lru_cache(maxsize=16)
+def _compact_costs(vocabulary: Vocabulary) -> _Costs:
+    """
+    Costs in characters, which is what the compact style minimizes.
+    """
+    positive, negative = vocabulary.limits
+    return _Costs(
+        tuple(len(vocabulary.shortest_phrase(1 << i)) for i in range(positive + 1)),
+        tuple(len(vocabulary.shortest_phrase(-1 << i)) for i in range(negative + 1)),
+        zero=len('zero'),
+        sum=len('the sum of  and '),
+        difference=len('the difference between  and '),
+        product=len('the product of  and '),
+        square=len('the square of '),
+        cube=len('the cube of '),
+    )
+
+def _leaf_cost(n: int, costs: Optional[_Costs] = None) -> float:
+    """
+    Returns the cost of the noun phrase for *n*, which must be a power of 2 (or its negative).
+    By default, the cost is in words with the adjectives of the default vocabulary.
+    """
+    if costs is None:
+        costs = _word_costs(default_vocabulary.limits)
+    table = costs.negative if n < 0 else costs.positive
+    bits = abs(n).bit_length() - 1
+    return table[bits] if bits < len(table) else inf
+
+# Numbers with more bits than this are only split in halves (and by their trailing zeros) instead of
+# being searched bit by bit, which keeps planning fast and its recursion shallow for very large numbers.
+_SEARCH_BITS = 24
+
+@lru_cache(maxsize=4096)
+def _plan(n: int, costs: Optional[_Costs] = None) -> tuple:
+    """
+    Finds a near-minimal way of writing *n* using powers of 2, according to *costs*
+    (by default, in words with the adjectives of the default vocabulary).
+
+    Returns a ``(cost, plan)`` tuple, where *plan* is either an integer (a single noun phrase) or
+    a tuple of an operation and the plans of its operands.
+    """
+    if costs is None:
+        costs = _word_costs(default_vocabulary.limits)
+    if n == 0:
+        return costs.zero, 0
+    sign = -1 if n < 0 else 1
+    m = abs(n)
+    bits = m.bit_length()
+    if m & (m - 1) == 0:
+        return _plan_power(sign, bits - 1, costs)
+
+    candidates = []
+    zeros = (m & -m).bit_length() - 1
+    if zeros:
+        # Powers of 2 are cheaper as positive noun phrases, so the sign goes on the odd part.
+        candidates.append(_combine(product, costs, _plan(1 << zeros, costs), _plan(sign * (m >> zeros), costs)))
+    half = bits // 2
+    low_half = m & ((1 << half) - 1)
+    if half > 2 and low_half:
+        # Splitting into halves keeps the powers of 2 small: (hi * 2^half) + lo.
+        high_half = _combine(product, costs, _plan(1 << half, costs), _plan(sign * (m >> half), costs))
+        candidates.append(_combine(sum, costs, high_half, _plan(sign * low_half, costs)))
+
+    low = 1 << (bits - 1)
+    high = low << 1
+    for operation, a, b in ((sum, low, m - low), (difference, high, high - m)):
+        # Above _SEARCH_BITS, only numbers close to a power of 2 are worth writing as one.
+        if bits <= _SEARCH_BITS or b.bit_length() <= half:
+            candidates.append(_combine(operation, costs, _plan(sign * a, costs), _plan(sign * b, costs)))
+
+    best = min(candidates, key=_cost_of)
+    if best[0] == inf:
+        # Some power of 2 is too large for the adjectives; _build reports it.
+        return inf, n
+    return best
+
+def _plan_power(sign: int, bits: int, costs: _Costs) -> tuple:
+    """
+    Plans ``sign * 2 ** bits``, as a noun phrase or by squaring and cubing smaller powers of 2.
+    """
+    n = sign << bits
+    candidates = [(_leaf_cost(n, costs), n)]
+    if bits > 1:
+        # When long words have to be used (or there are not enough adjectives), multiplying
+        # two shorter phrases can be cheaper.
+        candidates.append(_combine(product, costs, _plan(1 << bits // 2, costs), _plan(sign << bits - bits // 2, costs)))
+        # sign * 2^bits = (2^(bits // 2))^2 * (sign * 2^(bits % 2))
+        squared = _combine(square, costs, _plan(1 << bits // 2, costs))
+        if bits % 2 or sign < 0:
+            squared = _combine(product, costs, squared, _plan(sign << bits % 2, costs))
+        candidates.append(squared)
+    if bits > 2:
+        # sign * 2^bits = (sign * 2^(bits // 3))^3 * 2^(bits % 3)
+        cubed = _combine(cube, costs, _plan(sign << bits // 3, costs))
+        if bits % 3:
+            cubed = _combine(product, costs, _plan(1 << bits % 3, costs), cubed)
+        candidates.append(cubed)
+    best = min(candidates, key=_cost_of)
+    if best[0] == inf and sign < 0:
+        # Negative adjectives ran out, so negate the positive number instead.
+        best = _combine(difference, costs, _plan(0, costs), _plan(-n, costs))
+    return best
+
+def _cost_of(candidate: tuple) -> float:
+    return candidate[0]
+
+def _combine(operation: type, costs: _Costs, *operands: tuple) -> tuple:
+    """
+    Returns the ``(cost, plan)`` of *operation* applied to the ``(cost, plan)`` tuples *operands*.
+    """
+    cost = getattr(costs, operation.__name__)
+    for operand in operands:
+        cost += operand[0]
+    return cost, (operation, *(operand[1] for operand in operands))
+
+def _build(plan, costs: Optional[_Costs] = None) -> Value:
+    """
+    Turns a plan returned by :py:func:`_plan` into operations.
+    """
+    if isinstance(plan, int):
+        if plan != 0 and _leaf_cost(plan, costs) == inf:
+            raise InvalidNumberError(f'number is too large to encode: {plan}')
+        return plan
+    operation, *operands = plan
+    return operation(*(_build(operand, costs) for operand in operands))
+
+@lru_cache(maxsize=PHRASE_CACHE_SIZE)
+def _compact_code(n: int, vocabulary: Vocabulary) -> str:
+    """
+    Writes *n* in as few characters as possible, with the shortest words of *vocabulary*.
+    """
+    costs = _compact_costs(vocabulary)
+    return _write_plan(_build(_plan(n, costs)[1], costs), vocabulary)
+
+def _write_plan(value: Value, vocabulary: Vocabulary) -> str:
+    if isinstance(value, TwoNumberOperation):
+        return f'{value.text} {_write_plan(value.a, vocabulary)} and {_write_plan(value.b, vocabulary)}'
+    if isinstance(value, OneNumberOperation):
+        return f'{value.text} {_write_plan(value.x, vocabulary)}'
+    return _shortest_phrase(vocabulary, value) if value else 'zero'
+
+_shortest_phrase = lru_cache(maxsize=PHRASE_CACHE_SIZE)(Vocabulary.shortest_phrase)
 
 class Operation:
     """
@@ -84,7 +280,11 @@ class Operation:
     This is a base class for all operations.
     """
 
-    def _code(self) -> str: return ''
+    def __str__(self):
+        return self._code()
+
+    def _code(self, seed: Optional[Seed] = None, vocabulary: Optional[Vocabulary] = None, compact: bool = False) -> str:
+        return ''
 
 class TwoNumberOperation(Operation):
     text = ''
@@ -96,12 +296,9 @@ class TwoNumberOperation(Operation):
     def __init_subclass__(cls, text: str) -> None:
         cls.text = text
 
-    def __str__(self):
-        return self._code()
-
-    def _code(self):
-        _a = value_as_str(self.a)
-        _b = value_as_str(self.b)
+    def _code(self, seed: Optional[Seed] = None, vocabulary: Optional[Vocabulary] = None, compact: bool = False):
+        _a = value_as_str(self.a, seed, vocabulary, compact)
+        _b = value_as_str(self.b, seed, vocabulary, compact)
         return f'{self.text} {_a} and {_b}'
 
 class sum(TwoNumberOperation, text='the sum of'):
@@ -124,16 +321,31 @@ class product(TwoNumberOperation, text='the product of'):
 
 class quotient(TwoNumberOperation, text='the quotient between'):
     """
-    Represents the quotient of *a* and *b* (``a // b``).
+    Represents the quotient of *a* and *b*, rounded toward zero as in SPL (``int(a / b)``).
     """
     pass
 
 class remainder(TwoNumberOperation, text='the remainder of the quotient between'):
     """
-    Represents the remainder of the quotient of *a* and *b* (``a % b``).
+    Represents the remainder of the quotient of *a* and *b*, which has the sign of *a* as in SPL
+    (``math.fmod(a, b)``).
     """
     pass
 
+def _quotient(a: int, b: int) -> int:
+    """
+    Divides *a* by *b* the way SPL does, rounding toward zero instead of down like ``//``.
+    This is exact for integers of any size, unlike ``int(a / b)``.
+    """
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+def _remainder(a: int, b: int) -> int:
+    """
+    Returns the remainder of :py:func:`_quotient`, which has the sign of *a* instead of *b* like ``%``.
+    """
+    return a - b * _quotient(a, b)
+
 class OneNumberOperation(Operation):
     text = ''
 
@@ -143,8 +355,8 @@ class OneNumberOperation(Operation):
     def __init_subclass__(cls, text: str):
         cls.text = text
 
-    def _code(self):
-        _x = value_as_str(self.x)
+    def _code(self, seed: Optional[Seed] = None, vocabulary: Optional[Vocabulary] = None, compact: bool = False):
+        _x = value_as_str(self.x, seed, vocabulary, compact)
         return f'{self.text} {_x}'
     
 class square(OneNumberOperation, text='the square of'):
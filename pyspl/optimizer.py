@@ -0,0 +1,361 @@
+"""
+Simplifies values and stage directions before they are written as SPL code.
+
+See the *optimize*, *reuse_subexpressions* and *schedule_stage* parameters of :py:class:`pyspl.Play`.
+"""
+import builtins
+from dataclasses import dataclass
+from math import factorial, inf, isqrt
+from typing import Callable, Iterable
+
+from .character import Character
+from .ir import SceneIR
+from .operations import (
+    Operation, OneNumberOperation, TwoNumberOperation, Value, _plan, _quotient, _remainder, value_as_str,
+    cube, difference, product, quotient, remainder, square, squareroot, sum
+)
+
+# Operations are not computed when the result would have more bits than this. Such numbers are
+# written by squaring and cubing, so computing them rarely makes the code shorter, but it can take long.
+MAX_FOLDED_BITS = 4096
+
+_BINARY_FUNCTIONS: dict[type, Callable[[int, int], int]] = {
+    sum: lambda a, b: a + b,
+    difference: lambda a, b: a - b,
+    product: lambda a, b: a * b,
+    quotient: _quotient,
+    remainder: _remainder,
+}
+_UNARY_FUNCTIONS: dict[type, Callable[[int], int]] = {
+    square: lambda x: x * x,
+    cube: lambda x: x * x * x,
+    squareroot: isqrt,
+}
+
+@dataclass
+class OptimizationStats:
+    """
+    What the optimizer saved while generating a play.
+
+    This is a data class.
+    """
+    operations: int = 0
+    """The number of operations removed."""
+    bytes: int = 0
+    """The number of bytes of SPL code saved."""
+    stage_directions: int = 0
+    """The number of ``[Enter ...]``, ``[Exit ...]`` and ``[Exeunt ...]`` lines removed."""
+
+def cost(value: Value) -> float:
+    """
+    Returns the number of words *value* takes when written as SPL code.
+    """
+    if isinstance(value, int):
+        return _plan(value)[0]
+    if isinstance(value, Character):
+        return len(value.name.split())
+    if isinstance(value, TwoNumberOperation):
+        return len(value.text.split()) + 1 + cost(value.a) + cost(value.b)
+    if isinstance(value, OneNumberOperation):
+        return len(value.text.split()) + cost(value.x)
+    raise TypeError(f'invalid value: {value!r}')
+
+def _count_plan_operations(plan) -> int:
+    if isinstance(plan, int):
+        return 0
+    return 1 + builtins.sum(map(_count_plan_operations, plan[1:]))
+
+def count_operations(value: Value) -> int:
+    """
+    Returns the number of operations in *value* when written as SPL code, including the operations
+    needed to write numbers that are not powers of 2.
+    """
+    if isinstance(value, int):
+        return 0 if cost(value) == inf else _count_plan_operations(_plan(value)[1])
+    if isinstance(value, TwoNumberOperation):
+        return 1 + count_operations(value.a) + count_operations(value.b)
+    if isinstance(value, OneNumberOperation):
+        return 1 + count_operations(value.x)
+    return 0
+
+def _evaluate(operation: Operation, *args: int):
+    """
+    Computes an operation whose arguments are all numbers. Returns ``None`` if it cannot be done.
+    """
+    kind = type(operation)
+    if kind in _BINARY_FUNCTIONS:
+        if kind in (quotient, remainder) and args[1] == 0:
+            return None
+        result = _BINARY_FUNCTIONS[kind](*args)
+    else:
+        x, = args
+        if kind in _UNARY_FUNCTIONS:
+            if kind is squareroot and x < 0:
+                return None
+            result = _UNARY_FUNCTIONS[kind](x)
+        elif 0 <= x <= 20:
+            # factorial grows too quickly to be worth computing for anything but small numbers.
+            result = factorial(x)
+        else:
+            return None
+    return None if abs(result).bit_length() > MAX_FOLDED_BITS else result
+
+def _is(value: Value, n: int) -> bool:
+    return isinstance(value, int) and value == n
+
+def _simplify(value: TwoNumberOperation) -> Value:
+    """
+    Removes additions of 0, multiplications by 1 and so on.
+    """
+    kind, a, b = type(value), value.a, value.b
+    if kind is sum and _is(a, 0):
+        return b
+    if kind in (sum, difference) and _is(b, 0):
+        return a
+    if kind is product and (_is(a, 0) or _is(b, 0)):
+        return 0
+    if kind is product and _is(a, 1):
+        return b
+    if kind in (product, quotient) and _is(b, 1):
+        return a
+    return value
+
+def fold(value: Value) -> Value:
+    """
+    Returns a value equal to *value* that is no longer when written as SPL code.
+
+    Operations on numbers are computed, so ``sum(64, 8)`` becomes ``72``, which is then written in whichever
+    way is shortest. Operations that do nothing (such as adding 0 or multiplying by 1) are removed.
+    """
+    if isinstance(value, TwoNumberOperation):
+        a, b = fold(value.a), fold(value.b)
+        folded = type(value)(a, b) if a is not value.a or b is not value.b else value
+        if isinstance(a, int) and isinstance(b, int):
+            result = _evaluate(folded, a, b)
+            if result is not None and cost(result) <= cost(folded):
+                return result
+        return _simplify(folded)
+    if isinstance(value, OneNumberOperation):
+        x = fold(value.x)
+        folded = type(value)(x) if x is not value.x else value
+        if isinstance(x, int):
+            result = _evaluate(folded, x)
+            if result is not None and cost(result) <= cost(folded):
+                return result
+        return folded
+    return value
+
+def fold_statements(ir: SceneIR, stats: OptimizationStats) -> None:
+    """
+    Runs :py:func:`fold` on the value of every ``set`` and ``remember`` statement of *ir*, and adds what was saved
+    to *stats*.
+    """
+    values = ir.values
+    for i, value in enumerate(values):
+        if isinstance(value, Operation):
+            folded = fold(value)
+            if folded is not value:
+                stats.operations += count_operations(value) - count_operations(folded)
+                # A fixed seed makes the measurement independent of which words happen to be picked.
+                stats.bytes += len(value_as_str(value, 0)) - len(value_as_str(folded, 0))
+                values[i] = folded
+
+def _key(value: Value):
+    """
+    Returns a hashable key that is equal for values that are written the same way.
+    """
+    if isinstance(value, Operation):
+        children = (value.a, value.b) if isinstance(value, TwoNumberOperation) else (value.x,)
+        return (type(value), *map(_key, children))
+    if isinstance(value, Character):
+        return (Character, id(value))
+    return value
+
+def _subtrees(value: Value):
+    yield value
+    if isinstance(value, TwoNumberOperation):
+        yield from _subtrees(value.a)
+        yield from _subtrees(value.b)
+    elif isinstance(value, OneNumberOperation):
+        yield from _subtrees(value.x)
+
+def _references(value: Value) -> set[int]:
+    return {id(v) for v in _subtrees(value) if isinstance(v, Character)}
+
+def _replace(value: Value, key, character: Character) -> Value:
+    """
+    Replaces every subtree of *value* whose key is *key* with *character*.
+    """
+    if _key(value) == key:
+        return character
+    if isinstance(value, TwoNumberOperation):
+        return type(value)(_replace(value.a, key, character), _replace(value.b, key, character))
+    if isinstance(value, OneNumberOperation):
+        return type(value)(_replace(value.x, key, character))
+    return value
+
+def _uses(statements: list[tuple], start: int, key, subtree: Value) -> list[int]:
+    """
+    Finds the ``set`` statements from *start* on that can get *subtree* from a stack instead of computing it.
+
+    Stops at the first statement that would break that: a ``remember`` or ``pop`` (which would get in the way
+    of the values pushed for later statements), or a ``set`` of a character the subtree depends on.
+    """
+    references = _references(subtree)
+    uses = []
+    for i in range(start, len(statements)):
+        if statements[i][0] != 'set':
+            break
+        _, _, target, value = statements[i]
+        if id(target) not in _references(value) and key in map(_key, _subtrees(value)):
+            uses.append(i)
+        if id(target) in references:
+            break
+    return uses
+
+def _rewrite(statements: list[tuple], uses: list[int], key, subtree: Value) -> list[tuple]:
+    first = uses[0]
+    _, speaker, holder, value = statements[first]
+    result = [*statements[:first], ('set', speaker, holder, subtree)]
+    for i in uses[1:]:
+        _, other_speaker, target, _ = statements[i]
+        result.append(('remember', other_speaker, target, holder))
+    if _key(value) != key:
+        result.append(('set', speaker, holder, _replace(value, key, holder)))
+
+    for i in range(first + 1, len(statements)):
+        if i not in uses:
+            result.append(statements[i])
+            continue
+        _, speaker, target, value = statements[i]
+        result.append(('pop', speaker, target))
+        if _key(value) != key:
+            result.append(('set', speaker, target, _replace(value, key, target)))
+    return result
+
+def _eliminate_once(statements: list[tuple]):
+    """
+    Finds the subtree whose reuse saves the most words in a run of ``set`` and ``remember`` statements
+    (which always have the same two characters on stage) and rewrites the statements to compute it once.
+    Returns ``None`` if nothing can be saved.
+    """
+    best_saving, best = 0.0, None
+    seen = set()
+    for start, statement in enumerate(statements):
+        if statement[0] != 'set':
+            # Uses never reach past this statement, so subtrees seen before it need another look.
+            seen.clear()
+            continue
+        for subtree in _subtrees(statement[3]):
+            key = _key(subtree)
+            if isinstance(subtree, Character) or key in seen:
+                continue
+            seen.add(key)
+            uses = _uses(statements, start, key, subtree)
+            if len(uses) < 2:
+                continue
+            name = cost(statements[start][2])
+            speaker = cost(statements[start][1])
+            occurrences = [_key(s) for i in uses for s in _subtrees(statements[i][3])].count(key)
+            saving = (occurrences - 1) * cost(subtree) - occurrences * name
+            # The extra "You are ...!" line, then a "Remember ...!" and a "Recall yourself!" line per reuse.
+            saving -= speaker + 2 + (len(uses) - 1) * (2 * speaker + 3 + name)
+            if saving > best_saving:
+                best_saving, best = saving, (uses, key, subtree)
+    if best is None:
+        return None
+    return _rewrite(statements, *best)
+
+def eliminate_subexpressions(ir: SceneIR, stats: OptimizationStats) -> SceneIR:
+    """
+    Makes values that are used several times in a row be computed once, then passed around through
+    the stacks of the two characters on stage (with ``Remember ...!`` and ``Recall yourself!``).
+
+    Only runs of consecutive ``set`` and ``remember`` statements are changed, so the characters on stage
+    stay the same. Adds what was saved to *stats*. Returns *ir* itself if nothing was changed.
+    """
+    changed = False
+    result = []
+    run: list[tuple] = []
+    for statement in [*ir.statements(), ('end',)]:
+        if statement[0] in ('set', 'remember'):
+            run.append(statement)
+            continue
+        before = run
+        while True:
+            rewritten = _eliminate_once(run)
+            if rewritten is None:
+                break
+            run = rewritten
+        if run is not before:
+            changed = True
+            stats.operations += (
+                builtins.sum(count_operations(s[3]) for s in before)
+                - builtins.sum(count_operations(s[3]) for s in run if s[0] != 'pop')
+            )
+            stats.bytes += (
+                builtins.sum(len(line) + 1 for line in SceneIR.from_statements(before).render(0))
+                - builtins.sum(len(line) + 1 for line in SceneIR.from_statements(run).render(0))
+            )
+        result.extend(run)
+        run = []
+        if statement[0] != 'end':
+            result.append(statement)
+    return SceneIR.from_statements(result) if changed else ir
+
+_DIRECTIONS = ('enter', 'exit')
+
+def _direction_bytes(statements: list[tuple]) -> int:
+    directions = SceneIR.from_statements([s for s in statements if s[0] in _DIRECTIONS])
+    return builtins.sum(len(line) + 1 for line in directions.render())
+
+def _move(result: list[tuple], stage: list[Character], wanted: list[Character]) -> None:
+    """
+    Adds the fewest stage directions that change *stage* into *wanted*: at most one exit, then at most one entrance.
+    """
+    leaving = [c for c in stage if c not in wanted]
+    entering = [c for c in wanted if c not in stage]
+    if leaving:
+        # "[Exeunt]" is shorter than naming everyone who leaves.
+        result.append(('exit', () if len(leaving) == len(stage) else tuple(leaving)))
+    if entering:
+        result.append(('enter', tuple(entering)))
+
+def schedule_stage(ir: SceneIR, stage: Iterable[Character], stats: OptimizationStats) -> SceneIR:
+    """
+    Rewrites the stage directions of a scene that starts with the characters *stage* on stage, so that each
+    statement still has its two characters on stage, with as few ``[Enter ...]`` and ``[Exit ...]`` lines as possible.
+
+    Characters keep their values and stacks off stage, so only who is on stage for each statement matters.
+    Directions that are undone before anything is said are dropped, and every change of the pair on stage
+    takes at most one exit and one entrance. The characters on stage at the end of the scene and at each jump
+    are the same, so the scenes that come next are not affected. Adds what was saved to *stats*.
+    Returns *ir* itself if nothing was changed.
+    """
+    statements = list(ir.statements())
+    current = list(stage)
+    end = list(current)
+    result: list[tuple] = []
+    for statement in statements:
+        if statement[0] == 'enter':
+            end.extend(statement[1])
+        elif statement[0] == 'exit':
+            end = [c for c in end if c not in statement[1]] if statement[1] else []
+        elif statement[0] == 'goto':
+            # The scene jumped to expects the stage as it was written.
+            _move(result, current, end)
+            current = list(end)
+            result.append(statement)
+        else:
+            wanted = [statement[1], statement[2]]
+            _move(result, current, wanted)
+            current = wanted
+            result.append(statement)
+    _move(result, current, end)
+    if result == statements:
+        return ir
+    stats.stage_directions += (
+        builtins.sum(s[0] in _DIRECTIONS for s in statements) - builtins.sum(s[0] in _DIRECTIONS for s in result)
+    )
+    stats.bytes += _direction_bytes(statements) - _direction_bytes(result)
+    return SceneIR.from_statements(result)
@@ -0,0 +1,479 @@
+"""
+Reads SPL code back into a :py:class:`~pyspl.Play`.
+
+Plays written by :py:meth:`pyspl.Play.save` (in either style) can be loaded again, then analysed, optimized
+or saved in another style, without the Python code that first generated them:
+
+.. code-block:: python
+
+    from pyspl.parse import load
+
+    play = load('play.spl', optimize=True)
+    play.save('smaller.spl', style='compact')
+
+Files are read in chunks of :py:data:`CHUNK_SIZE` bytes, and files larger than :py:data:`MMAP_THRESHOLD` bytes
+are memory-mapped, so even very large plays are read in a single pass without being loaded whole.
+Values are split at the words of their operations in a single regular expression search, and what is left
+(noun phrases, characters, pronouns) is looked up in a table of the operands seen so far. New operands are
+read with a regular expression built from a trie of the words of the play's vocabulary.
+
+The statements pyspl writes are understood, along with the common alternatives SPL has for them
+(such as ``Thou art`` for ``You are`` or ``We shall return to scene II.``). Numbers are read as the
+operations they are written with: ``the sum of a cat and a big cat`` becomes ``sum(1, 2)``, which the
+*optimize* option of :py:class:`~pyspl.Play` turns back into ``3``.
+"""
+from functools import lru_cache
+import mmap
+import os
+import re
+from typing import IO, Iterable, Iterator, Optional, Union
+
+from .character import Character
+from .errors import ParseError
+from .operations import (
+    Value, cube, difference, factorial, product, quotient, remainder, square, squareroot, sum
+)
+from .play import Play, RecordedAct
+from .vocabulary import KINDS, Vocabulary, default_vocabulary
+
+# How many bytes are read from a file at a time.
+CHUNK_SIZE = 1 << 20
+# Files larger than this (in bytes) are memory-mapped instead of read.
+MMAP_THRESHOLD = 64 << 20
+
+_BINARY = {
+    'the sum of': sum,
+    'the difference between': difference,
+    'the product of': product,
+    'the quotient between': quotient,
+    'the remainder of the quotient between': remainder,
+}
+_UNARY = {
+    'the square of': square,
+    'the cube of': cube,
+    'the square root of': squareroot,
+    'the factorial of': factorial,
+}
+_ARTICLES = ('a', 'an', 'the', 'my', 'your', 'his', 'her', 'its', 'their', 'our', 'thy', 'thine')
+_SECOND_PERSON = ('you', 'yourself', 'thee', 'thou', 'thyself')
+_FIRST_PERSON = ('I', 'me', 'myself')
+
+_PRINT = {'Speak your mind': str, 'Speak thy mind': str, 'Open your heart': int, 'Open thy heart': int}
+_INPUT = {'Open your mind': str, 'Open thy mind': str, 'Listen to your heart': int, 'Listen to thy heart': int}
+_POSITIVE_COMPARATIVES = ('better', 'bigger', 'fresher', 'friendlier', 'nicer', 'jollier')
+_NEGATIVE_COMPARATIVES = ('punier', 'smaller', 'worse')
+
+# Every kind of sentence, as one named group each, so a single match finds which one a sentence is.
+_SENTENCE = re.compile(
+    r"(?:"
+    r"(?:You|Thou)(?: am| are| art| be| is)?(?: as [\w'-]+ as)? (?P<set>[^.!?]+)"
+    r"|Remember (?P<remember>[^.!?]+)"
+    r"|(?P<pop>Recall\b[^.!?]*)"
+    rf"|(?P<print>{'|'.join(_PRINT)})"
+    rf"|(?P<input>{'|'.join(_INPUT)})"
+    r"|(?P<question>(?:Are you|Art thou) (?:"
+    rf"(?P<greater>{'|'.join(_POSITIVE_COMPARATIVES)})|(?P<less>{'|'.join(_NEGATIVE_COMPARATIVES)})"
+    r"|more (?P<more>[\w'-]+)|as [\w'-]+ as) (?:than )?(?P<compared>[^.!?]+))"
+    r"|(?P<goto>(?:If (?P<condition>so|not), )?(?:[Ll]et us|[Ww]e shall|[Ww]e must) (?:proceed|return) to scene "
+    r"(?P<scene>[IVXLCDM]+))"
+    r")[.!?]"
+)
+_NAMES = re.compile(r', | and ')
+
+_BOUNDARY = r"(?![\w'-])"
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Returns a regular expression matching any of *words*, with common prefixes factored out, so that
+    matching takes time proportional to the length of the word rather than the number of words.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+    return _node_pattern(trie) if trie else '(?!)'
+
+def _node_pattern(node: dict) -> str:
+    alternatives = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    optional = '' in node
+    if not alternatives:
+        return ''
+    if len(alternatives) == 1 and not optional:
+        return alternatives[0]
+    return f'(?:{"|".join(alternatives)}){"?" if optional else ""}'
+
+# Values are split at "and", which ends every operand but the last, so each part is the words of the operations
+# written before an operand (matched by _OPERATIONS_PREFIX, and split by _OPERATION), then the operand.
+_OPERATORS = {**_BINARY, **_UNARY, 'twice': None}
+_OPERATOR_WORDS = _trie_pattern(_OPERATORS)
+_OPERATION = re.compile(rf"({_OPERATOR_WORDS}) ")
+_OPERATIONS_PREFIX = re.compile(rf"(?:(?:{_OPERATOR_WORDS}) )*")
+# Operations written one after the other, last first, each with its number of operands. None stands for "twice".
+_Operations = list[tuple[Optional[type], int]]
+# Stand for "you" and "me" among operands, which depend on who is speaking.
+_LISTENER = object()
+_SPEAKER = object()
+
+@lru_cache(maxsize=16)
+def _operand_pattern(vocabulary: Vocabulary, names: tuple[str, ...]) -> re.Pattern:
+    """
+    Compiles the regular expression matching a whole operand: a noun phrase, a character, a pronoun or nothing.
+    Each alternative is a named group, so :py:attr:`re.Match.lastgroup` tells which one matched.
+    """
+    adjectives = _trie_pattern(word for kind in KINDS for word in vocabulary.adjectives[kind])
+    alternatives = [
+        # Before noun phrases, so "King Lear" is not read as the noun "King".
+        ('character', _trie_pattern(names)),
+        ('phrase', (
+            f"(?:(?:{_trie_pattern(_ARTICLES)}) )?(?P<adjectives>(?:(?:{adjectives}) )*)"
+            f"(?:(?P<positive>{_trie_pattern(vocabulary.nouns['positive_neutral'])})"
+            f"|(?P<negative>{_trie_pattern(vocabulary.nouns['negative'])}))"
+        )),
+        ('nothing', 'nothing|zero'),
+        ('you', _trie_pattern(_SECOND_PERSON)),
+        ('me', _trie_pattern(_FIRST_PERSON)),
+    ]
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in alternatives))
+
+@lru_cache(maxsize=16)
+def _adjective_pattern(vocabulary: Vocabulary) -> Optional[re.Pattern]:
+    """
+    Matches single adjectives, to count them when some adjective has several words. ``None`` if none has.
+    """
+    words = [word for kind in KINDS for word in vocabulary.adjectives[kind]]
+    if not any(' ' in word for word in words):
+        return None
+    return re.compile(f'(?:{_trie_pattern(words)}){_BOUNDARY}')
+
+class _Parser:
+    def __init__(self, vocabulary: Vocabulary, options: dict) -> None:
+        self.vocabulary = vocabulary
+        self.options = options
+        self.play: Optional[Play] = None
+        self.title: list[str] = []
+        self.in_cast = False
+        self.characters: dict[str, Character] = {}
+        self.stage: list[Character] = []
+        self.act: Optional[RecordedAct] = None
+        self.scene: Optional[tuple[str, str, list[tuple]]] = None
+        self.values: dict[str, Value] = {}
+        # Operands read so far, the operations written before them, and parts of values (both together), by their text.
+        self.operands: dict[str, object] = {}
+        self.operations: dict[str, _Operations] = {}
+        self.parts: dict[str, tuple[object, int, _Operations]] = {}
+        self.lineno = 0
+        self.pattern: Optional[re.Pattern] = None
+        self.adjectives: Optional[re.Pattern] = None
+        self.negative_adjectives = frozenset(vocabulary.adjectives['negative'])
+
+    def error(self, message: str) -> ParseError:
+        return ParseError(f'line {self.lineno}: {message}', self.lineno)
+
+    def feed(self, lines: Iterable[str]) -> None:
+        for raw in lines:
+            self.lineno += 1
+            line = raw.rstrip()
+            if self.play is not None:
+                self.line(line)
+            elif not self.in_cast:
+                # The title, which ends at the first empty line.
+                if line:
+                    self.title.append(line)
+                elif self.title:
+                    self.in_cast = True
+            elif line:
+                name, _, description = line.partition(', ')
+                try:
+                    self.characters[name] = Character(name, description)
+                except ValueError as error:
+                    raise self.error(str(error)) from None
+            else:
+                self.start()
+
+    def start(self) -> None:
+        self.play = Play(' '.join(self.title), vocabulary=self.vocabulary, **self.options)
+        for character in self.characters.values():
+            self.play.add_character(character)
+        self.pattern = _operand_pattern(self.vocabulary, tuple(self.characters))
+        self.adjectives = _adjective_pattern(self.vocabulary)
+
+    def finish(self) -> Play:
+        if self.play is None:
+            self.start()
+        self.end_scene()
+        return self.play
+
+    def end_scene(self) -> None:
+        if self.scene is not None:
+            number, description, statements = self.scene
+            self.act.add_statements(f'scene{len(self.act.statements) + 1}', number, description, statements)
+            self.scene = None
+
+    def line(self, line: str) -> None:
+        if not line:
+            return
+        if line[0] == '[':
+            self.direction(line)
+            return
+        speaker, separator, text = line.partition(': ')
+        if separator:
+            character = self.characters.get(speaker)
+            if character is not None:
+                if self.scene is None:
+                    raise self.error('line outside of a scene')
+                self.sentences(character, text)
+                return
+        word, _, rest = line.partition(' ')
+        number, separator, description = rest.partition(': ')
+        if word == 'Act' and separator:
+            self.end_scene()
+            self.act = RecordedAct(self.play)
+            self.play.add_act(self.act, number, description)
+        elif word == 'Scene' and separator:
+            if self.act is None:
+                raise self.error('scene outside of an act')
+            self.end_scene()
+            self.scene = (number, description, [])
+        else:
+            raise self.error(f'unknown line: {line!r}')
+
+    def direction(self, line: str) -> None:
+        if self.scene is None:
+            raise self.error('stage direction outside of a scene')
+        verb, _, names = line[1:-1].partition(' ')
+        try:
+            characters = tuple(self.characters[name] for name in _NAMES.split(names)) if names else ()
+        except KeyError as error:
+            raise self.error(f'unknown character: {error.args[0]!r}') from None
+        if verb == 'Enter':
+            if not characters:
+                raise self.error('nobody enters')
+            self.stage.extend(characters)
+            self.scene[2].append(('enter', characters))
+        elif verb == 'Exit' or verb == 'Exeunt':
+            for character in characters:
+                if character not in self.stage:
+                    raise self.error(f'{character} is not on stage')
+                self.stage.remove(character)
+            if not characters:
+                self.stage.clear()
+            self.scene[2].append(('exit', characters))
+        else:
+            raise self.error(f'unknown stage direction: {line!r}')
+
+    def listener(self, speaker: Character) -> Character:
+        if len(self.stage) != 2 or speaker not in self.stage:
+            raise self.error(f'cannot tell who {speaker} is talking to')
+        return self.stage[0] if self.stage[1] is speaker else self.stage[1]
+
+    def sentences(self, speaker: Character, text: str) -> None:
+        statements = self.scene[2]
+        listener = None
+        pos = 0
+        end = len(text)
+        while pos < end:
+            match = _SENTENCE.match(text, pos)
+            if match is None:
+                raise self.error(f'unknown sentence: {text[pos:]!r}')
+            pos = match.end()
+            while pos < end and text[pos] == ' ':
+                pos += 1
+            kind = match.lastgroup
+            if kind == 'goto':
+                condition = match['condition']
+                statements.append(('goto', speaker, None if condition is None else condition == 'so', match['scene']))
+                continue
+            if listener is None:
+                listener = self.listener(speaker)
+            if kind == 'set':
+                statements.append(('set', speaker, listener, self.value(match['set'], speaker, listener)))
+            elif kind == 'print':
+                statements.append(('print', speaker, listener, _PRINT[match['print']]))
+            elif kind == 'remember':
+                statements.append(('remember', speaker, listener, self.value(match['remember'], speaker, listener)))
+            elif kind == 'pop':
+                statements.append(('pop', speaker, listener))
+            elif kind == 'input':
+                statements.append(('input', speaker, listener, _INPUT[match['input']]))
+            else:
+                if match['greater'] is not None:
+                    comparison = '>'
+                elif match['less'] is not None:
+                    comparison = '<'
+                elif match['more'] is not None:
+                    comparison = '<' if match['more'] in self.negative_adjectives else '>'
+                else:
+                    comparison = '=='
+                value = self.value(match['compared'], speaker, listener)
+                statements.append(('question', speaker, listener, comparison, value))
+
+    def operand(self, text: str) -> object:
+        """
+        Reads an operand the first time it is seen. Later, it is found in :py:attr:`operands`.
+        """
+        match = self.pattern.fullmatch(text)
+        if match is None:
+            raise self.error(f'cannot read value: {text!r}')
+        kind = match.lastgroup
+        if kind == 'phrase':
+            adjectives = match['adjectives']
+            if self.adjectives is None:
+                count = adjectives.count(' ')
+            else:
+                count = len(self.adjectives.findall(adjectives))
+            operand = -1 << count if match['negative'] is not None else 1 << count
+        elif kind == 'character':
+            operand = self.characters[text]
+        elif kind == 'nothing':
+            operand = 0
+        else:
+            operand = _LISTENER if kind == 'you' else _SPEAKER
+        self.operands[text] = operand
+        return operand
+
+    def operations_of(self, text: str) -> _Operations:
+        """
+        Reads the words of the operations written before an operand the first time they are seen.
+        Later, they are found in :py:attr:`operations`.
+        """
+        words = _OPERATION.findall(text)
+        operations = [(_OPERATORS[word], 2 if word in _BINARY else 1) for word in reversed(words)]
+        self.operations[text] = operations
+        return operations
+
+    def part(self, text: str) -> tuple[object, int, _Operations]:
+        """
+        Reads a part of a value (what is between two "and") the first time it is seen: its operand, the number of
+        binary operations before it, and those operations. Later, it is found in :py:attr:`parts`.
+        """
+        start = _OPERATIONS_PREFIX.match(text).end()
+        piece = text[start:]
+        operand = self.operands.get(piece)
+        if operand is None:
+            operand = self.operand(piece)
+        prefix = text[:start]
+        operations = self.operations.get(prefix)
+        if operations is None:
+            operations = self.operations_of(prefix)
+        part = (operand, len([arity for _, arity in operations if arity == 2]), operations)
+        self.parts[text] = part
+        return part
+
+    def value(self, text: str, speaker: Optional[Character], listener: Optional[Character]) -> Value:
+        value = self.values.get(text)
+        if value is not None:
+            return value
+
+        # Values are in prefix notation, so they are read from the end: operands are pushed, and each
+        # operation takes its operands off the stack. Splitting at "and", which ends every operand but the last,
+        # gives each operand with the operations written before it.
+        parts = text.split(' and ')
+        stack: list = []
+        push = stack.append
+        pop = stack.pop
+        known = self.parts
+        binaries = 0
+        personal = False
+        try:
+            for text_part in reversed(parts):
+                part = known.get(text_part)
+                if part is None:
+                    part = self.part(text_part)
+                token, count, operations = part
+                if token is _LISTENER or token is _SPEAKER:
+                    if speaker is None:
+                        raise self.error(f'nobody to call "you" or "me" in value: {text!r}')
+                    token = listener if token is _LISTENER else speaker
+                    personal = True
+                push(token)
+                binaries += count
+                for operation, arity in operations:
+                    if arity == 2:
+                        push(operation(pop(), pop()))
+                    elif operation is None:
+                        push(product(2, pop()))
+                    else:
+                        push(operation(pop()))
+        except IndexError:
+            raise self.error(f'missing operand in value: {text!r}') from None
+        if len(stack) != 1 or binaries != len(parts) - 1:
+            raise self.error(f'cannot read value: {text!r}')
+        value = stack[0]
+        if not personal:
+            self.values[text] = value
+        return value
+
+def _iter_lines(f: IO[bytes], size: int) -> Iterator[str]:
+    """
+    Reads the lines of a file in chunks, or through a memory map if the file is large.
+    """
+    if size > MMAP_THRESHOLD:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from _split_chunks(data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+    else:
+        yield from _split_chunks(iter(lambda: f.read(CHUNK_SIZE), b''))
+
+def _split_chunks(chunks: Iterable[bytes]) -> Iterator[str]:
+    rest = b''
+    for chunk in chunks:
+        data = rest + chunk
+        end = data.rfind(b'\n') + 1
+        rest = data[end:]
+        yield from data[:end].decode().splitlines()
+    if rest:
+        yield from rest.decode().splitlines()
+
+def parse_lines(lines: Iterable[str], vocabulary: Optional[Vocabulary] = None, **options) -> Play:
+    """
+    Reads a play from its lines, which are read one by one.
+
+    :param lines: The lines of SPL code, with or without line endings.
+    :param vocabulary: The words numbers were written with. Defaults to
+        :py:data:`~pyspl.vocabulary.default_vocabulary`.
+    :type vocabulary: ~pyspl.vocabulary.Vocabulary | None
+    :param options: Passed to :py:class:`~pyspl.Play`, for example ``seed`` or ``optimize``.
+    :rtype: ~pyspl.Play
+
+    :raises ParseError: The code is not SPL that can be read, or is not a valid play.
+    """
+    parser = _Parser(default_vocabulary if vocabulary is None else vocabulary, options)
+    parser.feed(lines)
+    return parser.finish()
+
+def parse(code: str, vocabulary: Optional[Vocabulary] = None, **options) -> Play:
+    """
+    Reads a play from a string of SPL code, such as one returned by :py:meth:`pyspl.Play.code`.
+    Takes the same parameters as :py:func:`parse_lines`.
+
+    :rtype: ~pyspl.Play
+    """
+    return parse_lines(code.splitlines(), vocabulary, **options)
+
+def load(path: Union[str, os.PathLike], vocabulary: Optional[Vocabulary] = None, **options) -> Play:
+    """
+    Reads a play from a file, such as one written by :py:meth:`pyspl.Play.save`.
+    Takes the same parameters as :py:func:`parse_lines`.
+
+    :rtype: ~pyspl.Play
+    """
+    with open(path, 'rb') as f:
+        return parse_lines(_iter_lines(f, os.fstat(f.fileno()).st_size), vocabulary, **options)
+
+def parse_value(
+    text: str,
+    characters: Iterable[Character] = (),
+    vocabulary: Optional[Vocabulary] = None,
+) -> Value:
+    """
+    Reads a single value, such as ``'the sum of a cat and Romeo'``.
+
+    :param characters: The characters the value may name.
+    :raises ParseError: The text is not a value.
+    """
+    parser = _Parser(default_vocabulary if vocabulary is None else vocabulary, {})
+    parser.characters = {character.name: character for character in characters}
+    parser.pattern = _operand_pattern(parser.vocabulary, tuple(parser.characters))
+    parser.adjectives = _adjective_pattern(parser.vocabulary)
+    return parser.value(text, None, None)
@@ -1,10 +1,109 @@
-from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import repeat
+import io
 import os
-from typing import Callable, Union
+import shutil
+import sys
+from typing import IO, AsyncIterator, Callable, Iterable, Iterator, Optional, Sequence, Union
 
+from .cache import RenderCache
 from .character import Character
-from .errors import StageLimitExceeded, CharacterNotOnstage, NotEnoughCharacters
-from .operations import Value, value_as_str
+from .diskcache import DiskCache, fingerprint
+from .errors import StageLimitExceeded, CharacterNotOnstage, InvalidNumberError, NotEnoughCharacters, SceneNotFound
+from .ir import COMPARISONS, CONDITIONS, ENTER, EXIT, GOTO, INPUT, POP, PRINT, QUESTION, REMEMBER, SET, SceneIR
+from .observers import Observer
+from .operations import Seed, Value, _check_value
+from .optimizer import OptimizationStats, eliminate_subexpressions, fold_statements, schedule_stage
+from .vocabulary import Vocabulary, default_vocabulary
+
+# How many lines :py:meth:`Play.save` joins together before each write.
+SAVE_BATCH_LINES = 4096
+# Buffer size (in bytes) of the file opened by :py:meth:`Play.save`.
+SAVE_BUFFER_SIZE = 1 << 20
+
+_TYPE_OPERANDS = {str: 0, int: 1}
+
+STYLES = ('default', 'compact')
+"""
+The styles code can be generated in. ``'default'`` writes numbers with randomly picked words (or words picked
+by the play's ``seed``). ``'compact'`` writes them in as few characters as possible, with the shortest words
+and the shortest combination of operations, which makes the code smaller and faster to write.
+"""
+
+def _is_compact(style: str) -> bool:
+    if style not in STYLES:
+        raise ValueError(f'invalid style: {style!r}')
+    return style == 'compact'
+
+class _NullIR:
+    """
+    Stands in for :py:class:`SceneIR` while a play is validated, so statements are not recorded.
+    """
+    __slots__ = ()
+
+    def append(self, *statement) -> None:
+        pass
+
+    def add_value(self, value: Value) -> int:
+        return 0
+
+    def add_scene(self, scene: 'Scene') -> int:
+        return 0
+
+@dataclass
+class _Context:
+    """
+    The state of one call generating code for a play.
+
+    Everything that changes while scenes run lives here instead of in :py:class:`Play` or :py:class:`Act`,
+    so several threads can generate code for the same play at once.
+    """
+    play: 'Play'
+    stage: dict[Character, None] = field(default_factory=dict)
+    """The characters on stage, in the order they entered. A dict, so checking who is on stage is a lookup."""
+    ir: Union[SceneIR, _NullIR] = field(default_factory=SceneIR)
+    stats: OptimizationStats = field(default_factory=OptimizationStats)
+    compact: bool = False
+    observers: tuple[Observer, ...] = ()
+    """The observers of the play. Each act adds its own."""
+    violations: Optional[list['Violation']] = None
+    """If not ``None``, errors are added to it instead of being raised, and the statements causing them are skipped."""
+    act: Optional['_Act'] = None
+    scene: Optional['Scene'] = None
+    optimize: bool = True
+    """Whether the optimizations chosen for the play are applied to each scene after it runs."""
+
+    def fail(self, error: Exception) -> None:
+        """
+        Raises *error*, or adds it to :py:attr:`violations` when the play is being validated.
+        """
+        if self.violations is None:
+            raise error
+        self.violations.append(Violation(self.act.number, self.scene.number, self.scene.name, error))
+
+# The context of the scene currently running, which is what the methods of Act work on.
+_current_context: ContextVar[Optional[_Context]] = ContextVar('pyspl_context', default=None)
+
+@dataclass
+class Violation:
+    """
+    A rule broken by a play, as found by :py:meth:`Play.validate`.
+
+    This is a data class.
+    """
+    act: str
+    """The number of the act."""
+    scene: str
+    """The number of the scene."""
+    method: str
+    """The name of the scene's method."""
+    error: Exception
+    """The error that generating the code would raise, such as :py:class:`CharacterNotOnstage`."""
+
+    def __str__(self) -> str:
+        return f'Act {self.act}, Scene {self.scene} ({self.method}): {type(self.error).__name__}: {self.error}'
 
 @dataclass
 class _Act:
@@ -15,14 +114,63 @@ class _Act:
     number: str
     description: str
 
+# An act with the scenes it ran and what they recorded.
+_ActScenes = tuple[_Act, list[tuple['Scene', SceneIR]]]
+
 class Play:
-    """A play script in the Shakespeare Programming Language (SPL). All programs made using **PySPL** must use this object."""
-    def __init__(self, description: str) -> None:
+    """
+    A play script in the Shakespeare Programming Language (SPL). All programs made using **PySPL** must use this object.
+
+    :param str description: The title of the play.
+    :param seed: If provided, numbers are always written with the same words, so the generated code is reproducible.
+    :type seed: int | str | None
+    :param bool optimize: Whether to simplify values before writing them, for example by computing operations
+        on numbers. What was saved is in :py:attr:`optimization_stats`. Defaults to ``False``.
+    :param bool reuse_subexpressions: Whether values used several times in a row should be computed once and
+        then passed around through the characters' stacks. What was saved is in :py:attr:`optimization_stats`.
+        Defaults to ``False``.
+    :param bool cache: Whether to keep the code generated for each act and scene (and the function returned by
+        :py:meth:`compile`), and reuse it as long as the act or scene has not changed. See :py:class:`~pyspl.cache.RenderCache`. Defaults to ``False``.
+    :param vocabulary: The words numbers are written with. Defaults to
+        :py:data:`~pyspl.vocabulary.default_vocabulary`.
+    :type vocabulary: ~pyspl.vocabulary.Vocabulary | None
+    :param bool schedule_stage: Whether to rewrite the stage directions of each scene so that every statement
+        has its two characters on stage with as few ``[Enter ...]`` and ``[Exit ...]`` lines as possible.
+        See :py:func:`~pyspl.optimizer.schedule_stage`. Defaults to ``False``.
+    :param disk_cache: Where :py:meth:`code` and :py:meth:`save` keep the code of the whole play, to copy it
+        instead of writing it again the next time (even in another process) if nothing it depends on changed.
+        A path is the directory of a :py:class:`~pyspl.diskcache.DiskCache` with the default size.
+        Without a ``seed``, only the ``'compact'`` style (which does not depend on it) is cached, since every
+        other rendering picks new words. Defaults to ``None``, which is no disk cache.
+    :type disk_cache: ~pyspl.diskcache.DiskCache | str | os.PathLike | None
+    """
+    def __init__(
+        self,
+        description: str,
+        seed: Optional[Seed] = None,
+        optimize: bool = False,
+        reuse_subexpressions: bool = False,
+        cache: bool = False,
+        vocabulary: Optional[Vocabulary] = None,
+        schedule_stage: bool = False,
+        disk_cache: Union[DiskCache, str, os.PathLike, None] = None,
+    ) -> None:
         self.description = description
+        self.seed = seed
+        self.optimize = optimize
+        self.reuse_subexpressions = reuse_subexpressions
+        self.schedule_stage = schedule_stage
+        self.vocabulary = default_vocabulary if vocabulary is None else vocabulary
+        self.render_cache: Optional[RenderCache] = RenderCache() if cache else None
+        if disk_cache is not None and not isinstance(disk_cache, DiskCache):
+            disk_cache = DiskCache(disk_cache)
+        self.disk_cache: Optional[DiskCache] = disk_cache
+        self.optimization_stats = OptimizationStats()
+        """What the optimizer saved the last time code was generated."""
         self._characters: list[Character] = []
-        self._characters_on_stage: list[Character] = []
+        self._characters_by_name: dict[str, Character] = {}
+        self._observers: list[Observer] = []
         self.acts: list[_Act] = []
-        self.lines = []
 
     @property
     def characters(self) -> list[Character]:
@@ -40,24 +188,35 @@ class Play:
         .. note::
 
             This function does **NOT** add the character onto the stage. Use :py:func:`Act.enter` for that purpose.
-        
+
+        :raises ValueError: The play already has another character with that name.
         """
+        existing = self._characters_by_name.get(character.name)
+        if existing is character:
+            return
+        if existing is not None:
+            raise ValueError(f'duplicate character name: {character.name!r}')
         self._characters.append(character)
+        self._characters_by_name[character.name] = character
     
     def character(self, name: str, description: str) -> Character:
         """
         Creates a character and adds it to the play.
 
-        This is equivalent to:
+        If the play already has a character called *name*, that character is returned instead (and
+        *description* is ignored). Otherwise, this is equivalent to:
 
         .. code-block:: python
         
             character = pyspl.Character(name, description)
             play.add_character(character)
 
-        :return: The character created.
+        :return: The character called *name*.
         :rtype: Character
         """
+        character = self._characters_by_name.get(name)
+        if character is not None:
+            return character
         character = Character(name, description)
         self.add_character(character)
         return character
@@ -72,35 +231,395 @@ class Play:
         """
         self.acts.append(_Act(act, number, description))
 
-    def code(self) -> str:
+    def add_observer(self, observer: Observer) -> None:
+        """
+        Notifies *observer* of the events of every act and scene, and of every line, while code is generated
+        for this play. See :py:mod:`pyspl.observers`.
+
+        :param observer: The observer, for example a :py:class:`~pyspl.observers.Profiler`.
+        :type observer: ~pyspl.observers.Observer
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Observer) -> None:
+        """
+        Stops notifying an observer added with :py:meth:`add_observer`.
+
+        :raises ValueError: The observer was not added.
+        """
+        self._observers.remove(observer)
+
+    def _iterscenes(self) -> Iterator[tuple[_Act, 'Scene', SceneIR]]:
+        """
+        Runs every scene of the play and yields what it recorded.
+        """
+        context = _Context(self)
+        for act in self.acts:
+            for scene, ir in act.obj._iterscenes(context):
+                yield act, scene, ir
+        self.optimization_stats = context.stats
+
+    def validate(self) -> list[Violation]:
+        """
+        Checks that code can be generated for this play, without generating it, and returns every rule broken.
+
+        The scenes are run against the stage as usual, but when a statement breaks a rule (too many characters on
+        stage, a character not on stage, a number the vocabulary cannot write...), the error is recorded and
+        the statement is skipped instead of stopping. An exception raised by the scene method itself is recorded
+        too, and ends that scene. No text is written, so this is much faster than :py:meth:`code`.
+
+        Values are checked as they are given, before ``optimize`` would simplify them.
+
+        .. code-block:: python
+
+            for violation in play.validate():
+                print(violation)
+
+        :returns: The violations, in the order they were found. The play is valid if the list is empty.
+        :rtype: list[Violation]
+        """
+        context = _Context(self, ir=_NullIR(), violations=[])
+        token = _current_context.set(context)
+        try:
+            for act in self.acts:
+                context.act = act
+                for scene in act.obj._scene_names:
+                    context.scene = scene
+                    try:
+                        getattr(act.obj, scene.name)()
+                    except Exception as error:
+                        context.fail(error)
+        finally:
+            _current_context.reset(token)
+        return context.violations
+
+    def invalidate(self, act: Optional['Act'] = None, scene: Optional[str] = None) -> None:
+        """
+        Forgets cached code, so it is generated again the next time. This does nothing if the play
+        was not created with ``cache=True``.
+
+        Changes to a scene's method are noticed automatically, but anything else a scene depends on
+        (such as global variables) is not, so the scene has to be invalidated by hand.
+
+        :param act: The act to forget. If not provided, everything is forgotten.
+        :type act: Act | None
+        :param scene: The name of the scene method to forget. If not provided, the whole act is forgotten.
+        :type scene: str | None
+        """
+        if self.render_cache is not None:
+            self.render_cache.invalidate(act, scene)
+
+    def iter_code(self, style: str = 'default') -> Iterator[str]:
+        """
+        Generates SPL code for this play line by line.
+
+        Acts are generated one scene at a time as the lines are consumed, so only one scene
+        is ever held in memory. Joining the lines with ``'\\n'`` gives the same result as :py:meth:`code`.
+
+        :param str style: One of :py:data:`STYLES`. Defaults to ``'default'``.
+        :returns: An iterator over the lines of the play, without line endings.
+        :rtype: Iterator[str]
+        """
+        context = _Context(self, compact=_is_compact(style), observers=tuple(self._observers))
+        if context.observers:
+            yield from _notify_lines(self._iterlines(context), context.observers)
+        else:
+            yield from self._iterlines(context)
+        self.optimization_stats = context.stats
+
+    def _iterlines(self, context: _Context) -> Iterator[str]:
+        yield self.description
+        yield ''
+        for character in self._characters:
+            yield f'{character.name}, {character.description}'
+        yield ''
+        for act in self.acts:
+            yield from act.obj._itercode(context, act.number, act.description)
+            yield ''
+
+    def code(self, workers: Optional[int] = None, style: str = 'default') -> str:
         """
         Generates SPL code for this play.
 
+        With a ``disk_cache``, the code is read from the cache if it is there, and added to it otherwise.
+        Observers are not notified then, and the ``cache`` of acts and scenes is not used.
+
+        :param workers: If more than 1, the scenes are still run one after another, but the acts are written
+            as SPL code by this many worker processes (or threads, on a free-threaded Python build).
+            When a ``seed`` is set, the result is the same as without workers. The caches are not used and
+            observers are not notified in this mode.
+        :type workers: int | None
+        :param str style: One of :py:data:`STYLES`. Defaults to ``'default'``.
         :returns: A piece of SPL code generated for this play.
         :rtype: str
         """
-        self.lines = [self.description, '']
-        for character in self._characters:
-            self.lines.append(f'{character.name}, {character.description}')
-        self.lines.append('')
-        for act in self.acts:
-            lines = act.obj._gencode(act.number, act.description)
-            self.lines.extend(lines)
-            self.lines.append('')
+        if workers is not None and workers > 1:
+            return '\n'.join(self._parallel_lines(workers, _is_compact(style)))
+        if self._uses_disk_cache(style):
+            entry, key, scenes = self._open_disk_cache(style)
+            if entry is not None:
+                with io.TextIOWrapper(entry) as f:
+                    return f.read()[:-1]
+            code = '\n'.join(self._lines_from_scenes(scenes, _is_compact(style)))
+            with self.disk_cache.writer(key) as f:
+                f.write(code + '\n')
+            return code
+        return '\n'.join(self.iter_code(style))
 
-        return '\n'.join(self.lines)
+    def code_size(self, style: str = 'default') -> int:
+        """
+        Returns the size in bytes of the code :py:meth:`code` would generate in *style*, without keeping it in memory.
 
-    def save(self, fn: Union[str, bytes, os.PathLike], mode='w') -> None:
+        Comparing the sizes of both styles shows how much ``'compact'`` saves:
+
+        .. code-block:: python
+
+            saved = 1 - play.code_size('compact') / play.code_size()
+
+        :rtype: int
+        """
+        return sum(len(line.encode()) + 1 for line in self.iter_code(style)) - 1
+
+    def _parallel_lines(self, workers: int, compact: bool) -> list[str]:
+        context = _Context(self, compact=compact)
+        scenes = [
+            [(scene.number, scene.description, ir) for scene, ir in act.obj._iterscenes(context)]
+            for act in self.acts
+        ]
+        self.optimization_stats = context.stats
+
+        lines = [self.description, '']
+        lines.extend(f'{character.name}, {character.description}' for character in self._characters)
+        lines.append('')
+        with _executor(workers) as executor:
+            rendered = executor.map(
+                _render_act,
+                [act.number for act in self.acts],
+                [act.description for act in self.acts],
+                scenes,
+                repeat(self.seed),
+                repeat(self.vocabulary),
+                repeat(compact),
+            )
+            for act_lines in rendered:
+                lines.extend(act_lines)
+                lines.append('')
+        return lines
+
+    def save(self, fn: Union[str, bytes, os.PathLike], mode='w', style: str = 'default') -> None:
         """
         Saves SPL code for this play into _fn_ using the mode specified.
 
+        The code is written while it is being generated, in batches of :py:data:`SAVE_BATCH_LINES` lines,
+        so saving a large play does not need the whole play in memory.
+
+        With a ``disk_cache``, the file is copied from the cache if the play was saved before, and added to the
+        cache otherwise. Every scene is run first to find out, so the statements of the whole play are held in
+        memory, and observers are not notified.
+
         :param str fn: The file to write to.
         :param str mode: The mode to use for writing. Defaults to 'w'.
+        :param str style: One of :py:data:`STYLES`. Defaults to ``'default'``.
+        """
+        compact = _is_compact(style)
+        if not self._uses_disk_cache(style):
+            with open(fn, mode, buffering=SAVE_BUFFER_SIZE) as f:
+                _write_lines(f, self.iter_code(style))
+            return
+        entry, key, scenes = self._open_disk_cache(style)
+        if entry is not None:
+            with entry, open(fn, mode.replace('t', '') + 'b', buffering=SAVE_BUFFER_SIZE) as f:
+                shutil.copyfileobj(entry, f, SAVE_BUFFER_SIZE)
+            return
+        with self.disk_cache.writer(key) as cached, open(fn, mode, buffering=SAVE_BUFFER_SIZE) as f:
+            _write_lines(f, self._lines_from_scenes(scenes, compact), cached)
+
+    async def asave(
+        self,
+        fn: Union[str, bytes, os.PathLike],
+        mode='w',
+        style: str = 'default',
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Same as :py:meth:`save`, but without blocking the event loop. See :py:mod:`pyspl.aio`.
+
+        .. code-block:: python
+
+            await play.asave('play.spl')
+
+        :param executor: What generates the code. Defaults to the event loop's default executor.
+            With a ``disk_cache``, the whole of :py:meth:`save` is run by it instead (by a thread, if it is a
+            process pool).
+        :type executor: concurrent.futures.Executor | None
+        """
+        from .aio import save
+
+        await save(self, fn, mode, style, executor)
+
+    def aiter_code(self, style: str = 'default', executor: Optional[Executor] = None) -> AsyncIterator[str]:
+        """
+        Generates SPL code for this play without blocking the event loop, in batches of
+        :py:data:`SAVE_BATCH_LINES` lines. See :py:mod:`pyspl.aio`.
+
+        .. code-block:: python
+
+            async for chunk in play.aiter_code():
+                await response.write(chunk.encode())
+
+        Joining the batches gives the code of :py:meth:`code` followed by a line ending, as :py:meth:`save`
+        writes it.
+
+        :param str style: One of :py:data:`STYLES`. Defaults to ``'default'``.
+        :param executor: What generates the code. Defaults to the event loop's default executor.
+        :type executor: concurrent.futures.Executor | None
+        :rtype: AsyncIterator[str]
+        """
+        from .aio import iter_code
+
+        return iter_code(self, style, executor)
+
+    def _uses_disk_cache(self, style: str) -> bool:
+        """
+        Whether code in *style* is kept in the disk cache (see the *disk_cache* parameter).
+        """
+        return self.disk_cache is not None and (self.seed is not None or _is_compact(style))
+
+    def _open_disk_cache(self, style: str) -> tuple[Optional[IO[bytes]], str, list[_ActScenes]]:
+        """
+        Runs every scene and opens the entry of the disk cache for what they recorded. Returns the entry
+        (``None`` on a miss), its key, and the scenes of each act, to write the code from on a miss.
+        """
+        context = _Context(self, compact=_is_compact(style))
+        scenes = [(act, list(act.obj._iterscenes(context))) for act in self.acts]
+        self.optimization_stats = context.stats
+        key = fingerprint(self, scenes, context.compact)
+        return self.disk_cache.open(key), key, scenes
+
+    def _lines_from_scenes(self, scenes: list[_ActScenes], compact: bool) -> Iterator[str]:
+        """
+        Writes the code of the play from scenes that have already been run.
+        """
+        yield self.description
+        yield ''
+        for character in self._characters:
+            yield f'{character.name}, {character.description}'
+        yield ''
+        for act, act_scenes in scenes:
+            yield from _render_act(
+                act.number, act.description, [(scene.number, scene.description, ir) for scene, ir in act_scenes],
+                self.seed, self.vocabulary, compact,
+            )
+            yield ''
+
+    def compile(self) -> Callable[..., list[int]]:
+        """
+        Compiles this play into a Python function, where characters are local variables and their stacks are lists.
+
+        This is much faster than running the generated SPL code when the play is used many times.
+        The function takes optional *stdin* and *stdout* streams (which default to :py:data:`sys.stdin`
+        and :py:data:`sys.stdout`) and returns the final value of each character, in the order they were added.
+
+        Compiling a play whose scenes have not changed returns a cached function. With ``cache=True``, the scenes are
+        not even run again until an act or scene changes or is invalidated (see :py:meth:`invalidate`).
+
+        .. code-block:: python
+
+            run = play.compile()
+            run()
+
+        :rtype: typing.Callable[[typing.IO | None, typing.IO | None], list[int]]
+        """
+        if self.render_cache is not None:
+            return self.render_cache.compile(self, self._compile)
+        return self._compile()
+
+    def _compile(self) -> Callable[..., list[int]]:
+        from .compiler import compile_play
+
+        statements = []
+        for act, scene, ir in self._iterscenes():
+            statements.append(('scene', (id(act), id(scene))))
+            statements.extend(ir.statements())
+        return compile_play(statements, self._characters)
+
+    def dumps(self) -> bytes:
+        """
+        Runs every scene and returns the play in a compact binary form, which is much faster to send to other
+        processes than a pickle, and does not need the classes of the acts. See :py:mod:`pyspl.serialize`.
+
+        :rtype: bytes
+        """
+        from .serialize import dumps
+
+        return dumps(self)
+
+    @staticmethod
+    def loads(data: Union[bytes, bytearray, memoryview], **options) -> 'Play':
+        """
+        Makes a play from the data returned by :py:meth:`dumps`, whose acts are :py:class:`RecordedAct` objects.
+        *data* is not copied.
+
+        :param options: Arguments of :py:class:`Play` (such as ``cache``), which replace the stored settings.
+        :rtype: Play
+        :raises ValueError: The data is not a play, or was written by a newer version of **PySPL**.
         """
-        self.code()
-        with open(fn, mode) as f:
-            for line in self.lines:
-                f.write(line + '\n')
+        from .serialize import loads
+
+        return loads(data, **options)
+
+def _executor(workers: int) -> Executor:
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    if is_gil_enabled is not None and not is_gil_enabled():
+        return ThreadPoolExecutor(workers)
+    return ProcessPoolExecutor(workers)
+
+def _render_act(
+    number: str,
+    description: str,
+    scenes: list[tuple[str, str, SceneIR]],
+    seed: Optional[Seed],
+    vocabulary: Vocabulary,
+    compact: bool,
+) -> list[str]:
+    """
+    Writes an act whose scenes have already been run. This is run by the workers of :py:meth:`Play.code`.
+    """
+    lines = [f'Act {number}: {description}']
+    for scene_number, scene_description, ir in scenes:
+        lines.append(f'Scene {scene_number}: {scene_description}')
+        lines.extend(ir.render(seed, vocabulary, compact))
+    return lines
+
+def _notify_lines(lines: Iterable[str], observers: tuple[Observer, ...]) -> Iterator[str]:
+    for line in lines:
+        for observer in observers:
+            observer.line(line)
+        yield line
+
+def _iter_chunks(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Joins *lines* in batches of :py:data:`SAVE_BATCH_LINES` lines, each line followed by a line ending.
+    """
+    batch: list[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= SAVE_BATCH_LINES:
+            batch.append('')
+            yield '\n'.join(batch)
+            batch = []
+    if batch:
+        batch.append('')
+        yield '\n'.join(batch)
+
+def _write_lines(f: IO[str], lines: Iterable[str], *copies: IO[str]) -> None:
+    """
+    Writes *lines* to *f*, and to each of *copies*, each followed by a line ending, with one write per batch of lines.
+    """
+    files = (f, *copies)
+    for chunk in _iter_chunks(lines):
+        for out in files:
+            out.write(chunk)
 
 
 @dataclass
@@ -143,7 +662,8 @@ class Act:
     def __init__(self, play: Play):
         self._play = play
         self._scene_names: list[Scene] = []
-        self._lines: list[str] = []
+        self._jump_table: dict[str, Scene] = {}
+        self._observers: list[Observer] = []
     
     def add_scene(self, func: Callable, number: str, description: str) -> None:
         """
@@ -153,7 +673,27 @@ class Act:
         :param str number: A roman numeral representing the number of the scene. 
         :param str description: The description of the scene. Must end with a period (AKA a full stop) (``.``).
         """
-        self._scene_names.append(Scene(func.__name__, number=number, description=description))
+        scene = Scene(func.__name__, number=number, description=description)
+        self._scene_names.append(scene)
+        self._jump_table.setdefault(number, scene)
+        self._jump_table.setdefault(func.__name__, scene)
+
+    def add_observer(self, observer: Observer) -> None:
+        """
+        Notifies *observer* of the events of this act and its scenes, and of its lines, while code is generated.
+        See :py:meth:`Play.add_observer` to observe every act.
+
+        :type observer: ~pyspl.observers.Observer
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Observer) -> None:
+        """
+        Stops notifying an observer added with :py:meth:`add_observer`.
+
+        :raises ValueError: The observer was not added.
+        """
+        self._observers.remove(observer)
 
     def enter(self, *characters: Character):
         """
@@ -164,11 +704,12 @@ class Act:
 
         :raises StageLimitExceeded: There are too many characters on stage.
         """
-        if len(characters) + len(self._play._characters_on_stage) > 2:
-            raise StageLimitExceeded('character limit onstage exceeded')
+        context = self._context()
+        if len(characters) + len(context.stage) > 2:
+            return context.fail(StageLimitExceeded('character limit onstage exceeded'))
         
-        self._play._characters_on_stage.extend(characters)
-        self._lines.append(f'[Enter {" and ".join(map(lambda c: str(c), characters))}]')
+        context.stage.update(dict.fromkeys(characters))
+        context.ir.append(ENTER, *characters)
     
     def exit(self, *characters: Character):
         """
@@ -179,21 +720,18 @@ class Act:
 
         :raises CharacterNotOnstage: The character who is trying to exit is not onstage.
         """
+        context = self._context()
         for character in characters:
-            if character not in self._play._characters_on_stage:
-                raise CharacterNotOnstage(f'character not on stage: {character}')
+            if character not in context.stage:
+                return context.fail(CharacterNotOnstage(f'character not on stage: {character}'))
         
         if len(characters) == 0:
-            self._play._characters_on_stage = []
-            self._lines.append('[Exeunt]')
-        elif len(characters) == 1:
-            self._play._characters_on_stage.remove(characters[0])
-            self._lines.append(f'[Exit {characters[0]}]')
+            context.stage.clear()
         else:
             for character in characters:
-                self._play._characters_on_stage.remove(character)
-            
-            self._lines.append(f'[Exeunt {" and ".join(map(lambda c: str(c), characters))}]')
+                del context.stage[character]
+
+        context.ir.append(EXIT, *characters)
         
     def set(self, target: Character, value: Value):
         """
@@ -206,15 +744,19 @@ class Act:
         :raises CharacterNotOnstage: The target is not onstage.
         :raises NotEnoughCharacters: There is only one character onstage. 
         """
-        characters_onstage = self._play._characters_on_stage
+        context = self._context()
+        characters_onstage = context.stage
         if target not in characters_onstage:
-            raise CharacterNotOnstage('tried to set value of a character not on stage')
+            return context.fail(CharacterNotOnstage('tried to set value of a character not on stage'))
         if len(characters_onstage) < 2:
-            raise NotEnoughCharacters('unable to set character value: only one character on stage')
+            return context.fail(NotEnoughCharacters('unable to set character value: only one character on stage'))
         
-        setter = self._get_opposite_character(target)
+        if not self._valid_value(context, value):
+            return
+
+        setter = self._get_opposite_character(target, context)
 
-        self._lines.append(f'{setter}: You are {value_as_str(value)}!')
+        context.ir.append(SET, setter, target, context.ir.add_value(value))
 
     def print(self, target: Character, type: type[str|int]=str):
         """
@@ -223,22 +765,19 @@ class Act:
         :param Character target: The character being printed.
         :param type: The type to print. Defaults to ``str``.
         """
-        characters_onstage = self._play._characters_on_stage
+        context = self._context()
+        characters_onstage = context.stage
         if target not in characters_onstage:
-            raise CharacterNotOnstage('tried to print value of a character not on stage')
+            return context.fail(CharacterNotOnstage('tried to print value of a character not on stage'))
         if len(characters_onstage) < 2:
-            raise NotEnoughCharacters('unable to print character value: only one character on stage')
+            return context.fail(NotEnoughCharacters('unable to print character value: only one character on stage'))
         
-        printer = self._get_opposite_character(target)
+        printer = self._get_opposite_character(target, context)
         
-        if type == str:
-            line = 'Speak your mind'
-        elif type == int:
-            line = 'Open your heart'
-        else:
-            raise TypeError('invalid type to print')
+        if type not in _TYPE_OPERANDS:
+            return context.fail(TypeError('invalid type to print'))
 
-        self._lines.append(f'{printer}: {line}!')
+        context.ir.append(PRINT, printer, target, _TYPE_OPERANDS[type])
 
     def input(self, target: Character, type: type[str|int]=str):
         """
@@ -247,22 +786,19 @@ class Act:
         :param Character target: The character being set.
         :param type: The type to receive. Defaults to ``str``.
         """
-        characters_onstage = self._play._characters_on_stage
+        context = self._context()
+        characters_onstage = context.stage
         if target not in characters_onstage:
-            raise CharacterNotOnstage('tried to set value of a character not on stage')
+            return context.fail(CharacterNotOnstage('tried to set value of a character not on stage'))
         if len(characters_onstage) < 2:
-            raise NotEnoughCharacters('unable to set character value: only one character on stage')
+            return context.fail(NotEnoughCharacters('unable to set character value: only one character on stage'))
         
-        setter = self._get_opposite_character(target)
+        setter = self._get_opposite_character(target, context)
 
-        if type == str:
-            line = 'Open your mind'
-        elif type == int:
-            line = 'Listen to your heart'
-        else:
-            raise TypeError('invalid type to print')
+        if type not in _TYPE_OPERANDS:
+            return context.fail(TypeError('invalid type to print'))
         
-        self._lines.append(f'{setter}: {line}!')
+        context.ir.append(INPUT, setter, target, _TYPE_OPERANDS[type])
 
     def remember(self, target: Character, value: Value):
         """
@@ -272,15 +808,19 @@ class Act:
         :param value: The value to push.
         :type value: int | Character | Operation
         """
-        characters_onstage = self._play._characters_on_stage
+        context = self._context()
+        characters_onstage = context.stage
         if target not in characters_onstage:
-            raise CharacterNotOnstage('tried to push to the stack of a character not on stage')
+            return context.fail(CharacterNotOnstage('tried to push to the stack of a character not on stage'))
         if len(characters_onstage) < 2:
-            raise NotEnoughCharacters('unable to push to the stack of character: only one character on stage')
+            return context.fail(NotEnoughCharacters('unable to push to the stack of character: only one character on stage'))
         
-        setter = self._get_opposite_character(target)
+        if not self._valid_value(context, value):
+            return
+
+        setter = self._get_opposite_character(target, context)
 
-        self._lines.append(f'{setter}: Remember {value_as_str(value)}!')
+        context.ir.append(REMEMBER, setter, target, context.ir.add_value(value))
 
     def pop(self, target: Character):
         """
@@ -288,34 +828,238 @@ class Act:
 
         :param Character target: The character to be modified.
         """
-        characters_onstage = self._play._characters_on_stage
+        context = self._context()
+        characters_onstage = context.stage
         if target not in characters_onstage:
-            raise CharacterNotOnstage('tried to pop from the stack of a character not on stage')
+            return context.fail(CharacterNotOnstage('tried to pop from the stack of a character not on stage'))
         if len(characters_onstage) < 2:
-            raise NotEnoughCharacters('unable to pop from the stack of character: only one character on stage')
+            return context.fail(NotEnoughCharacters('unable to pop from the stack of character: only one character on stage'))
         
-        setter = self._get_opposite_character(target)
+        setter = self._get_opposite_character(target, context)
 
-        self._lines.append(f'{setter}: Recall yourself!')
+        context.ir.append(POP, setter, target)
 
-    def _get_opposite_character(self, character: Character):
-        characters_onstage = self._play._characters_on_stage
-        first_item = characters_onstage[0]
-        if first_item == character:
-            c = characters_onstage[1] # The second item (index=1) is now the first item (index=0).
-        else:
-            c = first_item
+    def ask(self, target: Character, comparison: str, value: Value):
+        """
+        Asks whether the value of a character compares to a value in some way. The answer is used by the next
+        :py:meth:`goto` with a *condition*.
 
-        return c
+        .. code-block:: python
 
-    def _gencode(self, number: str, description: str):
-        self._lines = [f'Act {number}: {description}']
-        for scene in self._scene_names:
-            self._lines.append(f'Scene {scene.number}: {scene.description}')
-            scene_func = getattr(self, scene.name)
+            self.ask(romeo, '<', 10)    # Juliet: Are you worse than ...?
+            self.goto('II', True)       # Juliet: If so, let us proceed to scene II.
+
+        :param Character target: The character whose value is compared.
+        :param str comparison: One of ``'>'``, ``'<'`` and ``'=='``. Use a *condition* of ``False`` in
+            :py:meth:`goto` for the opposite comparisons.
+        :param value: The value to compare to.
+        :type value: int | Character | Operation
+
+        :raises CharacterNotOnstage: The target is not onstage.
+        :raises NotEnoughCharacters: There is only one character onstage.
+        """
+        context = self._context()
+        characters_onstage = context.stage
+        if target not in characters_onstage:
+            return context.fail(CharacterNotOnstage('tried to ask about a character not on stage'))
+        if len(characters_onstage) < 2:
+            return context.fail(NotEnoughCharacters('unable to ask about character: only one character on stage'))
+        if comparison not in COMPARISONS:
+            return context.fail(ValueError(f'invalid comparison: {comparison!r}'))
+
+        if not self._valid_value(context, value):
+            return
+
+        asker = self._get_opposite_character(target, context)
+
+        context.ir.append(QUESTION, asker, target, context.ir.add_value(value) << 2 | COMPARISONS.index(comparison))
+
+    def goto(self, scene: Union[str, Callable], condition: Optional[bool] = None):
+        """
+        Jumps to a scene of this act, which is how loops are written. The scenes added with
+        :py:meth:`add_scene` are the possible targets, and jumping to a scene that is not one of them is an error.
+
+        The characters on stage when jumping should be the ones on stage at the start of the target scene,
+        since scenes are checked in the order they were added.
+
+        :param scene: The number of the scene (such as ``'II'``), or its method.
+        :type scene: str | typing.Callable
+        :param condition: If ``True``, only jumps if the answer to the last question asked with :py:meth:`ask` was yes.
+            If ``False``, only jumps if it was no. If ``None`` (the default), always jumps.
+        :type condition: bool | None
+
+        :raises SceneNotFound: The act has no such scene.
+        :raises NotEnoughCharacters: Nobody is onstage to say it.
+        """
+        context = self._context()
+        target = self._jump_table.get(scene if isinstance(scene, str) else getattr(scene, '__name__', None))
+        if target is None:
+            return context.fail(SceneNotFound(f'no scene to jump to: {scene!r}'))
+        if not context.stage:
+            return context.fail(NotEnoughCharacters('unable to jump to a scene: nobody on stage'))
+        if condition not in CONDITIONS:
+            return context.fail(ValueError(f'invalid condition: {condition!r}'))
+
+        speaker = next(iter(context.stage))
+
+        context.ir.append(GOTO, speaker, None, context.ir.add_scene(target) << 2 | CONDITIONS.index(condition))
+
+    def _context(self) -> _Context:
+        context = _current_context.get()
+        if context is None or context.play is not self._play:
+            raise RuntimeError('acts can only be used from a scene, while code for their play is generated')
+        return context
+
+    def _valid_value(self, context: _Context, value: Value) -> bool:
+        """
+        Returns whether *value* can be written with the play's vocabulary. Values are only checked while the play
+        is being validated, and an invalid one is added to the violations. Otherwise, writing it raises the error.
+        """
+        if context.violations is None:
+            return True
+        try:
+            _check_value(value, self._play.vocabulary)
+        except (InvalidNumberError, TypeError) as error:
+            context.fail(error)
+            return False
+        return True
+
+    def _get_opposite_character(self, character: Character, context: _Context):
+        for c in context.stage:
+            if c is not character:
+                return c
+
+    def _run_scene(self, context: _Context, scene: Scene) -> SceneIR:
+        context.ir = SceneIR()
+        stage = tuple(context.stage)
+        scene_func = getattr(self, scene.name)
+        token = _current_context.set(context)
+        try:
             scene_func()
+        finally:
+            _current_context.reset(token)
+        ir, context.ir = context.ir, SceneIR()
+        if not context.optimize:
+            return ir
+        if self._play.schedule_stage:
+            ir = schedule_stage(ir, stage, context.stats)
+        if self._play.optimize:
+            fold_statements(ir, context.stats)
+        if self._play.reuse_subexpressions:
+            ir = eliminate_subexpressions(ir, context.stats)
+        return ir
 
-        return self._lines
+    def _iterscenes(self, context: _Context) -> Iterator[tuple[Scene, SceneIR]]:
+        for scene in self._scene_names:
+            yield scene, self._run_scene(context, scene)
 
-        
+    def _render_scene(
+        self,
+        context: _Context,
+        scene: Scene,
+        on_value: Optional[Callable[[Value, str, float], None]] = None,
+    ) -> Iterator[str]:
+        yield f'Scene {scene.number}: {scene.description}'
+        ir = self._run_scene(context, scene)
+        yield from ir.render(self._play.seed, self._play.vocabulary, context.compact, on_value)
+
+    def _itercode(self, context: _Context, number: str, description: str) -> Iterator[str]:
+        if context.observers or self._observers:
+            yield from self._observed_itercode(context, number, description)
+            return
+        if self._play.render_cache is not None:
+            yield from self._play.render_cache.render_act(context, self, number, description)
+            return
+        yield f'Act {number}: {description}'
+        for scene in self._scene_names:
+            yield from self._render_scene(context, scene)
+
+    def _observed_itercode(self, context: _Context, number: str, description: str) -> Iterator[str]:
+        """
+        Same as :py:meth:`_itercode`, but notifies the observers. The cache is only used per scene,
+        so that every scene is reported.
+        """
+        observers = context.observers + tuple(self._observers)
+
+        def on_value(value: Value, code: str, seconds: float) -> None:
+            for observer in observers:
+                observer.value(value, code, seconds)
+
+        cache = self._play.render_cache
+        for observer in observers:
+            observer.act_start(self, number, description)
+        lines = _notify_lines([f'Act {number}: {description}'], self._observers)
+        yield from lines
+        for scene in self._scene_names:
+            for observer in observers:
+                observer.scene_start(self, scene)
+            if cache is not None:
+                lines = cache.render_scene(context, self, scene, on_value)
+            else:
+                lines = self._render_scene(context, scene, on_value)
+            yield from _notify_lines(lines, self._observers) if self._observers else lines
+            for observer in observers:
+                observer.scene_end(self, scene)
+        for observer in observers:
+            observer.act_end(self)
+
+class RecordedAct(Act):
+    """
+    An act whose scenes replay statements recorded beforehand, instead of running code of their own.
+
+    Acts read by :py:mod:`pyspl.parse` and loaded by :py:meth:`Play.loads` are recorded acts.
+    """
+    def __init__(self, play: Play) -> None:
+        super().__init__(play)
+        self.statements: dict[str, Sequence[tuple]] = {}
+        """
+        The statements of each scene, by the name of its method, in the form of :py:meth:`pyspl.ir.SceneIR.statements`,
+        except that jumps give the number or name of their scene. Changing them does not invalidate the cache of the
+        play (see :py:meth:`Play.invalidate`).
+        """
+
+    def add_statements(self, name: str, number: str, description: str, statements: Sequence[tuple]) -> None:
+        """
+        Adds a scene that replays *statements*. Its method is called *name*.
+
+        :raises ValueError: The act already has a scene or an attribute called *name*.
+        """
+        if name in self.statements or hasattr(type(self), name):
+            raise ValueError(f'duplicate scene name: {name!r}')
+        self.statements[name] = statements
+        self.add_scene(self._scene(name), number, description)
+
+    def __getattr__(self, name: str) -> Callable[[], None]:
+        # Scenes are looked up by name like methods. Each lookup gives a new function, with the same code.
+        if name not in self.__dict__.get('statements', ()):
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        return self._scene(name)
+
+    def _scene(self, name: str) -> Callable[[], None]:
+        def scene() -> None:
+            self._replay(self.statements[name])
+
+        scene.__name__ = name
+        return scene
 
+    def _replay(self, statements: Iterable[tuple]) -> None:
+        for statement in statements:
+            op = statement[0]
+            if op == 'set':
+                self.set(statement[2], statement[3])
+            elif op == 'print':
+                self.print(statement[2], statement[3])
+            elif op == 'enter':
+                self.enter(*statement[1])
+            elif op == 'exit':
+                self.exit(*statement[1])
+            elif op == 'remember':
+                self.remember(statement[2], statement[3])
+            elif op == 'pop':
+                self.pop(statement[2])
+            elif op == 'input':
+                self.input(statement[2], statement[3])
+            elif op == 'question':
+                self.ask(statement[2], statement[3], statement[4])
+            else:
+                self.goto(statement[3], statement[2])
@@ -0,0 +1,479 @@
+"""
+A compact binary form of plays, to send them to other processes or keep them on disk.
+
+.. code-block:: python
+
+    import pyspl
+
+    data = play.dumps()
+    copy = pyspl.Play.loads(data)
+    assert copy.code() == play.code()
+
+Every scene is run once by :py:meth:`pyspl.Play.dumps`, and what it recorded is stored instead of the scene
+method, so the loaded play has :py:class:`~pyspl.RecordedAct` acts that replay the same statements
+(the optimizations of the play are applied again when its code is generated). Observers and caches are not
+stored.
+
+The data starts with ``SPLPLAY`` and the version of the format. Every string (titles, descriptions, names and
+words) is stored once in a table and referred to by its index, and the numbers describing the play are
+varints (unsigned LEB128). Then come the settings of the play, its characters, and its acts with their scenes.
+The statements of a scene are stored column by column, in the form of :py:class:`~pyspl.ir.SceneIR` but with
+the play's character ids: the opcodes, the two characters and the small operands of every statement,
+then the values in postfix order and the numbers they use. Each column of numbers has the narrowest width its
+numbers fit in.
+
+:py:meth:`pyspl.Play.loads` does not copy *data*: strings are decoded from slices of it, the columns are read in
+place, and the statements of a scene are only decoded when the scene first runs. Data that is changed before
+then should be copied first.
+"""
+from array import array
+import sys
+from typing import Iterator, Optional, Sequence, Union
+
+from .character import Character
+from .ir import (
+    COMPARISONS, CONDITIONS, ENTER, EXIT, GOTO, INPUT, OP_NAMES, POP, PRINT, QUESTION, REMEMBER, SET, SceneIR,
+)
+from .operations import Value, cube, difference, factorial, product, quotient, remainder, square, squareroot, sum
+from .play import Play, RecordedAct, _Context
+from .vocabulary import KINDS, Vocabulary, default_vocabulary
+
+_MAGIC = b'SPLPLAY'
+_VERSION = 1
+
+# Settings of the play, in the flags byte.
+_OPTIMIZE = 1
+_REUSE_SUBEXPRESSIONS = 2
+_SCHEDULE_STAGE = 4
+
+# Seeds: a tag, then the seed.
+_NO_SEED = 0
+_POSITIVE_SEED = 1
+_NEGATIVE_SEED = 2
+_STRING_SEED = 3
+
+# The tags of values. Numbers and characters take the next item of the numbers column, and numbers too large
+# for it are stored separately.
+_NUMBER = 0
+_CHARACTER = 1
+_LARGE_NUMBER = 2
+_OPERATIONS = (sum, difference, product, quotient, remainder, square, cube, squareroot, factorial)
+_OPERATION_TAGS = {operation: 3 + i for i, operation in enumerate(_OPERATIONS)}
+# The operations with this tag or a greater one have one operand.
+_SQUARE = _OPERATION_TAGS[square]
+
+_TYPES = (str, int)
+
+def _limits(typecode: str, signed: bool) -> tuple[str, int, int]:
+    bits = 8 * array(typecode).itemsize
+    return (typecode, -(1 << bits - 1), (1 << bits - 1) - 1) if signed else (typecode, 0, (1 << bits) - 1)
+
+# The typecodes of columns, narrowest first, with the range of numbers each holds.
+_UNSIGNED = tuple(_limits(typecode, False) for typecode in 'BHI')
+_SIGNED = tuple(_limits(typecode, True) for typecode in 'bhiq')
+
+# The encoding of the varints below 128, which are most of them.
+_SMALL = [bytes((n,)) for n in range(128)]
+
+def _varint(n: int) -> bytes:
+    if n < 128:
+        return _SMALL[n]
+    out = bytearray()
+    while n >= 128:
+        out.append(n & 127 | 128)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+def _read_varint(data: memoryview, pos: int) -> tuple[int, int]:
+    """
+    Returns the varint at *pos* in *data*, and the position after it.
+    """
+    byte = data[pos]
+    pos += 1
+    n = byte & 127
+    shift = 7
+    while byte & 128:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 127) << shift
+        shift += 7
+    return n, pos
+
+def _column(numbers: Sequence[int], typecodes: tuple[tuple[str, int, int], ...]) -> bytes:
+    """
+    Returns the typecode of the narrowest column *numbers* fit in, followed by the column (little-endian).
+    """
+    low = min(numbers, default=0)
+    high = max(numbers, default=0)
+    # The widest typecode if none fits, so array() raises OverflowError.
+    typecode = next((t for t, lowest, highest in typecodes if lowest <= low and high <= highest), typecodes[-1][0])
+    column = array(typecode, numbers)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return typecode.encode() + column.tobytes()
+
+class _Writer:
+    def __init__(self, play: Play) -> None:
+        self.strings: dict[str, int] = {}
+        self.out = bytearray()
+        self.character_ids = {id(c): i for i, c in enumerate(play.characters)}
+
+    def string(self, s: str) -> None:
+        sid = self.strings.get(s)
+        if sid is None:
+            sid = self.strings[s] = len(self.strings)
+        self.out += _varint(sid)
+
+    def character_id(self, character: Character) -> int:
+        character_id = self.character_ids.get(id(character))
+        if character_id is None:
+            raise ValueError(f'character was not added to the play: {character.name!r}')
+        return character_id
+
+    def scene(self, ir: SceneIR, scene_indexes: dict[int, int]) -> None:
+        code = ir.code
+        ops = code[0::4]
+        # Indexes into this list are the character ids of the scene, where -1 (no character) is the last item.
+        # Character ids are stored plus one, so that 0 is no character.
+        ids = [self.character_id(character) + 1 for character in ir.characters]
+        ids.append(0)
+        operands = bytearray(len(ops))
+        tags = bytearray()
+        numbers: list[int] = []
+        large_numbers: list[int] = []
+        lowest, highest = _SIGNED[-1][1:]
+
+        character_ids = self.character_ids
+
+        def add_value(value: Value) -> None:
+            tag = _OPERATION_TAGS.get(type(value))
+            if tag is not None:
+                if tag < _SQUARE:
+                    add_value(value.a)
+                    add_value(value.b)
+                else:
+                    add_value(value.x)
+                tags.append(tag)
+            elif isinstance(value, int):
+                if lowest <= value <= highest:
+                    tags.append(_NUMBER)
+                    numbers.append(value)
+                else:
+                    tags.append(_LARGE_NUMBER)
+                    large_numbers.append(value)
+            elif id(value) in character_ids:
+                tags.append(_CHARACTER)
+                numbers.append(character_ids[id(value)])
+            elif isinstance(value, Character):
+                # Not a character of the play, which this raises for.
+                self.character_id(value)
+            else:
+                raise TypeError(f'invalid value: {value!r}')
+
+        values = ir.values
+        value_count = 0
+        targets = []
+        for i, (op, operand) in enumerate(zip(ops, code[3::4])):
+            if op == SET or op == REMEMBER:
+                add_value(values[operand])
+                value_count += 1
+            elif op == PRINT or op == INPUT:
+                operands[i] = operand
+            elif op == QUESTION:
+                operands[i] = operand & 3
+                add_value(values[operand >> 2])
+                value_count += 1
+            elif op == GOTO:
+                operands[i] = operand & 3
+                targets.append(scene_indexes[id(values[operand >> 2])])
+        # The scenes jumped to come after the numbers of the values.
+        numbers.extend(targets)
+
+        body = bytearray(_varint(len(ops)))
+        body += bytes(ops.tolist())
+        body += _column([ids[c] for c in code[1::4]] + [ids[c] for c in code[2::4]], _UNSIGNED)
+        body += operands
+        body += _varint(value_count)
+        body += _varint(len(tags))
+        body += tags
+        body += _varint(len(numbers))
+        body += _column(numbers, _SIGNED)
+        body += _varint(len(large_numbers))
+        for n in large_numbers:
+            encoded = n.to_bytes((n.bit_length() + 8) // 8, 'little', signed=True)
+            body += _varint(len(encoded))
+            body += encoded
+        self.out += _varint(len(body))
+        self.out += body
+
+def dumps(play: Play) -> bytes:
+    """
+    Runs every scene of *play*, and returns the play with what its scenes recorded in the binary form.
+    This is what :py:meth:`pyspl.Play.dumps` does.
+
+    :raises TypeError: A value is an operation of a class not defined by **PySPL**.
+    :raises ValueError: A character was not added to the play.
+    """
+    writer = _Writer(play)
+    out = writer.out
+    writer.string(play.description)
+    seed = play.seed
+    if seed is None:
+        out += _SMALL[_NO_SEED]
+    elif isinstance(seed, str):
+        out += _SMALL[_STRING_SEED]
+        writer.string(seed)
+    else:
+        out += _SMALL[_POSITIVE_SEED if seed >= 0 else _NEGATIVE_SEED]
+        out += _varint(abs(seed))
+    out += _SMALL[
+        _OPTIMIZE * play.optimize
+        | _REUSE_SUBEXPRESSIONS * play.reuse_subexpressions
+        | _SCHEDULE_STAGE * play.schedule_stage
+    ]
+    if play.vocabulary is default_vocabulary:
+        out += _SMALL[0]
+    else:
+        out += _SMALL[1]
+        for table in (play.vocabulary.nouns, play.vocabulary.adjectives):
+            for kind in KINDS:
+                out += _varint(len(table[kind]))
+                for word in table[kind]:
+                    writer.string(word)
+
+    out += _varint(len(play.characters))
+    for character in play.characters:
+        writer.string(character.name)
+        writer.string(character.description)
+
+    # The scenes are recorded as they were written, since the loaded play optimizes them itself.
+    context = _Context(play, optimize=False)
+    out += _varint(len(play.acts))
+    for act in play.acts:
+        scenes = list(act.obj._iterscenes(context))
+        scene_indexes = {id(scene): i for i, (scene, _) in enumerate(scenes)}
+        writer.string(act.number)
+        writer.string(act.description)
+        out += _varint(len(scenes))
+        for scene, ir in scenes:
+            writer.string(scene.name)
+            writer.string(scene.number)
+            writer.string(scene.description)
+            writer.scene(ir, scene_indexes)
+
+    header = bytearray(_MAGIC)
+    header += _varint(_VERSION)
+    header += _varint(len(writer.strings))
+    for s in writer.strings:
+        encoded = s.encode()
+        header += _varint(len(encoded))
+        header += encoded
+    return bytes(header + out)
+
+class _Reader:
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data: memoryview, pos: int = 0) -> None:
+        self.data = data
+        self.pos = pos
+
+    def varint(self) -> int:
+        n, self.pos = _read_varint(self.data, self.pos)
+        return n
+
+    def take(self, size: int) -> memoryview:
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError('truncated play data')
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def column(self, length: int) -> Sequence[int]:
+        """
+        Reads a column of *length* numbers written by :py:func:`_column`, in place if possible.
+        """
+        typecode = chr(self.data[self.pos])
+        self.pos += 1
+        if typecode not in 'BHIbhiq':
+            raise ValueError(f'invalid column in play data: {typecode!r}')
+        data = self.take(length * array(typecode).itemsize)
+        if sys.byteorder == 'little' or typecode in 'Bb':
+            return data.cast(typecode)
+        column = array(typecode)
+        column.frombytes(data)
+        column.byteswap()
+        return column
+
+class _LazyStatements(Sequence[tuple]):
+    """
+    The statements of a loaded scene, decoded from *body* when first used.
+    """
+    __slots__ = ('_body', '_characters', '_scene_names', '_statements', '_length')
+
+    def __init__(self, body: memoryview, characters: list[Character], scene_names: list[str]) -> None:
+        self._body = body
+        self._characters = characters
+        self._scene_names = scene_names
+        self._statements: Optional[list[tuple]] = None
+        self._length = _read_varint(body, 0)[0]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        return self._decoded()[index]
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self._decoded())
+
+    def __reduce__(self):
+        return tuple, (tuple(self),)
+
+    def _decoded(self) -> list[tuple]:
+        if self._statements is None:
+            try:
+                self._statements = _decode(_Reader(self._body), self._characters, self._scene_names)
+            except (IndexError, StopIteration):
+                raise ValueError('truncated play data') from None
+            self._body = None
+        return self._statements
+
+def _decode(reader: _Reader, characters: list[Character], scene_names: list[str]) -> list[tuple]:
+    """
+    Decodes the statements of a scene, in the form of :py:meth:`pyspl.ir.SceneIR.statements`.
+    """
+    count = reader.varint()
+    ops = reader.take(count)
+    ids = reader.column(2 * count)
+    operands = reader.take(count)
+    value_count = reader.varint()
+    tags = reader.take(reader.varint())
+    numbers = iter(reader.column(reader.varint()).tolist())
+    large_numbers = iter([
+        int.from_bytes(reader.take(reader.varint()), 'little', signed=True) for _ in range(reader.varint())
+    ])
+
+    # The values are in postfix order, so they are all built with one stack, which is left holding them.
+    stack: list = []
+    push = stack.append
+    pop = stack.pop
+    for tag in tags:
+        if tag == _NUMBER:
+            push(next(numbers))
+        elif tag == _CHARACTER:
+            push(characters[next(numbers)])
+        elif tag == _LARGE_NUMBER:
+            push(next(large_numbers))
+        elif tag < _SQUARE:
+            b = pop()
+            stack[-1] = _OPERATIONS[tag - 3](stack[-1], b)
+        else:
+            stack[-1] = _OPERATIONS[tag - 3](stack[-1])
+    if len(stack) != value_count:
+        raise ValueError('invalid values in play data')
+    values = iter(stack)
+
+    # Character ids are stored plus one, so that 0 is no character.
+    speakers = [None, *characters]
+    statements = []
+    append = statements.append
+    for op, first_id, second_id, operand in zip(ops, ids[:count], ids[count:], operands):
+        first = speakers[first_id]
+        second = speakers[second_id]
+        if op == SET or op == REMEMBER:
+            append((OP_NAMES[op], first, second, next(values)))
+        elif op == PRINT or op == INPUT:
+            append((OP_NAMES[op], first, second, _TYPES[operand]))
+        elif op == ENTER or op == EXIT:
+            append((OP_NAMES[op], tuple(c for c in (first, second) if c is not None)))
+        elif op == QUESTION:
+            append(('question', first, second, COMPARISONS[operand], next(values)))
+        elif op == GOTO:
+            append(('goto', first, CONDITIONS[operand], scene_names[next(numbers)]))
+        elif op == POP:
+            append(('pop', first, second))
+        else:
+            raise ValueError(f'invalid opcode in play data: {op}')
+    return statements
+
+def _unique_names(act: RecordedAct, names: list[str], numbers: list[str]) -> list[str]:
+    """
+    Returns *names*, changed where needed so that each is a new attribute of *act* that is not also the number of a
+    scene, which :py:meth:`pyspl.Act.goto` would look up first.
+    """
+    taken = set(numbers)
+    unique = []
+    for name in names:
+        candidate = name
+        k = 1
+        while candidate in taken or hasattr(type(act), candidate):
+            k += 1
+            candidate = f'{name}_{k}'
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+def loads(data: Union[bytes, bytearray, memoryview], **options) -> Play:
+    """
+    Makes a play from data returned by :py:func:`dumps`. This is what :py:meth:`pyspl.Play.loads` does.
+
+    :param options: Arguments of :py:class:`pyspl.Play`, which replace the stored settings.
+    :raises ValueError: The data is not a play in a version of the format this version of **PySPL** can read.
+    """
+    data = memoryview(data).cast('B')
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError('not play data')
+    reader = _Reader(data, len(_MAGIC))
+    try:
+        return _load(reader, options)
+    except IndexError:
+        raise ValueError('truncated play data') from None
+
+def _load(reader: _Reader, options: dict) -> Play:
+    varint = reader.varint
+    version = varint()
+    if version != _VERSION:
+        raise ValueError(f'unsupported play data version: {version}')
+    strings = [str(reader.take(varint()), 'utf-8') for _ in range(varint())]
+
+    def string() -> str:
+        return strings[varint()]
+
+    description = string()
+    tag = varint()
+    if tag == _NO_SEED:
+        seed = None
+    elif tag == _STRING_SEED:
+        seed = string()
+    else:
+        seed = varint() if tag == _POSITIVE_SEED else -varint()
+    flags = varint()
+    vocabulary = default_vocabulary
+    if varint():
+        tables = [{kind: [string() for _ in range(varint())] for kind in KINDS} for _ in range(2)]
+        vocabulary = Vocabulary(*tables)
+
+    settings = {
+        'seed': seed,
+        'optimize': bool(flags & _OPTIMIZE),
+        'reuse_subexpressions': bool(flags & _REUSE_SUBEXPRESSIONS),
+        'schedule_stage': bool(flags & _SCHEDULE_STAGE),
+        'vocabulary': vocabulary,
+    }
+    settings.update(options)
+    play = Play(description, **settings)
+    for _ in range(varint()):
+        play.add_character(Character(string(), string()))
+
+    for _ in range(varint()):
+        act = RecordedAct(play)
+        number = string()
+        act_description = string()
+        scenes = [(string(), string(), string(), reader.take(varint())) for _ in range(varint())]
+        names = _unique_names(act, [scene[0] for scene in scenes], [scene[1] for scene in scenes])
+        for name, (_, scene_number, scene_description, body) in zip(names, scenes):
+            act.add_statements(name, scene_number, scene_description, _LazyStatements(body, play.characters, names))
+        play.add_act(act, number, act_description)
+    return play
@@ -0,0 +1,311 @@
+"""
+A small virtual machine that runs plays without going through SPL code.
+
+The statements recorded by each :py:class:`~pyspl.Act` (see :py:mod:`pyspl.ir`) are compiled into a flat array of integers,
+where characters are numbered slots, and then run by a single dispatch loop.
+
+.. code-block:: python
+
+    import pyspl.vm
+
+    pyspl.vm.run(play)  # reads from sys.stdin and writes to sys.stdout
+"""
+from array import array
+from dataclasses import dataclass, field
+from math import factorial, isqrt
+import sys
+from typing import IO, Optional
+
+from .character import Character
+from .errors import CharacterNotOnstage, EmptyStackError, SceneNotFound, StageLimitExceeded
+from . import ir as ir_ops
+from .ir import SceneIR
+from .operations import (
+    OneNumberOperation, TwoNumberOperation, Value, _quotient, _remainder,
+    cube, difference, product, quotient, remainder, square, squareroot, sum
+)
+from .play import Play, Scene, _Act
+
+# Opcodes for values. These push onto the value stack.
+CONST = 0
+LOAD = 1
+ADD = 2
+SUB = 3
+MUL = 4
+DIV = 5
+MOD = 6
+SQUARE = 7
+CUBE = 8
+SQRT = 9
+FACT = 10
+# Opcodes for statements. These take a character slot as their operand.
+SET = 11
+PUSH = 12
+POP = 13
+PRINT_CHAR = 14
+PRINT_INT = 15
+READ_CHAR = 16
+READ_INT = 17
+ENTER = 18
+EXIT = 19
+EXEUNT = 20
+# Opcodes for questions and jumps. COMPARE pops two values and takes an index in ir.COMPARISONS,
+# the jumps take the position to jump to.
+COMPARE = 21
+JUMP = 22
+JUMP_IF = 23
+JUMP_UNLESS = 24
+
+_BINARY_OPCODES = {sum: ADD, difference: SUB, product: MUL, quotient: DIV, remainder: MOD}
+_UNARY_OPCODES = {square: SQUARE, cube: CUBE, squareroot: SQRT}
+# The jump for each condition in ir.CONDITIONS.
+_JUMP_OPCODES = (JUMP, JUMP_IF, JUMP_UNLESS)
+
+@dataclass
+class Program:
+    """
+    A play compiled by :py:func:`compile`.
+
+    This is a data class.
+
+    .. warning::
+
+        This should not be constructed manually by the user.
+        Instead, use :py:func:`compile`.
+    """
+    code: array
+    constants: list[int]
+    characters: list[Character] = field(default_factory=list)
+
+    def run(self, stdin: Optional[IO[str]] = None, stdout: Optional[IO[str]] = None) -> list[int]:
+        """
+        Runs the program.
+
+        :param stdin: The stream to read input from. Defaults to :py:data:`sys.stdin`.
+        :param stdout: The stream to write output to. Defaults to :py:data:`sys.stdout`.
+        :returns: The final value of each character, in the order of :py:attr:`characters`.
+        :rtype: list[int]
+
+        :raises EmptyStackError: A character recalled from an empty stack.
+        :raises StageLimitExceeded: There are too many characters on stage.
+        :raises CharacterNotOnstage: A character who is not onstage tried to exit.
+
+        Scenes that jump back run again, so a play with a loop that never ends does not return.
+        """
+        stdin = sys.stdin if stdin is None else stdin
+        stdout = sys.stdout if stdout is None else stdout
+        code = self.code
+        constants = self.constants
+        values = [0] * len(self.characters)
+        stacks: list[list[int]] = [[] for _ in self.characters]
+        stage: list[int] = []
+        answer = False
+        output: list[str] = []
+        operands: list[int] = []
+        push = operands.append
+        pop = operands.pop
+        pc = 0
+        end = len(code)
+
+        while pc < end:
+            op = code[pc]
+            if op == CONST:
+                push(constants[code[pc + 1]])
+                pc += 2
+            elif op == LOAD:
+                push(values[code[pc + 1]])
+                pc += 2
+            elif op == SET:
+                values[code[pc + 1]] = pop()
+                pc += 2
+            elif op <= MOD:
+                b = pop()
+                a = pop()
+                if op == ADD:
+                    push(a + b)
+                elif op == SUB:
+                    push(a - b)
+                elif op == MUL:
+                    push(a * b)
+                elif op == DIV:
+                    push(_quotient(a, b))
+                else:
+                    push(_remainder(a, b))
+                pc += 1
+            elif op <= FACT:
+                x = pop()
+                if op == SQUARE:
+                    push(x * x)
+                elif op == CUBE:
+                    push(x * x * x)
+                elif op == SQRT:
+                    push(isqrt(x))
+                else:
+                    push(factorial(x))
+                pc += 1
+            elif op == PUSH:
+                stacks[code[pc + 1]].append(pop())
+                pc += 2
+            elif op == POP:
+                stack = stacks[code[pc + 1]]
+                if not stack:
+                    raise EmptyStackError(f'stack of {self.characters[code[pc + 1]]} is empty')
+                values[code[pc + 1]] = stack.pop()
+                pc += 2
+            elif op == PRINT_CHAR:
+                output.append(chr(values[code[pc + 1]]))
+                pc += 2
+            elif op == PRINT_INT:
+                output.append(str(values[code[pc + 1]]))
+                pc += 2
+            elif op == READ_CHAR or op == READ_INT:
+                stdout.write(''.join(output))
+                stdout.flush()
+                output.clear()
+                if op == READ_CHAR:
+                    char = stdin.read(1)
+                    values[code[pc + 1]] = ord(char) if char else -1
+                else:
+                    values[code[pc + 1]] = int(stdin.readline())
+                pc += 2
+            elif op == ENTER:
+                if len(stage) == 2:
+                    raise StageLimitExceeded('character limit onstage exceeded')
+                stage.append(code[pc + 1])
+                pc += 2
+            elif op == EXIT:
+                if code[pc + 1] not in stage:
+                    raise CharacterNotOnstage(f'character not on stage: {self.characters[code[pc + 1]]}')
+                stage.remove(code[pc + 1])
+                pc += 2
+            elif op == COMPARE:
+                b = pop()
+                a = pop()
+                comparison = code[pc + 1]
+                answer = a > b if comparison == 0 else a < b if comparison == 1 else a == b
+                pc += 2
+            elif op == JUMP:
+                pc = code[pc + 1]
+            elif op == JUMP_IF or op == JUMP_UNLESS:
+                pc = code[pc + 1] if answer == (op == JUMP_IF) else pc + 2
+            else:
+                stage.clear()
+                pc += 1
+
+        stdout.write(''.join(output))
+        stdout.flush()
+        return values
+
+class _Compiler:
+    def __init__(self):
+        self.code = array('q')
+        self.constants: list[int] = []
+        self.characters: list[Character] = []
+        self._constant_slots: dict[int, int] = {}
+        self._character_slots: dict[int, int] = {}
+        # Where each scene starts, by the ids of its act and scene, and the jumps to patch once all are known.
+        self._labels: dict[tuple[int, int], int] = {}
+        self._jumps: list[tuple[int, tuple[int, int]]] = []
+
+    def character(self, character: Character) -> int:
+        slot = self._character_slots.get(id(character))
+        if slot is None:
+            slot = self._character_slots[id(character)] = len(self.characters)
+            self.characters.append(character)
+        return slot
+
+    def constant(self, n: int) -> int:
+        slot = self._constant_slots.get(n)
+        if slot is None:
+            slot = self._constant_slots[n] = len(self.constants)
+            self.constants.append(n)
+        return slot
+
+    def value(self, value: Value):
+        if isinstance(value, int):
+            self.code.extend((CONST, self.constant(value)))
+        elif isinstance(value, Character):
+            self.code.extend((LOAD, self.character(value)))
+        elif isinstance(value, TwoNumberOperation):
+            self.value(value.a)
+            self.value(value.b)
+            self.code.append(_BINARY_OPCODES[type(value)])
+        elif isinstance(value, OneNumberOperation):
+            self.value(value.x)
+            self.code.append(_UNARY_OPCODES.get(type(value), FACT))
+        else:
+            raise TypeError(f'invalid value: {value!r}')
+
+    def scene(self, ir: SceneIR, act: Optional[_Act] = None, scene: Optional[Scene] = None):
+        if scene is not None:
+            self._labels[id(act), id(scene)] = len(self.code)
+        slots = [self.character(character) for character in ir.characters]
+        code = self.code
+        for op, first, second, operand in ir.records():
+            if op == ir_ops.ENTER:
+                for c in (first, second):
+                    if c != -1:
+                        code.extend((ENTER, slots[c]))
+            elif op == ir_ops.EXIT:
+                if first == -1 and second == -1:
+                    code.append(EXEUNT)
+                for c in (first, second):
+                    if c != -1:
+                        code.extend((EXIT, slots[c]))
+            elif op == ir_ops.SET or op == ir_ops.REMEMBER:
+                self.value(ir.values[operand])
+                code.extend((SET if op == ir_ops.SET else PUSH, slots[second]))
+            elif op == ir_ops.POP:
+                code.extend((POP, slots[second]))
+            elif op == ir_ops.PRINT:
+                code.extend((PRINT_INT if operand else PRINT_CHAR, slots[second]))
+            elif op == ir_ops.INPUT:
+                code.extend((READ_INT if operand else READ_CHAR, slots[second]))
+            elif op == ir_ops.QUESTION:
+                self.value(ir.characters[second])
+                self.value(ir.values[operand >> 2])
+                code.extend((COMPARE, operand & 3))
+            elif op == ir_ops.GOTO:
+                self._jumps.append((len(code) + 1, (id(act), id(ir.values[operand >> 2]))))
+                code.extend((_JUMP_OPCODES[operand & 3], -1))
+            else:
+                raise ValueError(f'unknown statement: {op!r}')
+
+    def link(self):
+        """
+        Points every jump at the scene it goes to, now that all scenes are compiled.
+        """
+        for position, label in self._jumps:
+            target = self._labels.get(label)
+            if target is None:
+                raise SceneNotFound('no scene to jump to')
+            self.code[position] = target
+
+def compile(play: Play) -> Program:
+    """
+    Compiles a play into a :py:class:`Program`.
+
+    This runs every scene of the play, the same way :py:meth:`Play.code` does, but no SPL code is generated.
+
+    :param Play play: The play to compile.
+    :rtype: Program
+    """
+    compiler = _Compiler()
+    for character in play.characters:
+        compiler.character(character)
+    for act, scene, ir in play._iterscenes():
+        compiler.scene(ir, act, scene)
+    compiler.link()
+    return Program(compiler.code, compiler.constants, compiler.characters)
+
+def run(play: Play, stdin: Optional[IO[str]] = None, stdout: Optional[IO[str]] = None) -> list[int]:
+    """
+    Compiles and runs a play. This is equivalent to:
+
+    .. code-block:: python
+
+        pyspl.vm.compile(play).run(stdin, stdout)
+
+    :rtype: list[int]
+    """
+    return compile(play).run(stdin, stdout)
@@ -0,0 +1,231 @@
+"""
+The words numbers are written with.
+
+A :py:class:`Vocabulary` holds the nouns and adjectives of both kinds (``'positive_neutral'`` and ``'negative'``)
+in immutable tables sorted by length. The built-in words of :py:mod:`pyspl.names` are :py:data:`default_vocabulary`;
+more words can be loaded from word packs, which are memory-mapped so that large packs cost nothing until
+their words are used.
+
+.. code-block:: python
+
+    import pyspl
+    from pyspl.vocabulary import Vocabulary, default_vocabulary
+
+    pack = Vocabulary.load('extra.words')
+    play = pyspl.Play('A play with more words.', vocabulary=default_vocabulary + pack)
+"""
+from array import array
+import mmap
+import os
+import random
+import struct
+import sys
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping, Sequence, Union, overload
+
+from .names import adjectives, nouns
+
+KINDS = ('positive_neutral', 'negative')
+"""The kinds of words, in the order they are stored in word packs."""
+
+_VOWELS = frozenset('aeiou')
+
+# Word pack layout: the header, then one offset per word plus one (all uint32, little-endian) into the
+# UTF-8 text of the words, which follows. The tables are stored in the order positive adjectives,
+# negative adjectives, positive nouns, negative nouns, each sorted by length.
+_MAGIC = b'SPLWORDS'
+_VERSION = 1
+_HEADER = struct.Struct('<8sI4I')
+
+def _sorted_words(words: Iterable[str]) -> tuple[str, ...]:
+    return tuple(sorted(set(words), key=lambda word: (len(word), word)))
+
+def _sample_indexes(rng: random.Random, n: int, k: int) -> list[int]:
+    """
+    Picks *k* distinct indexes out of ``range(n)`` in random order, without building a list of size *n*.
+    """
+    # Robert Floyd's algorithm: one random draw per index picked.
+    chosen: set[int] = set()
+    for j in range(n - k, n):
+        t = int(rng.random() * (j + 1))
+        chosen.add(j if t in chosen else t)
+    result = list(chosen)
+    rng.shuffle(result)
+    return result
+
+class _PackedWords(Sequence[str]):
+    """
+    A table of a word pack. Words are only decoded when they are looked up.
+    """
+    __slots__ = ('_data', '_offsets', '_start', '_length')
+
+    def __init__(self, data: Union[mmap.mmap, bytes], offsets: Sequence[int], start: int, length: int):
+        self._data = data
+        self._offsets = offsets
+        self._start = start
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+    @overload
+    def __getitem__(self, i: slice) -> tuple[str, ...]: ...
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(self._length)))
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('word index out of range')
+        j = self._start + i
+        return self._data[self._offsets[j]:self._offsets[j + 1]].decode()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(self._length))
+
+class Vocabulary:
+    """
+    An immutable set of nouns and adjectives to write numbers with.
+
+    Each table is sorted by length, so the shortest words come first. A vocabulary is chosen per play with
+    the *vocabulary* parameter of :py:class:`pyspl.Play`, so plays using different words do not affect each other.
+
+    :param nouns: The nouns of each kind in :py:data:`KINDS`.
+    :param adjectives: The adjectives of each kind in :py:data:`KINDS`.
+    :raises ValueError: A kind has no nouns.
+    """
+    __slots__ = ('nouns', 'adjectives', 'limits', '_path', '_data')
+
+    def __init__(self, nouns: Mapping[str, Iterable[str]], adjectives: Mapping[str, Iterable[str]]) -> None:
+        self._set_tables(
+            {kind: _sorted_words(nouns.get(kind, ())) for kind in KINDS},
+            {kind: _sorted_words(adjectives.get(kind, ())) for kind in KINDS},
+        )
+        self._path = None
+        self._data = None
+
+    def _set_tables(self, nouns: dict[str, Sequence[str]], adjectives: dict[str, Sequence[str]]) -> None:
+        for kind in KINDS:
+            if not nouns[kind]:
+                raise ValueError(f'vocabulary has no {kind} nouns')
+        self.nouns: Mapping[str, Sequence[str]] = MappingProxyType(nouns)
+        """The nouns of each kind, shortest first."""
+        self.adjectives: Mapping[str, Sequence[str]] = MappingProxyType(adjectives)
+        """The adjectives of each kind, shortest first."""
+        self.limits: tuple[int, int] = (len(adjectives['positive_neutral']), len(adjectives['negative']))
+        """The number of positive and negative adjectives, which limits the powers of 2 a single noun phrase can be."""
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> 'Vocabulary':
+        """
+        Opens a word pack written by :py:meth:`save`.
+
+        The file is memory-mapped and words are read from it as they are used, so opening a large pack is fast.
+        The file must not be changed while the vocabulary is in use.
+
+        :raises ValueError: The file is not a word pack.
+        """
+        with open(path, 'rb') as f:
+            try:
+                data: Union[mmap.mmap, bytes] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f'not a word pack: {path!r}')
+        magic, version, *counts = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'not a word pack: {path!r}')
+        total = sum(counts)
+        offsets_end = _HEADER.size + 4 * (total + 1)
+        if sys.byteorder == 'little' and isinstance(data, mmap.mmap):
+            offsets: Sequence[int] = memoryview(data)[_HEADER.size:offsets_end].cast('I')
+        else:
+            offsets = array('I', data[_HEADER.size:offsets_end])
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+
+        tables = []
+        start = 0
+        for count in counts:
+            tables.append(_PackedWords(data, offsets, start, count))
+            start += count
+        vocabulary = cls.__new__(cls)
+        vocabulary._set_tables(dict(zip(KINDS, tables[2:])), dict(zip(KINDS, tables[:2])))
+        vocabulary._path = os.fspath(path)
+        vocabulary._data = data
+        return vocabulary
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes the vocabulary as a word pack, which can be opened again with :py:meth:`load`.
+        """
+        tables = [self.adjectives[kind] for kind in KINDS] + [self.nouns[kind] for kind in KINDS]
+        encoded = [word.encode() for table in tables for word in table]
+        offsets = array('I', [0] * (len(encoded) + 1))
+        position = _HEADER.size + 4 * len(offsets)
+        for i, word in enumerate(encoded):
+            offsets[i] = position
+            position += len(word)
+        offsets[-1] = position
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, *map(len, tables)))
+            f.write(offsets.tobytes())
+            f.write(b''.join(encoded))
+
+    def __add__(self, other: 'Vocabulary') -> 'Vocabulary':
+        """
+        Returns a vocabulary with the words of both vocabularies.
+        """
+        if not isinstance(other, Vocabulary):
+            return NotImplemented
+        return Vocabulary(
+            {kind: [*self.nouns[kind], *other.nouns[kind]] for kind in KINDS},
+            {kind: [*self.adjectives[kind], *other.adjectives[kind]] for kind in KINDS},
+        )
+
+    def __reduce__(self):
+        if self is default_vocabulary:
+            return 'default_vocabulary'
+        if self._path is not None:
+            return Vocabulary.load, (self._path,)
+        return Vocabulary, (
+            {kind: tuple(self.nouns[kind]) for kind in KINDS},
+            {kind: tuple(self.adjectives[kind]) for kind in KINDS},
+        )
+
+    def __repr__(self) -> str:
+        sizes = ', '.join(f'{len(self.nouns[kind])} {kind} nouns' for kind in KINDS)
+        return f'<Vocabulary {sizes}, adjectives limits={self.limits}>'
+
+    def phrase(self, n: int, rng: random.Random) -> str:
+        """
+        Writes *n*, which must be a power of 2 (or its negative) within :py:attr:`limits`, as a noun phrase.
+        """
+        kind = 'negative' if n < 0 else 'positive_neutral'
+        adjs = self.adjectives[kind]
+        count = abs(n).bit_length() - 1
+        words = [adjs[i] for i in _sample_indexes(rng, len(adjs), count)]
+        kind_nouns = self.nouns[kind]
+        words.append(kind_nouns[int(rng.random() * len(kind_nouns))])
+        if count:
+            words.insert(0, 'an' if words[0][0] in _VOWELS else 'a')
+        elif n > 0:
+            words.insert(0, 'the')
+        return ' '.join(words)
+
+    def shortest_phrase(self, n: int) -> str:
+        """
+        Same as :py:meth:`phrase`, but with the shortest words and without an article (which SPL does not
+        require), so the phrase is always the same.
+        """
+        kind = 'negative' if n < 0 else 'positive_neutral'
+        count = abs(n).bit_length() - 1
+        return ' '.join([*self.adjectives[kind][:count], self.nouns[kind][0]])
+
+default_vocabulary = Vocabulary(nouns, adjectives)
+"""The words of :py:mod:`pyspl.names`, used by plays that do not choose a vocabulary."""
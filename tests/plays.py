@@ -0,0 +1,125 @@
+"""
+Plays shared by the tests.
+"""
+import contextlib
+import io
+from typing import Iterable
+
+import pytest
+
+import pyspl
+from pyspl import vm
+
+def printing_play(values: Iterable[pyspl.Value], **options) -> pyspl.Play:
+    """
+    Returns a play where Romeo is set to each of *values* in turn and prints it as a number, followed by a space.
+    *options* are passed to :py:class:`pyspl.Play`.
+    """
+    values = list(values)
+    play = pyspl.Play('A play of numbers.', **options)
+    romeo = play.character('Romeo', 'a printer.')
+    juliet = play.character('Juliet', 'a setter.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.numbers, 'I', 'The numbers.')
+
+        def numbers(self) -> None:
+            self.enter(romeo, juliet)
+            for value in values:
+                self.set(romeo, value)
+                self.print(romeo, int)
+                self.set(romeo, 32)
+                self.print(romeo, str)
+            self.exit()
+
+    play.add_act(Numbers(play), 'I', 'The only act.')
+    return play
+
+def output(play: pyspl.Play) -> str:
+    """
+    Returns what *play* prints when run by :py:mod:`pyspl.vm`.
+    """
+    stdout = io.StringIO()
+    vm.run(play, stdout=stdout)
+    return stdout.getvalue()
+
+def spl_output(code: str) -> str:
+    """
+    Returns what *code* prints when run by the ``shakespearelang`` interpreter. Skips the test if it is not installed.
+    """
+    shakespearelang = pytest.importorskip('shakespearelang')
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        shakespearelang.Shakespeare(code).run()
+    return stdout.getvalue()
+
+def acts_play(acts: int, **options) -> pyspl.Play:
+    """
+    Returns a play of *acts* acts, each printing a few numbers computed from the number of the act.
+    *options* are passed to :py:class:`pyspl.Play`.
+    """
+    play = pyspl.Play('A play of acts.', **options)
+    romeo = play.character('Romeo', 'a printer.')
+    juliet = play.character('Juliet', 'a setter.')
+
+    class Numbers(pyspl.Act):
+        def __init__(self, play: pyspl.Play, n: int) -> None:
+            super().__init__(play)
+            self.n = n
+            self.add_scene(self.numbers, 'I', 'The numbers.')
+            self.add_scene(self.more, 'II', 'More numbers.')
+
+        def numbers(self) -> None:
+            self.enter(romeo, juliet)
+            self.set(romeo, pyspl.sum(self.n * 37, -5))
+            self.print(romeo, int)
+            self.set(juliet, pyspl.product(romeo, self.n - 3))
+            self.print(juliet, int)
+
+        def more(self) -> None:
+            self.set(romeo, pyspl.difference(juliet, self.n ** 3))
+            self.print(romeo, int)
+            self.exit()
+
+    for n in range(acts):
+        play.add_act(Numbers(play, n), str(n + 1), f'Act number {n + 1}.')
+    return play
+
+def loop_play(count: int, **options) -> pyspl.Play:
+    """
+    Returns a play where Romeo counts from 1 to *count* in a loop of questions and jumps, then prints a number
+    remembered before the loop. *options* are passed to :py:class:`pyspl.Play`.
+    """
+    play = pyspl.Play('A play of loops.', **options)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a questioner.')
+
+    class Loop(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.start, 'I', 'The start.')
+            self.add_scene(self.count, 'II', 'The loop.')
+            self.add_scene(self.end, 'III', 'The end.')
+
+        def start(self) -> None:
+            self.enter(romeo, juliet)
+            self.remember(romeo, -count)
+            self.set(romeo, 0)
+            self.set(juliet, 32)
+
+        def count(self) -> None:
+            self.set(romeo, pyspl.sum(romeo, 1))
+            self.print(romeo, int)
+            self.print(juliet, str)
+            self.ask(romeo, '<', count)
+            self.goto('II', True)
+
+        def end(self) -> None:
+            self.pop(romeo)
+            self.print(romeo, int)
+            self.exit()
+
+    play.add_act(Loop(play), 'I', 'The only act.')
+    return play
@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from pyspl import play as play_module
+
+from .plays import acts_play
+
+async def collect(play, style: str = 'default', executor=None) -> str:
+    return ''.join([chunk async for chunk in play.aiter_code(style, executor)])
+
+@pytest.mark.parametrize('style', ['default', 'compact'])
+def test_aiter_code_matches_code(monkeypatch, style):
+    monkeypatch.setattr(play_module, 'SAVE_BATCH_LINES', 7)
+    play = acts_play(5, seed=0)
+    assert asyncio.run(collect(play, style)) == play.code(style=style) + '\n'
+
+def test_aiter_code_thread_pool():
+    play = acts_play(3, seed=0)
+    expected = play.code() + '\n'
+    with ThreadPoolExecutor(2) as executor:
+        assert asyncio.run(collect(play, executor=executor)) == expected
+
+def test_aiter_code_process_pool():
+    # Process pools are sent the play with dumps(), so its acts do not need to be picklable.
+    play = acts_play(3, seed=0)
+    with ProcessPoolExecutor(1) as executor:
+        assert asyncio.run(collect(play, executor=executor)) == play.code() + '\n'
+
+def test_asave(tmp_path):
+    play = acts_play(4, seed=0)
+    asyncio.run(play.asave(tmp_path / 'async.spl'))
+    play.save(tmp_path / 'sync.spl')
+    assert (tmp_path / 'async.spl').read_text() == (tmp_path / 'sync.spl').read_text() == play.code() + '\n'
+
+def test_asave_disk_cache(tmp_path):
+    play = acts_play(4, seed=0, disk_cache=tmp_path / 'cache')
+    for name in ('first.spl', 'second.spl'):
+        asyncio.run(play.asave(tmp_path / name))
+    assert play.disk_cache.hits == 1
+    assert (tmp_path / 'first.spl').read_text() == (tmp_path / 'second.spl').read_text() == play.code() + '\n'
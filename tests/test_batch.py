@@ -0,0 +1,53 @@
+import functools
+import tarfile
+import zipfile
+
+import pytest
+
+from pyspl import batch
+from pyspl.operations import _plan
+
+from .plays import acts_play
+
+def specs() -> list:
+    # Plays whose acts are defined in a function cannot be pickled, so only functions and data go to workers.
+    return [
+        ('first.spl', functools.partial(acts_play, 2, seed=0)),
+        ('second.spl', functools.partial(acts_play, 3, seed=1)),
+        ('third.spl', acts_play(1, seed=2).dumps()),
+    ]
+
+def expected() -> dict[str, bytes]:
+    return {
+        'first.spl': acts_play(2, seed=0).code().encode() + b'\n',
+        'second.spl': acts_play(3, seed=1).code().encode() + b'\n',
+        'third.spl': acts_play(1, seed=2).code().encode() + b'\n',
+    }
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_directory(tmp_path, workers):
+    result = batch.render(specs(), tmp_path / 'plays', workers=workers)
+    assert {name: (tmp_path / 'plays' / name).read_bytes() for name in expected()} == expected()
+    assert (result.plays, result.bytes) == (3, sum(map(len, expected().values())))
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_zip(tmp_path, workers):
+    result = batch.render(specs(), tmp_path / 'plays.zip', workers=workers)
+    with zipfile.ZipFile(tmp_path / 'plays.zip') as archive:
+        assert {name: archive.read(name) for name in archive.namelist()} == expected()
+    assert result.plays == 3
+
+@pytest.mark.parametrize('suffix', ['.tar', '.tar.gz', '.tgz'])
+def test_tar(tmp_path, suffix):
+    batch.render(specs(), tmp_path / f'plays{suffix}', workers=2)
+    with tarfile.open(tmp_path / f'plays{suffix}') as archive:
+        assert {member.name: archive.extractfile(member).read() for member in archive} == expected()
+
+def test_default_names(tmp_path):
+    batch.render([acts_play(1, seed=0), acts_play(2, seed=0)], tmp_path, workers=1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['play0.spl', 'play1.spl']
+
+def test_workers_warm_encodings():
+    _plan.cache_clear()
+    batch._init_worker()
+    assert _plan.cache_info().currsize >= len(batch.WARM_NUMBERS)
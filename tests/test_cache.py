@@ -0,0 +1,103 @@
+import pyspl
+
+def two_act_play(**options) -> tuple[pyspl.Play, pyspl.Act, pyspl.Act]:
+    play = pyspl.Play('A cached play.', seed=0, cache=True, **options)
+    romeo = play.character('Romeo', 'a printer.')
+    juliet = play.character('Juliet', 'a setter.')
+
+    class First(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.one, 'I', 'One.')
+            self.add_scene(self.two, 'II', 'Two.')
+
+        def one(self) -> None:
+            self.enter(romeo, juliet)
+            self.set(romeo, pyspl.sum(64, 8))
+            self.print(romeo, str)
+
+        def two(self) -> None:
+            self.set(romeo, pyspl.product(5, 21))
+            self.print(romeo, str)
+            self.exit()
+
+    class Second(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.three, 'I', 'Three.')
+
+        def three(self) -> None:
+            self.enter(romeo, juliet)
+            self.set(juliet, pyspl.sum(32, 1))
+            self.print(juliet, str)
+            self.exit()
+
+    first, second = First(play), Second(play)
+    play.add_act(first, 'I', 'The first act.')
+    play.add_act(second, 'II', 'The second act.')
+    return play, first, second
+
+def test_act_hits():
+    play, _, _ = two_act_play()
+    code = play.code()
+    cache = play.render_cache
+    assert (cache.act_hits, cache.act_misses, cache.scene_misses) == (0, 2, 3)
+    assert play.code() == code
+    assert (cache.act_hits, cache.act_misses, cache.scene_hits, cache.scene_misses) == (2, 2, 0, 3)
+
+def test_invalidate_scene():
+    play, first, _ = two_act_play()
+    code = play.code()
+    play.invalidate(first, 'two')
+    assert play.code() == code
+    cache = play.render_cache
+    assert (cache.act_hits, cache.act_misses) == (1, 3)
+    assert (cache.scene_hits, cache.scene_misses) == (1, 4)
+
+def test_matches_uncached_code():
+    play, _, _ = two_act_play(optimize=True)
+    play.code()
+    uncached = two_act_play(optimize=True)[0]
+    uncached.render_cache = None
+    assert play.code() == uncached.code()
+
+def test_method_used_by_several_scenes():
+    play = pyspl.Play('Repeated scenes.', seed=0, cache=True)
+    romeo = play.character('Romeo', 'a printer.')
+    juliet = play.character('Juliet', 'a setter.')
+
+    class Repeated(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.enter_both, 'I', 'Entrance.')
+            for n in range(2, 7):
+                self.add_scene(self.step, str(n), 'Again.')
+
+        def enter_both(self) -> None:
+            self.enter(romeo, juliet)
+
+        def step(self) -> None:
+            self.set(romeo, pyspl.sum(romeo, 1))
+            self.print(romeo, int)
+
+    act = Repeated(play)
+    play.add_act(act, 'I', 'The only act.')
+    code = play.code()
+    play.invalidate(act, 'enter_both')
+    assert play.code() == code
+    cache = play.render_cache
+    assert (cache.scene_hits, cache.scene_misses) == (5, 7)
+    play.invalidate(act, 'step')
+    assert play.code() == code
+    assert (cache.scene_hits, cache.scene_misses) == (6, 12)
+
+def test_optimization_stats_of_cached_code():
+    play, first, _ = two_act_play(optimize=True)
+    play.code()
+    stats = play.optimization_stats
+    assert stats.bytes > 0
+    play.code()
+    assert play.optimization_stats == stats
+    play.invalidate(first, 'two')
+    play.code()
+    assert play.optimization_stats == stats
@@ -0,0 +1,151 @@
+import io
+
+import pyspl
+from pyspl.parse import parse
+
+from .plays import loop_play, output, printing_play, spl_output
+
+def values() -> list[pyspl.Value]:
+    signs = [(7, 2), (-7, 2), (7, -2), (-7, -2), (-6, 3), (-1, 5), (0, -5)]
+    return [
+        *(pyspl.quotient(a, b) for a, b in signs),
+        *(pyspl.remainder(a, b) for a, b in signs),
+        pyspl.sum(-3, 10),
+        pyspl.difference(4, 9),
+        pyspl.product(-6, 7),
+        pyspl.square(-5),
+        pyspl.cube(-3),
+        pyspl.squareroot(99),
+        pyspl.factorial(6),
+    ]
+
+def run(play: pyspl.Play) -> str:
+    stdout = io.StringIO()
+    play.compile()(stdout=stdout)
+    return stdout.getvalue()
+
+def test_matches_vm():
+    play = printing_play(values())
+    assert run(play) == output(play)
+
+def test_matches_spl():
+    play = printing_play(values(), seed=0)
+    assert run(play) == spl_output(play.code())
+
+def test_division_by_characters():
+    # Values that are only known when the play runs are not folded by the optimizer.
+    play = pyspl.Play('Division.')
+    romeo = play.character('Romeo', 'a dividend.')
+    juliet = play.character('Juliet', 'a divisor.')
+
+    class Divide(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.divide, 'I', 'Division.')
+
+        def divide(self) -> None:
+            self.enter(romeo, juliet)
+            self.set(juliet, -7)
+            self.set(romeo, 2)
+            self.set(juliet, pyspl.remainder(juliet, pyspl.quotient(juliet, romeo)))
+
+    play.add_act(Divide(play), 'I', 'The only act.')
+    assert play.compile()(stdout=io.StringIO()) == [2, -1]
+
+def counting_play(**options) -> tuple[pyspl.Play, pyspl.Act, list[int]]:
+    play = pyspl.Play('Counted.', **options)
+    romeo = play.character('Romeo', 'a counter.')
+    juliet = play.character('Juliet', 'a setter.')
+    runs = [0]
+
+    class Count(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.count, 'I', 'Counting.')
+
+        def count(self) -> None:
+            runs[0] += 1
+            self.enter(romeo, juliet)
+            self.set(romeo, pyspl.product(pyspl.sum(3, 4), pyspl.sum(5, 1)))
+            self.exit()
+
+    act = Count(play)
+    play.add_act(act, 'I', 'The only act.')
+    return play, act, runs
+
+def test_cached_compile_skips_scenes():
+    play, act, runs = counting_play(cache=True, optimize=True)
+    function = play.compile()
+    assert play.optimization_stats.operations == 3
+    play.optimization_stats = None
+    assert play.compile() is function
+    assert runs == [1]
+    assert play.optimization_stats.operations == 3
+    assert (play.render_cache.compile_hits, play.render_cache.compile_misses) == (1, 1)
+
+    play.invalidate(act, 'count')
+    assert play.compile()(stdout=io.StringIO()) == [42, 0]
+    assert runs == [2]
+
+def test_compile_notices_new_acts():
+    play, act, runs = counting_play(cache=True)
+    play.compile()
+    play.add_act(type(act)(play), 'II', 'Again.')
+    play.compile()
+    assert runs == [3]
+
+def test_uncached_compile_runs_scenes():
+    play, _, runs = counting_play()
+    play.compile()
+    play.compile()
+    assert runs == [2]
+
+def deep_value(depth: int, character: pyspl.Character) -> pyspl.Value:
+    value: pyspl.Value = character
+    for i in range(depth):
+        if i % 3 == 0:
+            value = pyspl.sum(value, i)
+        elif i % 3 == 1:
+            value = pyspl.difference(i, value)
+        else:
+            value = pyspl.quotient(pyspl.product(value, 3), 2)
+    return value
+
+def test_deep_operations():
+    play = pyspl.Play('Deep.')
+    romeo = play.character('Romeo', 'a deep thinker.')
+    juliet = play.character('Juliet', 'a setter.')
+
+    class Deep(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.deep, 'I', 'Depths.')
+            self.add_scene(self.skipped, 'II', 'Skipped.')
+            self.add_scene(self.last, 'III', 'The end.')
+
+        def deep(self) -> None:
+            self.enter(romeo, juliet)
+            self.set(juliet, 5)
+            self.set(romeo, deep_value(400, juliet))
+            self.remember(juliet, deep_value(300, romeo))
+            self.print(romeo, int)
+            self.ask(juliet, '<', deep_value(250, juliet))
+            self.goto(self.last, True)
+
+        def skipped(self) -> None:
+            self.print(juliet, int)
+
+        def last(self) -> None:
+            self.pop(juliet)
+            self.print(juliet, int)
+
+    play.add_act(Deep(play), 'I', 'The only act.')
+    assert run(play) == output(play)
+
+def test_loop():
+    play = loop_play(12, seed=0)
+    expected = ''.join(f'{n} ' for n in range(1, 13)) + '-12'
+    assert output(play) == run(play) == expected
+    for style in ('default', 'compact'):
+        code = play.code(style=style)
+        assert spl_output(code) == output(parse(code)) == expected
@@ -0,0 +1,61 @@
+import pytest
+
+import pyspl
+from pyspl.diskcache import DiskCache
+
+from .plays import printing_play
+
+def test_miss_then_hit(tmp_path):
+    cache = DiskCache(tmp_path)
+    play = printing_play([1, 2, 3], seed=0, disk_cache=cache)
+    code = play.code()
+    assert (cache.hits, cache.misses, cache.writes, len(cache)) == (0, 1, 1, 1)
+    assert play.code() == code
+    assert (cache.hits, cache.misses, cache.writes) == (1, 1, 1)
+
+def test_shared_between_plays(tmp_path):
+    code = printing_play([1, 2, 3], seed=0, disk_cache=tmp_path).code()
+    cache = DiskCache(tmp_path)
+    assert printing_play([1, 2, 3], seed=0, disk_cache=cache).code() == code
+    assert cache.hits == 1
+
+def test_changed_play_misses(tmp_path):
+    cache = DiskCache(tmp_path)
+    printing_play([1, 2, 3], seed=0, disk_cache=cache).code()
+    printing_play([1, 2, 4], seed=0, disk_cache=cache).code()
+    printing_play([1, 2, 3], seed=1, disk_cache=cache).code()
+    assert (cache.hits, cache.misses, len(cache)) == (0, 3, 3)
+
+def test_save(tmp_path):
+    cache = DiskCache(tmp_path / 'cache')
+    play = printing_play([1, 2, 3], seed=0, disk_cache=cache)
+    play.save(tmp_path / 'first.spl')
+    play.save(tmp_path / 'second.spl')
+    printing_play([1, 2, 3], seed=0).save(tmp_path / 'uncached.spl')
+    assert cache.hits == 1
+    uncached = (tmp_path / 'uncached.spl').read_text()
+    assert (tmp_path / 'first.spl').read_text() == (tmp_path / 'second.spl').read_text() == uncached
+
+def test_eviction(tmp_path):
+    cache = DiskCache(tmp_path, max_size=1)
+    for n in range(3):
+        printing_play([n], seed=0, disk_cache=cache).code()
+    assert cache.evictions == 3
+    assert len(cache) == 0
+
+def test_character_not_added(tmp_path):
+    stranger = pyspl.Character('Hamlet', 'a stranger.')
+    play = printing_play([pyspl.sum(stranger, 1)], seed=0, disk_cache=tmp_path)
+    with pytest.raises(ValueError, match="character was not added to the play: 'Hamlet'"):
+        play.code()
+
+def test_unseeded_not_cached(tmp_path):
+    cache = DiskCache(tmp_path / 'cache')
+    play = printing_play(range(-20, 20), disk_cache=cache)
+    codes = {play.code() for _ in range(5)}
+    play.save(tmp_path / 'play.spl')
+    assert len(codes) > 1
+    assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+    # The compact style does not use the seed, so it is still cached.
+    assert play.code(style='compact') == play.code(style='compact')
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
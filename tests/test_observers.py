@@ -0,0 +1,46 @@
+import io
+import json
+import pstats
+
+from pyspl.observers import Profiler
+
+from .plays import acts_play
+
+def profiled(acts: int) -> tuple[Profiler, str]:
+    play = acts_play(acts, seed=0)
+    profiler = Profiler()
+    play.add_observer(profiler)
+    return profiler, play.code()
+
+def test_profiler(tmp_path):
+    profiler, code = profiled(3)
+    results = profiler.to_dict()
+    assert [(a['number'], a['calls']) for a in results['acts']] == [('1', 1), ('2', 1), ('3', 1)]
+    assert [s['scene'] for s in results['scenes']] == ['numbers', 'more'] * 3
+    assert {o['type']: o['calls'] for o in results['operations']} == {'sum': 3, 'product': 3, 'difference': 3}
+    # The lines of the acts are their headers, then the lines of their scenes.
+    for act in results['acts']:
+        scenes = [s for s in results['scenes'] if s['number'] == act['number']]
+        assert act['lines'] == 1 + sum(s['lines'] for s in scenes)
+    # The blank lines between acts are not part of any act.
+    lines = [line for line in code[code.index('Act 1:'):].splitlines() if line]
+    assert sum(a['lines'] for a in results['acts']) == len(lines)
+    assert sum(a['bytes'] for a in results['acts']) == sum(len(line.encode()) + 1 for line in lines)
+    profiler.dump_json(tmp_path / 'profile.json')
+    assert json.loads((tmp_path / 'profile.json').read_text()) == results
+
+def test_profiler_pstats(tmp_path):
+    profiler, _ = profiled(2)
+    profiler.dump_stats(tmp_path / 'profile.pstats')
+    stats = pstats.Stats(str(tmp_path / 'profile.pstats'), stream=io.StringIO())
+    functions = {key[2]: value for key, value in stats.stats.items()}
+    assert functions.keys() == {
+        '<sum>', '<product>', '<difference>', 'acts_play.<locals>.Numbers.numbers',
+        'acts_play.<locals>.Numbers.more', 'acts_play.<locals>.Numbers (Act 1)', 'acts_play.<locals>.Numbers (Act 2)',
+    }
+    assert stats.total_calls == 2 * (3 + 2 + 1)
+    callers = functions['<sum>'][4]
+    assert [key[2] for key in callers] == ['acts_play.<locals>.Numbers.numbers']
+    stats.sort_stats('cumulative').print_stats()
+    profiler.clear()
+    assert profiler.to_dict() == {'acts': [], 'scenes': [], 'operations': []}
@@ -0,0 +1,50 @@
+import random
+
+import pyspl
+from pyspl.operations import _leaf_cost, _plan
+from pyspl.parse import parse
+
+from .plays import output, printing_play, spl_output
+
+def numbers() -> list[int]:
+    rng = random.Random(0)
+    return [*range(-300, 301), *(rng.randrange(-2**40, 2**40) for _ in range(200))]
+
+FUNCTIONS = {
+    pyspl.sum: lambda a, b: a + b,
+    pyspl.difference: lambda a, b: a - b,
+    pyspl.product: lambda a, b: a * b,
+    pyspl.square: lambda x: x * x,
+    pyspl.cube: lambda x: x * x * x,
+}
+
+def evaluate(plan) -> int:
+    if isinstance(plan, int):
+        assert plan == 0 or abs(plan) & (abs(plan) - 1) == 0, plan
+        return plan
+    operation, *operands = plan
+    return FUNCTIONS[operation](*map(evaluate, operands))
+
+def test_plan_evaluates_to_number():
+    for n in numbers():
+        assert evaluate(_plan(n)[1]) == n
+
+def test_int_runs_in_spl():
+    values = [-1000, -37, -1, 0, 1, 7, 100, 12345, 2**40 + 3, -(2**33) + 5]
+    assert spl_output(printing_play(values, seed=0).code()) == ''.join(f'{n} ' for n in values)
+
+def test_encoding_not_larger_than_binary():
+    for n in numbers():
+        if n == 0:
+            continue
+        bits = [1 << i for i in range(abs(n).bit_length()) if abs(n) >> i & 1]
+        naive = sum(_leaf_cost(b) for b in bits) + 4 * (len(bits) - 1)
+        assert _plan(n)[0] <= naive, n
+
+def test_huge_power_of_two():
+    for n in (2**10000, -(2**10000), 2**10000 + 1, 3 * 2**9999):
+        assert evaluate(_plan(n)[1]) == n
+    play = printing_play([2**10000, -(2**10000)], seed=0)
+    code = play.code()
+    assert len(code) < 5000
+    assert output(parse(code)) == output(play) == f'{2**10000} {-(2**10000)} '
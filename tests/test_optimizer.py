@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+import pyspl
+from pyspl.operations import _quotient, _remainder
+from pyspl.optimizer import fold
+
+from .plays import output, printing_play, spl_output
+
+SIGNS = [(7, 2), (-7, 2), (7, -2), (-7, -2), (-6, 3), (6, -3), (-1, 5), (0, -5)]
+
+def values() -> list[pyspl.Value]:
+    return [
+        pyspl.sum(3, 4),
+        pyspl.difference(pyspl.product(6, 7), 2),
+        pyspl.quotient(100, 7),
+        pyspl.remainder(100, 7),
+        pyspl.square(pyspl.sum(1, 2)),
+        pyspl.cube(pyspl.difference(1, 4)),
+        pyspl.squareroot(pyspl.product(9, 9)),
+        pyspl.factorial(5),
+        pyspl.sum(pyspl.sum(1, 1), pyspl.sum(1, 1)),
+    ]
+
+def test_optimizer_preserves_output():
+    plain = printing_play(values())
+    optimized = printing_play(values(), optimize=True, reuse_subexpressions=True, schedule_stage=True)
+    assert output(optimized) == output(plain)
+
+def test_optimizer_shortens_code():
+    play = printing_play(values(), seed=0, optimize=True)
+    code = play.code()
+    assert play.optimization_stats.operations > 0
+    assert len(code) < len(printing_play(values(), seed=0).code())
+
+@pytest.mark.parametrize('a, b', SIGNS)
+def test_division_rounds_toward_zero(a, b):
+    assert _quotient(a, b) == int(a / b)
+    assert _remainder(a, b) == int(math.fmod(a, b))
+    assert fold(pyspl.quotient(a, b)) == int(a / b)
+    assert fold(pyspl.remainder(a, b)) == int(math.fmod(a, b))
+
+def test_division_of_large_numbers():
+    a, b = -(3 ** 100), 7 ** 20
+    assert _quotient(a, b) * b + _remainder(a, b) == a
+    assert abs(_remainder(a, b)) < b and _remainder(a, b) <= 0
+
+def test_optimizer_preserves_spl_output():
+    values = [pyspl.quotient(a, b) for a, b in SIGNS] + [pyspl.remainder(a, b) for a, b in SIGNS]
+    expected = ''.join(f'{int(a / b)} ' for a, b in SIGNS) + ''.join(f'{int(math.fmod(a, b))} ' for a, b in SIGNS)
+    assert spl_output(printing_play(values, seed=0).code()) == expected
+    assert spl_output(printing_play(values, seed=0, optimize=True).code()) == expected
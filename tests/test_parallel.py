@@ -0,0 +1,12 @@
+import pytest
+
+from .plays import acts_play
+
+@pytest.mark.parametrize('style', ['default', 'compact'])
+def test_workers_match_serial_code(style):
+    play = acts_play(12, seed=0)
+    assert play.code(workers=3, style=style) == play.code(style=style)
+
+def test_workers_match_optimized_code():
+    play = acts_play(6, seed='parallel', optimize=True, reuse_subexpressions=True)
+    assert play.code(workers=2) == play.code()
@@ -0,0 +1,87 @@
+import pytest
+
+import pyspl
+from pyspl.errors import ParseError, SceneNotFound
+from pyspl.parse import parse, parse_value
+
+from .plays import loop_play, output, printing_play
+
+def values() -> list[pyspl.Value]:
+    return [0, 1, -1, 37, -1000, pyspl.sum(3, 4), pyspl.quotient(100, 7), pyspl.factorial(4)]
+
+def test_parse_round_trip():
+    play = printing_play(values(), seed=0)
+    code = play.code()
+    parsed = parse(code, seed=0)
+    assert parsed.code() == code
+    assert output(parsed) == output(play)
+
+def test_parse_compact_round_trip():
+    play = printing_play(values(), seed=0)
+    assert output(parse(play.code(style='compact'))) == output(play)
+
+def test_parse_loop_round_trip():
+    play = loop_play(5, seed=0)
+    parsed = parse(play.code(), seed=0)
+    assert parsed.code() == play.code()
+    assert output(parsed) == output(play) == '1 2 3 4 5 -5'
+
+QUESTIONS = """\
+A play of questions.
+
+Romeo, a counter.
+Juliet, a questioner.
+
+Act I: Questions.
+Scene I: The start.
+[Enter Romeo and Juliet]
+Juliet: Thou art nothing.
+Scene II: The loop.
+Juliet: You are the sum of yourself and a cat! Open your heart! {question} {goto} to scene II.
+Juliet: Let us proceed to scene IV.
+Scene III: Skipped.
+Juliet: You are a big big cat! Open your heart!
+Scene IV: The end.
+[Exeunt]
+"""
+
+def questions(question: str = 'Are you as good as a big cat?', goto: str = 'If not, let us proceed') -> str:
+    return QUESTIONS.format(question=question, goto=goto)
+
+@pytest.mark.parametrize('question, goto', [
+    ('Are you worse than a big cat?', 'If so, let us proceed'),
+    ('Art thou punier than a big cat?', 'If so, we shall return'),
+    ('Are you more evil than a big cat?', 'If so, we must proceed'),
+    ('Are you as good as a big cat?', 'If not, let us return'),
+    ('Art thou as bad as a big cat?', 'If not, we shall proceed'),
+    ('Are you better than a cat?', 'If not, let us proceed'),
+    ('Are you more big than a cat?', 'If not, we must return'),
+])
+def test_parse_questions(question, goto):
+    play = parse(questions(question, goto))
+    assert output(play) == '12'
+
+@pytest.mark.parametrize('line', [
+    'Juliet: Are you nicer?',
+    'Juliet: Are you kinder than a cat?',
+    'Juliet: If maybe, let us proceed to scene II.',
+    'Juliet: Let us proceed to scene two.',
+])
+def test_parse_invalid_questions(line):
+    with pytest.raises(ParseError):
+        parse(questions().replace('Juliet: Let us proceed to scene IV.', line))
+
+def test_parse_goto_unknown_scene():
+    # Like any play, it can be read, but jumping to a scene that does not exist is a violation.
+    play = parse(questions().replace('scene IV.', 'scene V.'))
+    assert [type(v.error) for v in play.validate()] == [SceneNotFound]
+
+def test_parse_value():
+    value = parse_value('the sum of a cat and a big cat')
+    assert isinstance(value, pyspl.sum)
+    assert (value.a, value.b) == (1, 2)
+
+@pytest.mark.parametrize('text', ['', 'the sum of a cat', 'a cat and a cat', 'the square of', 'twice you'])
+def test_parse_invalid_value(text):
+    with pytest.raises(ParseError):
+        parse_value(text)
@@ -0,0 +1,91 @@
+import pytest
+
+import pyspl
+from pyspl import errors, play as play_module
+from pyspl.parse import parse
+from pyspl.vocabulary import Vocabulary
+
+from .plays import output, printing_play, spl_output
+
+@pytest.mark.parametrize('batch_lines', [1, 7, play_module.SAVE_BATCH_LINES])
+def test_save_matches_iter_code(tmp_path, monkeypatch, batch_lines):
+    monkeypatch.setattr(play_module, 'SAVE_BATCH_LINES', batch_lines)
+    play = printing_play(range(-50, 50), seed=0)
+    play.save(tmp_path / 'play.spl')
+    lines = list(play.iter_code())
+    assert (tmp_path / 'play.spl').read_text() == ''.join(line + '\n' for line in lines)
+    assert '\n'.join(lines) == play.code()
+
+def test_save_compact(tmp_path):
+    play = printing_play(range(10), seed=0)
+    play.save(tmp_path / 'play.spl', style='compact')
+    assert (tmp_path / 'play.spl').read_text() == ''.join(line + '\n' for line in play.iter_code('compact'))
+
+def test_compact_code():
+    play = printing_play([0, 1, -1, 7, -8, 1234, -99999, 2 ** 31 - 1], seed=0)
+    code = play.code(style='compact')
+    assert len(code) < len(play.code())
+    assert output(parse(code)) == output(play)
+    assert spl_output(code) == output(play)
+
+def test_character_in_several_plays():
+    romeo = pyspl.Character('Romeo', 'a shared character.')
+    juliet = pyspl.Character('Juliet', 'another one.')
+    first, second = pyspl.Play('One play.'), pyspl.Play('Another play.')
+    first.add_character(romeo)
+    first.add_character(juliet)
+    second.add_character(juliet)
+    second.add_character(romeo)
+    assert first.characters == [romeo, juliet]
+    assert second.characters == [juliet, romeo]
+    assert [c.name for c in pyspl.Play.loads(second.dumps()).characters] == ['Juliet', 'Romeo']
+    assert 'Romeo, a shared character.\nJuliet, another one.' in first.code()
+
+def test_duplicate_character_name():
+    play = pyspl.Play('A play.')
+    romeo = play.character('Romeo', 'a lover.')
+    assert play.character('Romeo', 'ignored.') is romeo
+    play.add_character(romeo)
+    assert play.characters == [romeo]
+    with pytest.raises(ValueError, match='duplicate character name'):
+        play.add_character(pyspl.Character('Romeo', 'an impostor.'))
+
+def test_validate_returns_every_violation():
+    nouns_only = Vocabulary({'positive_neutral': ['cat'], 'negative': ['pig']}, {})
+    play = pyspl.Play('An invalid play.', vocabulary=nouns_only)
+    romeo = play.character('Romeo', 'a lover.')
+    juliet = play.character('Juliet', 'his love.')
+    hamlet = play.character('Hamlet', 'a stranger.')
+
+    class Invalid(pyspl.Act):
+        def __init__(self, play: pyspl.Play) -> None:
+            super().__init__(play)
+            self.add_scene(self.first, 'I', 'Broken statements.')
+            self.add_scene(self.second, 'II', 'A broken method.')
+
+        def first(self) -> None:
+            self.enter(romeo, juliet)
+            self.set(romeo, 1)
+            self.set(hamlet, 1)
+            self.set(romeo, 'one')
+            self.remember(romeo, pyspl.sum(romeo, 4))
+            self.ask(romeo, '>', pyspl.square(-2))
+            self.ask(romeo, '!=', 1)
+            self.goto('III')
+            self.exit()
+
+        def second(self) -> None:
+            raise RuntimeError('broken')
+
+    play.add_act(Invalid(play), 'I', 'The only act.')
+    violations = play.validate()
+    assert [(v.scene, v.method, type(v.error)) for v in violations] == [
+        ('I', 'first', errors.CharacterNotOnstage),
+        ('I', 'first', TypeError),
+        ('I', 'first', errors.InvalidNumberError),
+        ('I', 'first', errors.InvalidNumberError),
+        ('I', 'first', ValueError),
+        ('I', 'first', errors.SceneNotFound),
+        ('II', 'second', RuntimeError),
+    ]
+    assert str(violations[-1]) == 'Act I, Scene II (second): RuntimeError: broken'
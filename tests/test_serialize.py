@@ -0,0 +1,33 @@
+import pyspl
+
+from .plays import loop_play, output, printing_play
+
+def values() -> list[pyspl.Value]:
+    return [0, 1, -1, 37, -1000, pyspl.sum(3, 4), pyspl.remainder(100, 7), pyspl.squareroot(50)]
+
+def test_loads_dumps_round_trip():
+    play = printing_play(values(), seed=0)
+    loaded = pyspl.Play.loads(play.dumps())
+    assert loaded.code() == play.code()
+    assert [c.name for c in loaded.characters] == [c.name for c in play.characters]
+    assert output(loaded) == output(play)
+
+def test_loads_options():
+    play = printing_play(values(), seed=0)
+    loaded = pyspl.Play.loads(play.dumps(), cache=True)
+    assert loaded.render_cache is not None
+    assert loaded.code() == play.code()
+
+def test_dumps_is_stable():
+    play = printing_play(values(), seed=0)
+    assert pyspl.Play.loads(play.dumps()).dumps() == play.dumps()
+
+def test_loop_round_trip():
+    play = loop_play(7, seed=0)
+    loaded = pyspl.Play.loads(play.dumps())
+    assert loaded.code() == play.code()
+    assert output(loaded) == output(play)
+
+def test_wide_numbers_round_trip():
+    play = printing_play([2**40, -(2**62), 2**100], seed=0)
+    assert pyspl.Play.loads(play.dumps()).code() == play.code()
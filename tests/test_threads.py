@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+
+import pytest
+
+from .plays import acts_play, output
+
+@pytest.fixture(autouse=True)
+def switch_often():
+    # Makes threads switch in the middle of scenes instead of each running to the end on its own.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def render_together(jobs: list, threads: int) -> list:
+    barrier = threading.Barrier(threads)
+
+    def run(job):
+        barrier.wait()
+        return job()
+
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(run, jobs))
+
+@pytest.mark.parametrize('cache', [False, True])
+def test_same_play_in_threads(cache):
+    play = acts_play(40, seed=0, cache=cache, optimize=True)
+    expected = acts_play(40, seed=0, optimize=True).code()
+    assert render_together([play.code] * 8, 8) == [expected] * 8
+
+def test_different_plays_in_threads():
+    plays = [acts_play(n, seed=n) for n in range(1, 9)]
+    expected = [play.code() for play in plays]
+    assert render_together([play.code for play in plays], 8) == expected
+
+def test_threads_mix_styles_and_runs():
+    play = acts_play(6, seed=0)
+    jobs = [play.code, lambda: play.code(style='compact'), play.validate, lambda: output(play)] * 2
+    results = render_together(jobs, len(jobs))
+    assert results[0] == results[4] == acts_play(6, seed=0).code()
+    assert results[1] == results[5] == acts_play(6, seed=0).code(style='compact')
+    assert results[2] == results[6] == []
+    assert results[3] == results[7] == output(acts_play(6))
@@ -0,0 +1,34 @@
+import io
+
+import pyspl
+from pyspl import vm
+
+from .plays import output, printing_play, spl_output
+
+def values() -> list[pyspl.Value]:
+    signs = [(7, 2), (-7, 2), (7, -2), (-7, -2), (-6, 3), (-1, 5), (0, -5)]
+    return [
+        *(pyspl.quotient(a, b) for a, b in signs),
+        *(pyspl.remainder(a, b) for a, b in signs),
+        pyspl.sum(-3, 10),
+        pyspl.difference(4, 9),
+        pyspl.product(-6, 7),
+        pyspl.cube(-3),
+        pyspl.squareroot(99),
+        pyspl.factorial(6),
+    ]
+
+def test_matches_spl():
+    play = printing_play(values(), seed=0)
+    assert output(play) == spl_output(play.code())
+
+def test_final_values():
+    play = printing_play([pyspl.quotient(-7, 2)])
+    assert vm.run(play, stdout=io.StringIO()) == [32, 0]
+
+def test_program_runs_again():
+    program = vm.compile(printing_play(values()))
+    first, second = io.StringIO(), io.StringIO()
+    program.run(stdout=first)
+    program.run(stdout=second)
+    assert first.getvalue() == second.getvalue()
@@ -0,0 +1,53 @@
+import mmap
+import pickle
+
+import pytest
+
+import pyspl
+from pyspl.vocabulary import KINDS, Vocabulary, default_vocabulary
+
+from .plays import printing_play
+
+def extra() -> Vocabulary:
+    return Vocabulary(
+        {'positive_neutral': ['llama', 'éclair'], 'negative': ['gremlin']},
+        {'positive_neutral': ['zesty'], 'negative': ['grumpy', 'soggy']},
+    )
+
+def tables(vocabulary: Vocabulary) -> tuple:
+    return tuple(
+        (list(vocabulary.nouns[kind]), list(vocabulary.adjectives[kind])) for kind in KINDS
+    )
+
+def test_word_pack_round_trip(tmp_path):
+    vocabulary = default_vocabulary + extra()
+    vocabulary.save(tmp_path / 'words.pack')
+    loaded = Vocabulary.load(tmp_path / 'words.pack')
+    assert isinstance(loaded._data, mmap.mmap)
+    assert tables(loaded) == tables(vocabulary)
+    assert loaded.limits == vocabulary.limits
+    assert loaded.nouns['positive_neutral'][-3:] == vocabulary.nouns['positive_neutral'][-3:]
+
+def test_pickle(tmp_path):
+    extra().save(tmp_path / 'words.pack')
+    loaded = Vocabulary.load(tmp_path / 'words.pack')
+    for vocabulary in (extra(), loaded):
+        assert tables(pickle.loads(pickle.dumps(vocabulary))) == tables(vocabulary)
+    assert pickle.loads(pickle.dumps(loaded))._data is not None
+    assert pickle.loads(pickle.dumps(default_vocabulary)) is default_vocabulary
+
+def test_play_with_word_pack(tmp_path):
+    vocabulary = default_vocabulary + extra()
+    vocabulary.save(tmp_path / 'words.pack')
+    loaded = Vocabulary.load(tmp_path / 'words.pack')
+    values = [1, -1, 37, -1000]
+    code = printing_play(values, seed=0, vocabulary=loaded).code()
+    assert code == printing_play(values, seed=0, vocabulary=vocabulary).code()
+    assert pyspl.Play.loads(printing_play(values, seed=0, vocabulary=loaded).dumps()).code() == code
+
+def test_not_a_word_pack(tmp_path):
+    (tmp_path / 'empty').write_bytes(b'')
+    (tmp_path / 'text').write_bytes(b'not a word pack at all')
+    for name in ('empty', 'text'):
+        with pytest.raises(ValueError, match='not a word pack'):
+            Vocabulary.load(tmp_path / name)